@@ -10,7 +10,8 @@ REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
 celery_app = Celery(
     "app",
     broker=REDIS_URL,
-    backend=REDIS_URL,
+    # 태스크 결과를 읽는 곳이 없으므로 결과 백엔드를 두지 않음
+    # (백엔드가 있으면 태스크를 보내는 쪽도 결과 채널을 구독함)
     include=["app.tasks.email"],  # 이메일 태스크 모듈 포함
 )
 
@@ -20,6 +21,8 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="Asia/Seoul",
     enable_utc=True,
+    # 워커도 결과를 기록하지 않음
+    task_ignore_result=True,
     broker_connection_retry_on_startup=True,
     broker_connection_max_retries=10,
     broker_connection_retry=True,
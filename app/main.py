@@ -1,20 +1,61 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.routes import auth, friends, util
 from app.routes import chat as chat_routes
-from app.database import engine
+from app.database import engine, pool_stats
 from app.models import user, friendship
 from app.models import chat as chat_models
+from app.models import outbox as outbox_models
+from app.utils.websocket_manager import manager
+from app.utils.user_cache import user_directory
+from app.utils.auth import password_hasher
+from app.utils.rate_limit import rate_limiter
+from app.utils.admission import ws_admission
+from app.services.message_pipeline import message_pipeline
+from app.services.read_receipts import read_receipts
+from app.services.membership import membership_cache
+from app.services.message_buffer import message_buffer
+from app.services.event_coalescer import event_coalescer
+from app.services.outbox import outbox_relay
+from app.services.friend_graph import friend_graph
 
 # 데이터베이스 테이블 생성
 user.Base.metadata.create_all(bind=engine)
 friendship.Base.metadata.create_all(bind=engine)
 chat_models.Base.metadata.create_all(bind=engine)
+outbox_models.Base.metadata.create_all(bind=engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 워커 단위 백그라운드 구성요소 시작/종료
+    await manager.start()
+    membership_cache.attach(manager.backplane)
+    message_buffer.attach(manager.backplane)
+    await rate_limiter.start()
+    await message_buffer.start()
+    await message_pipeline.start()
+    await read_receipts.start()
+    await event_coalescer.start()
+    await outbox_relay.start()
+    yield
+    await outbox_relay.stop()
+    await event_coalescer.stop()
+    await read_receipts.stop()
+    await message_pipeline.stop()
+    await message_buffer.stop()
+    await rate_limiter.stop()
+    await manager.stop()
+    password_hasher.shutdown()
+
 
 app = FastAPI(
     title="채팅 애플리케이션 API",
     description="FastAPI를 사용한 채팅 애플리케이션 백엔드",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS 설정
@@ -43,6 +84,33 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    # 로드 밸런서용: 새 WebSocket 을 받을 여유가 없으면 503 을 반환해 다른 워커로 보내도록 함
+    headroom = ws_admission.headroom()
+    return JSONResponse(headroom, status_code=200 if headroom["accepting"] else 503)
+
+
+@app.get("/metrics")
+async def metrics():
+    # 현재 워커 프로세스의 내부 지표
+    return {
+        "websocket": manager.stats(),
+        "websocket_admission": ws_admission.stats(),
+        "message_pipeline": message_pipeline.stats(),
+        "read_receipts": read_receipts.stats(),
+        "event_coalescer": event_coalescer.stats(),
+        "outbox": outbox_relay.stats(),
+        "user_cache": user_directory.stats(),
+        "membership_cache": membership_cache.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "friend_graph": friend_graph.stats(),
+        "message_buffer": message_buffer.stats(),
+        "password_hasher": password_hasher.stats(),
+        "database_pool": pool_stats(),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,3 +1,4 @@
 from app.models.user import User
 from app.models.friendship import Friendship
 from app.models.chat import ChatRoom, ChatRoomParticipant, Message
+from app.models.outbox import OutboxMessage
@@ -1,3 +1,5 @@
+from datetime import datetime, timezone
+
 from sqlalchemy import Column, Integer, ForeignKey, String, DateTime, Boolean, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -13,10 +15,38 @@ class ChatRoom(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # 채팅방 목록 조회용 요약 (메시지 전송/참여자 변경 트랜잭션에서 함께 갱신)
+    last_message_id = Column(Integer, nullable=True)
+    last_message_preview = Column(String, nullable=True)
+    last_message_time = Column(DateTime(timezone=True), nullable=True)
+    # 목록 정렬 기준 (마지막 메시지 또는 생성 시간)
+    # 커서와 비교하는 컬럼이므로 값은 항상 파이썬에서 바인딩 (SQLite 의 CURRENT_TIMESTAMP 는
+    # 초 단위 문자열이라 SQLAlchemy 가 바인딩하는 형식과 문자열로 비교하면 순서가 어긋남)
+    last_activity_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        nullable=False,
+    )
+    participants_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # 채팅방 메시지 순번 카운터 (안 읽은 메시지 수 계산용)
+    message_seq = Column(Integer, nullable=False, default=0, server_default="0")
+    # 메시지 전송 제한 (관리자가 설정, 없으면 서버 기본값)
+    message_rate_per_minute = Column(
+        Integer, nullable=True
+    )  # 채팅방 전체 분당 메시지 수
+    slow_mode_seconds = Column(
+        Integer, nullable=False, default=0, server_default="0"
+    )  # 참여자별 메시지 간 최소 간격(초), 0 이면 꺼짐
+
     participants = relationship("ChatRoomParticipant", back_populates="chat_room")
     messages = relationship("Message", back_populates="chat_room")
     creator = relationship("User", foreign_keys=[created_by])
 
+    __table_args__ = (
+        Index("idx_chat_rooms_activity", last_activity_at.desc(), id.desc()),
+    )
+
 
 class ChatRoomParticipant(Base):
     __tablename__ = "chat_room_participants"
@@ -26,12 +56,19 @@ class ChatRoomParticipant(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     is_admin = Column(Boolean, default=False)  # 관리자 여부
     joined_at = Column(DateTime(timezone=True), server_default=func.now())
+    # 마지막으로 읽은 메시지 (읽음 표시)
+    last_read_message_id = Column(Integer, nullable=True)
+    last_read_seq = Column(Integer, nullable=False, default=0, server_default="0")
 
     chat_room = relationship("ChatRoom", back_populates="participants")
     user = relationship("User")
 
     __table_args__ = (
         Index("idx_chat_room_participant", chat_room_id, user_id, unique=True),
+        # 사용자별 참여 채팅방 조회용
+        Index("idx_chat_room_participant_user", user_id, chat_room_id),
+        # 참여자 목록을 참여 순(id 순)으로 페이지 조회하는 키셋 인덱스
+        Index("idx_chat_room_participant_room_id", chat_room_id, id),
     )
 
 
@@ -47,6 +84,19 @@ class Message(Base):
     client_timestamp = Column(
         DateTime(timezone=True), nullable=True
     )  # 클라이언트 타임스탬프
+    seq = Column(Integer, nullable=True)  # 채팅방 내 메시지 순번
 
     chat_room = relationship("ChatRoom", back_populates="messages")
     sender = relationship("User")
+
+    __table_args__ = (
+        # 키셋 페이지네이션용 (채팅방, 시간 역순, ID 역순) 인덱스
+        Index(
+            "idx_messages_room_created_id",
+            chat_room_id,
+            created_at.desc(),
+            id.desc(),
+        ),
+        # 재연결 시 놓친 메시지 재전송용 (채팅방, 순번) 인덱스
+        Index("idx_messages_room_seq", chat_room_id, seq),
+    )
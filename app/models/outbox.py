@@ -0,0 +1,20 @@
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, String
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class OutboxMessage(Base):
+    __tablename__ = "outbox_messages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    task_name = Column(String, nullable=False)  # Celery 태스크 이름
+    args = Column(JSON, nullable=False, default=list)
+    kwargs = Column(JSON, nullable=False, default=dict)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # 재시도 대기 중이면 다음 전송 가능 시각 (NULL 이면 바로 전송)
+    available_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(String, nullable=True)
+
+    # 전송된 행은 삭제되므로 테이블에는 대기 중인 행만 남음
+    __table_args__ = (Index("idx_outbox_available", available_at, id),)
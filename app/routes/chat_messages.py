@@ -1,15 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
-from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, desc, func, select
+from typing import List, Optional
 from datetime import datetime
 import logging
 
 from app.database import get_db
 from app.models.user import User
-from app.models.chat import ChatRoom, ChatRoomParticipant, Message
+from app.models.chat import ChatRoom, Message
 from app.schemas.chat import MessageCreate, MessageInfo, MessageList
+from app.services.membership import (
+    RoomMembership,
+    require_room_member,
+)
+from app.services.message_rate_limit import check_message_rate, rate_limit_exceeded
+from app.services.room_summary import refresh_last_message
 from app.utils.auth import get_current_user
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.services.message_pipeline import message_pipeline
+from app.services.message_buffer import (
+    buffered_message,
+    message_buffer,
+    message_entry,
+)
 
 # 로거 설정
 logger = logging.getLogger(__name__)
@@ -23,42 +36,12 @@ async def send_message(
     room_id: int,
     message_data: MessageCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    membership: RoomMembership = Depends(require_room_member()),
+    db: AsyncSession = Depends(get_db),
 ):
     """채팅방에 새 메시지를 전송합니다."""
     logger.info(f"Sending message to room {room_id}. User: {current_user.username}")
 
-    # 채팅방 존재 확인
-    chat_room = db.query(ChatRoom).filter(ChatRoom.id == room_id).first()
-    if not chat_room:
-        logger.error(f"Chat room with id {room_id} not found")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Chat room with id {room_id} not found",
-        )
-
-    # 사용자가 채팅방 참여자인지 확인
-    is_participant = (
-        db.query(ChatRoomParticipant)
-        .filter(
-            and_(
-                ChatRoomParticipant.chat_room_id == room_id,
-                ChatRoomParticipant.user_id == current_user.id,
-            )
-        )
-        .first()
-        is not None
-    )
-
-    if not is_participant:
-        logger.error(
-            f"User {current_user.username} is not a participant of chat room {room_id}"
-        )
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a participant of this chat room",
-        )
-
     # 메시지 내용 확인
     if not message_data.content.strip():
         logger.error(
@@ -82,32 +65,33 @@ async def send_message(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sender username"
         )
 
-    # 새 메시지 생성
-    new_message = Message(
-        chat_room_id=room_id, sender_id=current_user.id, content=message_data.content
-    )
+    # 전송 한도 확인 (한도를 넘으면 DB 에 닿기 전에 429 로 응답)
+    retry_after = await check_message_rate(membership, current_user.id)
+    if retry_after:
+        raise rate_limit_exceeded(retry_after)
 
     # 클라이언트 타임스탬프가 제공된 경우 저장
+    client_timestamp = None
     if message_data.timestamp:
         try:
             # ISO 형식 문자열을 datetime으로 변환
             client_timestamp = datetime.fromisoformat(
                 message_data.timestamp.replace("Z", "+00:00")
             )
-            new_message.client_timestamp = client_timestamp
             logger.info(f"Using client timestamp: {message_data.timestamp}")
         except ValueError:
             # 잘못된 형식이면 무시
             logger.warning(f"Invalid timestamp format: {message_data.timestamp}")
             pass
 
-    db.add(new_message)
-    db.commit()
-    db.refresh(new_message)
+    # 새 메시지 저장 (채팅방 업데이트 시간도 같은 트랜잭션에서 갱신)
+    new_message = await message_pipeline.submit(
+        room_id, current_user.id, message_data.content, client_timestamp
+    )
 
-    # 채팅방 업데이트 시간 갱신
-    chat_room.updated_at = new_message.created_at
-    db.commit()
+    await message_buffer.append(
+        room_id, buffered_message(new_message, current_user.username)
+    )
 
     logger.info(
         f"Message sent to room {room_id} by user {current_user.username} (message_id: {new_message.id})"
@@ -122,94 +106,158 @@ async def send_message(
     )
 
 
+def _message_info(entry: dict) -> MessageInfo:
+    return MessageInfo(
+        id=entry["id"],
+        sender_username=entry["sender_username"],
+        content=entry["content"] if not entry["is_deleted"] else "[삭제된 메시지]",
+        created_at=entry["created_at"],
+        is_deleted=entry["is_deleted"],
+        client_timestamp=entry["client_timestamp"],
+    )
+
+
+def _message_cursor(seq: Optional[int]) -> Optional[str]:
+    # 순번이 없는 기존 메시지(백필 전)는 커서를 만들 수 없음
+    return encode_cursor(seq) if seq is not None else None
+
+
+def _parse_message_cursor(cursor: str) -> int:
+    (seq,) = decode_cursor(cursor, 1)
+    if not isinstance(seq, int) or isinstance(seq, bool):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    return seq
+
+
 @router.get("/{room_id}/messages", response_model=MessageList)
 async def get_messages(
     room_id: int,
-    page: int = Query(1, ge=1),
+    page: Optional[int] = Query(None, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    before: Optional[str] = Query(None, description="이 커서보다 오래된 메시지"),
+    after: Optional[str] = Query(None, description="이 커서보다 최신 메시지"),
+    include_total: bool = Query(False, description="커서 모드에서 전체 개수 포함"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    membership: RoomMembership = Depends(require_room_member()),
+    db: AsyncSession = Depends(get_db),
 ):
-    """채팅방의 메시지 목록을 조회합니다."""
+    """채팅방의 메시지 목록을 조회합니다.
+
+    before/after 커서를 사용하는 키셋 페이지네이션이 기본이며,
+    page 를 지정한 기존 클라이언트는 오프셋 방식으로 동작합니다.
+    """
     logger.info(
-        f"Getting messages for room {room_id}. User: {current_user.username}, Page: {page}, Page size: {page_size}"
+        f"Getting messages for room {room_id}. User: {current_user.username}, Page: {page}, Page size: {page_size}, Before: {before}, After: {after}"
     )
 
-    # 채팅방 존재 확인
-    chat_room = db.query(ChatRoom).filter(ChatRoom.id == room_id).first()
-    if not chat_room:
-        logger.error(f"Chat room with id {room_id} not found")
+    if before and after:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Chat room with id {room_id} not found",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only one of 'before' or 'after' can be used",
         )
 
-    # 사용자가 채팅방 참여자인지 확인
-    is_participant = (
-        db.query(ChatRoomParticipant)
-        .filter(
-            and_(
-                ChatRoomParticipant.chat_room_id == room_id,
-                ChatRoomParticipant.user_id == current_user.id,
-            )
-        )
-        .first()
-        is not None
-    )
+    legacy_mode = page is not None and not before and not after
+    newest_page = not legacy_mode and not before and not after and not include_total
 
-    if not is_participant:
-        logger.error(
-            f"User {current_user.username} is not a participant of chat room {room_id}"
-        )
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a participant of this chat room",
+    generation = None
+    if newest_page:
+        # 가장 많이 읽는 최신 페이지는 최근 메시지 버퍼에서 먼저 조회
+        latest_seq = await db.scalar(
+            select(ChatRoom.message_seq).where(ChatRoom.id == room_id)
         )
+        buffered = await message_buffer.newest(room_id, page_size, latest_seq)
+        if buffered is not None:
+            # seq 는 1부터 빈틈 없이 증가하므로 더 오래된 메시지 유무를 바로 알 수 있음
+            return _message_list(
+                list(reversed(buffered)),
+                page_size=page_size,
+                has_more=buffered[-1]["seq"] > 1,
+            )
+        generation = await message_buffer.generation(room_id)
 
-    # 메시지 총 개수 조회
-    total_count = db.query(Message).filter(Message.chat_room_id == room_id).count()
-
-    # 메시지 목록 조회 (최신 메시지부터)
-    messages = (
-        db.query(Message)
-        .filter(Message.chat_room_id == room_id)
-        .order_by(Message.created_at.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
+    query = (
+        select(Message, User.username)
+        .outerjoin(User, User.id == Message.sender_id)
+        .where(Message.chat_room_id == room_id)
     )
 
-    # 메시지 정보 구성
-    message_infos = []
-    for message in messages:
-        sender = db.query(User).filter(User.id == message.sender_id).first()
-
-        # 클라이언트 타임스탬프 처리
-        client_ts = None
-        if message.client_timestamp:
-            client_ts = message.client_timestamp.isoformat()
-
-        message_infos.append(
-            MessageInfo(
-                id=message.id,
-                sender_username=sender.username if sender else "[사용자 없음]",
-                content=(
-                    message.content if not message.is_deleted else "[삭제된 메시지]"
-                ),
-                created_at=message.created_at,
-                is_deleted=message.is_deleted,
-                client_timestamp=client_ts,
-            )
+    if legacy_mode:
+        # 기존 클라이언트용 오프셋 페이지네이션 ((chat_room_id, created_at DESC, id DESC) 인덱스)
+        query = (
+            query.order_by(Message.created_at.desc(), Message.id.desc())
+            .offset((page - 1) * page_size)
+            .limit(page_size + 1)
+        )
+    elif after:
+        # 커서 이후의 최신 메시지 (오래된 순으로 읽은 뒤 뒤집음)
+        # 커서는 (chat_room_id, seq) 인덱스를 타는 채팅방 내 순번
+        # created_at 은 SQLite 에서 초 단위 문자열로 저장되어 바인딩한 값과 정확히 비교되지 않음
+        query = (
+            query.where(Message.seq > _parse_message_cursor(after))
+            .order_by(Message.seq.asc())
+            .limit(page_size + 1)
+        )
+    else:
+        # 순번 백필 전 메시지(seq NULL)는 PostgreSQL 내림차순에서 맨 앞에 오므로 제외
+        # (NULLS LAST 로 정렬하면 인덱스 역방향 스캔을 쓰지 못함)
+        query = query.where(Message.seq.isnot(None))
+        if before:
+            query = query.where(Message.seq < _parse_message_cursor(before))
+        query = query.order_by(Message.seq.desc()).limit(page_size + 1)
+
+    rows = (await db.execute(query)).all()
+    has_more = len(rows) > page_size
+    entries = [message_entry(message, username) for message, username in rows]
+    if newest_page:
+        await message_buffer.fill(room_id, entries, generation)
+    entries = entries[:page_size]
+    if after:
+        entries.reverse()
+
+    # 메시지 총 개수 조회 (기존 클라이언트 또는 요청한 경우에만)
+    total_count = None
+    if legacy_mode or include_total:
+        total_count = await db.scalar(
+            select(func.count())
+            .select_from(Message)
+            .where(Message.chat_room_id == room_id)
         )
-
-    # 시간순으로 정렬 (오래된 메시지부터)
-    message_infos.reverse()
 
     logger.info(
-        f"Retrieved {len(message_infos)} messages for room {room_id} (total: {total_count})"
+        f"Retrieved {len(entries)} messages for room {room_id} (total: {total_count})"
+    )
+    # 시간순으로 정렬 (오래된 메시지부터)
+    return _message_list(
+        list(reversed(entries)),
+        page_size=page_size,
+        has_more=has_more,
+        total_count=total_count,
+        page=page if legacy_mode else None,
     )
+
+
+def _message_list(
+    entries: List[dict],
+    page_size: int,
+    has_more: bool,
+    total_count: Optional[int] = None,
+    page: Optional[int] = None,
+) -> MessageList:
+    # entries 는 오래된 메시지부터 정렬된 버퍼 항목 형식
+    before_cursor = after_cursor = None
+    if entries:
+        before_cursor = _message_cursor(entries[0]["seq"])
+        after_cursor = _message_cursor(entries[-1]["seq"])
     return MessageList(
-        messages=message_infos, total_count=total_count, page=page, page_size=page_size
+        messages=[_message_info(entry) for entry in entries],
+        total_count=total_count,
+        page=page,
+        page_size=page_size,
+        before_cursor=before_cursor,
+        after_cursor=after_cursor,
+        has_more=has_more,
     )
 
 
@@ -218,27 +266,19 @@ async def delete_message(
     room_id: int,
     message_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    membership: RoomMembership = Depends(require_room_member(fresh=True)),
+    db: AsyncSession = Depends(get_db),
 ):
     """메시지를 삭제합니다."""
     logger.info(
         f"Deleting message {message_id} in room {room_id}. User: {current_user.username}"
     )
 
-    # 채팅방 존재 확인
-    chat_room = db.query(ChatRoom).filter(ChatRoom.id == room_id).first()
-    if not chat_room:
-        logger.error(f"Chat room with id {room_id} not found")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Chat room with id {room_id} not found",
-        )
-
     # 메시지 존재 확인
-    message = (
-        db.query(Message)
-        .filter(and_(Message.id == message_id, Message.chat_room_id == room_id))
-        .first()
+    message = await db.scalar(
+        select(Message)
+        .where(and_(Message.id == message_id, Message.chat_room_id == room_id))
+        .limit(1)
     )
 
     if not message:
@@ -255,18 +295,7 @@ async def delete_message(
 
     # 자신의 메시지인지 또는 관리자인지 확인
     is_own_message = message.sender_id == current_user.id
-    is_admin = (
-        db.query(ChatRoomParticipant)
-        .filter(
-            and_(
-                ChatRoomParticipant.chat_room_id == room_id,
-                ChatRoomParticipant.user_id == current_user.id,
-                ChatRoomParticipant.is_admin == True,
-            )
-        )
-        .first()
-        is not None
-    )
+    is_admin = membership.is_admin(current_user.id)
 
     if not (is_own_message or is_admin):
         logger.error(
@@ -279,7 +308,14 @@ async def delete_message(
 
     # 메시지 삭제 처리 (실제로는 is_deleted 플래그만 설정)
     message.is_deleted = True
-    db.commit()
+    chat_room = await db.get(ChatRoom, room_id)
+    if chat_room.last_message_id == message.id:
+        # 목록에 표시되던 마지막 메시지면 요약을 다시 계산
+        await db.flush()
+        await refresh_last_message(db, room_id)
+    await db.commit()
+    # 최근 메시지 버퍼에 삭제 전 내용이 남지 않도록 무효화
+    await message_buffer.invalidate_everywhere(room_id)
 
     logger.info(
         f"Message {message_id} successfully deleted by user {current_user.username}"
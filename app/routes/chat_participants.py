@@ -1,14 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, delete, select, update
+from typing import Optional
 import logging
 
 from app.database import get_db
 from app.models.user import User
 from app.models.chat import ChatRoom, ChatRoomParticipant
-from app.schemas.chat import ParticipantInfo, ParticipantAdd
+from app.schemas.chat import ParticipantAdd, ParticipantList
+from app.services.membership import (
+    RoomMembership,
+    membership_cache,
+    require_room_member,
+)
+from app.services.participants import (
+    insert_participants,
+    list_participants,
+    resolve_usernames,
+    unique_usernames,
+)
+from app.services.room_summary import adjust_participants_count
 from app.utils.auth import get_current_user
+from app.utils.user_cache import user_directory
+from app.utils.websocket_manager import manager
 
 # 로거 설정
 logger = logging.getLogger(__name__)
@@ -17,85 +31,45 @@ logging.basicConfig(level=logging.INFO)
 router = APIRouter()
 
 
+def _participant_filter(room_id: int, user_id: int):
+    return and_(
+        ChatRoomParticipant.chat_room_id == room_id,
+        ChatRoomParticipant.user_id == user_id,
+    )
+
+
 @router.post("/{room_id}/participants", status_code=status.HTTP_201_CREATED)
 async def add_participants(
     room_id: int,
     participant_data: ParticipantAdd,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    membership: RoomMembership = Depends(require_room_member(admin=True)),
+    db: AsyncSession = Depends(get_db),
 ):
     """채팅방에 새로운 참여자를 추가합니다."""
     logger.info(
         f"Adding participants to room {room_id}. User: {current_user.username}, Participants: {participant_data.usernames}"
     )
 
-    # 채팅방 존재 확인
-    chat_room = db.query(ChatRoom).filter(ChatRoom.id == room_id).first()
-    if not chat_room:
-        logger.error(f"Chat room with id {room_id} not found")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Chat room with id {room_id} not found",
-        )
-
-    # 사용자가 채팅방 관리자인지 확인
-    participant = (
-        db.query(ChatRoomParticipant)
-        .filter(
-            and_(
-                ChatRoomParticipant.chat_room_id == room_id,
-                ChatRoomParticipant.user_id == current_user.id,
-                ChatRoomParticipant.is_admin == True,
-            )
-        )
-        .first()
+    # 참여 이전의 메시지는 안 읽은 메시지로 세지 않음
+    message_seq = await db.scalar(
+        select(ChatRoom.message_seq).where(ChatRoom.id == room_id)
     )
 
-    if not participant:
-        logger.error(
-            f"User {current_user.username} is not an admin of chat room {room_id}"
-        )
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not an admin of this chat room",
-        )
-
-    # 추가할 사용자 확인
-    added_users = []
-    for username in participant_data.usernames:
-        # 사용자 존재 확인
-        user = db.query(User).filter(User.username == username).first()
-        if not user:
-            logger.error(f"User with username '{username}' not found")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"User with username '{username}' not found",
-            )
-
-        # 이미 참여자인지 확인
-        existing_participant = (
-            db.query(ChatRoomParticipant)
-            .filter(
-                and_(
-                    ChatRoomParticipant.chat_room_id == room_id,
-                    ChatRoomParticipant.user_id == user.id,
-                )
-            )
-            .first()
-        )
-
-        if existing_participant:
-            logger.info(f"User {username} is already a participant in room {room_id}")
-            continue  # 이미 참여자인 경우 건너뜀
+    # 추가할 사용자를 한 번에 조회 (없는 사용자는 모두 모아서 404)
+    users = await resolve_usernames(db, unique_usernames(participant_data.usernames))
 
-        # 새 참여자 추가
-        new_participant = ChatRoomParticipant(
-            chat_room_id=room_id, user_id=user.id, is_admin=False
-        )
-        db.add(new_participant)
-        added_users.append(username)
+    # 이미 참여자인 사용자는 건너뜀 (동시에 추가된 경우는 ON CONFLICT 로 건너뜀)
+    new_users = [user for user in users if not membership.is_member(user.id)]
+    inserted = await insert_participants(
+        db, room_id, [user.id for user in new_users], last_read_seq=message_seq or 0
+    )
+    inserted_ids = {participant.user_id for participant in inserted}
+    added_users = [user.username for user in new_users if user.id in inserted_ids]
 
-    db.commit()
+    await adjust_participants_count(db, room_id, len(added_users))
+    await db.commit()
+    await membership_cache.invalidate_everywhere(room_id)
 
     if not added_users:
         logger.info(f"No new participants added to room {room_id}")
@@ -105,68 +79,45 @@ async def add_participants(
     return {"message": f"Added {', '.join(added_users)} to the chat room"}
 
 
-@router.get("/{room_id}/participants", response_model=List[ParticipantInfo])
+@router.get("/{room_id}/participants", response_model=ParticipantList)
 async def get_participants(
     room_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="참여 시간 순서"),
+    admin: Optional[bool] = Query(
+        None, description="관리자만(true) 또는 일반 참여자만(false)"
+    ),
+    online: Optional[bool] = Query(
+        None, description="접속 중(true) 또는 미접속(false)"
+    ),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    membership: RoomMembership = Depends(require_room_member()),
+    db: AsyncSession = Depends(get_db),
 ):
-    """채팅방 참여자 목록을 조회합니다."""
+    """채팅방 참여자 목록을 참여 시간 순으로 페이지 단위 조회합니다."""
     logger.info(
         f"Getting participants for room {room_id}. User: {current_user.username}"
     )
 
-    # 채팅방 존재 확인
-    chat_room = db.query(ChatRoom).filter(ChatRoom.id == room_id).first()
-    if not chat_room:
-        logger.error(f"Chat room with id {room_id} not found")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Chat room with id {room_id} not found",
-        )
-
-    # 사용자가 채팅방 참여자인지 확인
-    is_participant = (
-        db.query(ChatRoomParticipant)
-        .filter(
-            and_(
-                ChatRoomParticipant.chat_room_id == room_id,
-                ChatRoomParticipant.user_id == current_user.id,
-            )
-        )
-        .first()
-        is not None
-    )
-
-    if not is_participant:
-        logger.error(
-            f"User {current_user.username} is not a participant of chat room {room_id}"
-        )
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a participant of this chat room",
-        )
-
-    # 참여자 목록 조회
-    participants = (
-        db.query(ChatRoomParticipant, User)
-        .join(User, ChatRoomParticipant.user_id == User.id)
-        .filter(ChatRoomParticipant.chat_room_id == room_id)
-        .all()
+    # 접속 상태 필터는 모든 워커 기준 접속 중인 사용자명으로 적용
+    online_usernames = []
+    if online is not None:
+        online_usernames = (await manager.presence.online_in_rooms([room_id]))[room_id]
+
+    participant_infos, next_cursor = await list_participants(
+        db,
+        room_id,
+        limit,
+        cursor=cursor,
+        descending=order == "desc",
+        admin=admin,
+        online=online,
+        online_usernames=online_usernames,
     )
 
-    participant_infos = []
-    for participant, user in participants:
-        participant_infos.append(
-            ParticipantInfo(
-                username=user.username,
-                is_admin=participant.is_admin,
-                joined_at=participant.joined_at,
-            )
-        )
-
     logger.info(f"Retrieved {len(participant_infos)} participants for room {room_id}")
-    return participant_infos
+    return ParticipantList(participants=participant_infos, next_cursor=next_cursor)
 
 
 @router.delete("/{room_id}/participants/{username}")
@@ -174,46 +125,16 @@ async def remove_participant(
     room_id: int,
     username: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    membership: RoomMembership = Depends(require_room_member(admin=True)),
+    db: AsyncSession = Depends(get_db),
 ):
     """채팅방에서 참여자를 제거합니다."""
     logger.info(
         f"Removing participant {username} from room {room_id}. User: {current_user.username}"
     )
 
-    # 채팅방 존재 확인
-    chat_room = db.query(ChatRoom).filter(ChatRoom.id == room_id).first()
-    if not chat_room:
-        logger.error(f"Chat room with id {room_id} not found")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Chat room with id {room_id} not found",
-        )
-
-    # 사용자가 채팅방 관리자인지 확인
-    admin_check = (
-        db.query(ChatRoomParticipant)
-        .filter(
-            and_(
-                ChatRoomParticipant.chat_room_id == room_id,
-                ChatRoomParticipant.user_id == current_user.id,
-                ChatRoomParticipant.is_admin == True,
-            )
-        )
-        .first()
-    )
-
-    if not admin_check:
-        logger.error(
-            f"User {current_user.username} is not an admin of chat room {room_id}"
-        )
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not an admin of this chat room",
-        )
-
     # 제거할 사용자 확인
-    user_to_remove = db.query(User).filter(User.username == username).first()
+    user_to_remove = await user_directory.get_by_username(db, username)
     if not user_to_remove:
         logger.error(f"User with username '{username}' not found")
         raise HTTPException(
@@ -230,18 +151,7 @@ async def remove_participant(
         )
 
     # 참여자 확인
-    participant_to_remove = (
-        db.query(ChatRoomParticipant)
-        .filter(
-            and_(
-                ChatRoomParticipant.chat_room_id == room_id,
-                ChatRoomParticipant.user_id == user_to_remove.id,
-            )
-        )
-        .first()
-    )
-
-    if not participant_to_remove:
+    if not membership.is_member(user_to_remove.id):
         logger.error(f"User '{username}' is not a participant of chat room {room_id}")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -249,7 +159,7 @@ async def remove_participant(
         )
 
     # 채팅방 생성자는 제거할 수 없음
-    if chat_room.created_by == user_to_remove.id:
+    if membership.created_by == user_to_remove.id:
         logger.error(f"Cannot remove the creator of chat room {room_id}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -257,8 +167,14 @@ async def remove_participant(
         )
 
     # 참여자 제거
-    db.delete(participant_to_remove)
-    db.commit()
+    result = await db.execute(
+        delete(ChatRoomParticipant).where(
+            _participant_filter(room_id, user_to_remove.id)
+        )
+    )
+    await adjust_participants_count(db, room_id, -result.rowcount)
+    await db.commit()
+    await membership_cache.invalidate_everywhere(room_id)
 
     logger.info(f"Successfully removed {username} from chat room {room_id}")
     return {"message": f"Successfully removed {username} from the chat room"}
@@ -269,46 +185,16 @@ async def set_admin(
     room_id: int,
     username: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    membership: RoomMembership = Depends(require_room_member(admin=True)),
+    db: AsyncSession = Depends(get_db),
 ):
     """채팅방의 참여자를 관리자로 설정합니다."""
     logger.info(
         f"Setting {username} as admin in room {room_id}. User: {current_user.username}"
     )
 
-    # 채팅방 존재 확인
-    chat_room = db.query(ChatRoom).filter(ChatRoom.id == room_id).first()
-    if not chat_room:
-        logger.error(f"Chat room with id {room_id} not found")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Chat room with id {room_id} not found",
-        )
-
-    # 사용자가 채팅방 관리자인지 확인
-    admin_check = (
-        db.query(ChatRoomParticipant)
-        .filter(
-            and_(
-                ChatRoomParticipant.chat_room_id == room_id,
-                ChatRoomParticipant.user_id == current_user.id,
-                ChatRoomParticipant.is_admin == True,
-            )
-        )
-        .first()
-    )
-
-    if not admin_check:
-        logger.error(
-            f"User {current_user.username} is not an admin of chat room {room_id}"
-        )
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not an admin of this chat room",
-        )
-
     # 대상 사용자 확인
-    target_user = db.query(User).filter(User.username == username).first()
+    target_user = await user_directory.get_by_username(db, username)
     if not target_user:
         logger.error(f"User with username '{username}' not found")
         raise HTTPException(
@@ -317,18 +203,7 @@ async def set_admin(
         )
 
     # 참여자 확인
-    participant = (
-        db.query(ChatRoomParticipant)
-        .filter(
-            and_(
-                ChatRoomParticipant.chat_room_id == room_id,
-                ChatRoomParticipant.user_id == target_user.id,
-            )
-        )
-        .first()
-    )
-
-    if not participant:
+    if not membership.is_member(target_user.id):
         logger.error(f"User '{username}' is not a participant of chat room {room_id}")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -336,13 +211,18 @@ async def set_admin(
         )
 
     # 이미 관리자인 경우
-    if participant.is_admin:
+    if membership.is_admin(target_user.id):
         logger.info(f"{username} is already an admin of chat room {room_id}")
         return {"message": f"{username} is already an admin of this chat room"}
 
     # 관리자로 설정
-    participant.is_admin = True
-    db.commit()
+    await db.execute(
+        update(ChatRoomParticipant)
+        .where(_participant_filter(room_id, target_user.id))
+        .values(is_admin=True)
+    )
+    await db.commit()
+    await membership_cache.invalidate_everywhere(room_id)
 
     logger.info(f"Successfully set {username} as an admin of chat room {room_id}")
     return {"message": f"Successfully set {username} as an admin of this chat room"}
@@ -353,46 +233,16 @@ async def remove_admin(
     room_id: int,
     username: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    membership: RoomMembership = Depends(require_room_member(admin=True)),
+    db: AsyncSession = Depends(get_db),
 ):
     """채팅방의 관리자 권한을 제거합니다."""
     logger.info(
         f"Removing admin status from {username} in room {room_id}. User: {current_user.username}"
     )
 
-    # 채팅방 존재 확인
-    chat_room = db.query(ChatRoom).filter(ChatRoom.id == room_id).first()
-    if not chat_room:
-        logger.error(f"Chat room with id {room_id} not found")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Chat room with id {room_id} not found",
-        )
-
-    # 사용자가 채팅방 관리자인지 확인
-    admin_check = (
-        db.query(ChatRoomParticipant)
-        .filter(
-            and_(
-                ChatRoomParticipant.chat_room_id == room_id,
-                ChatRoomParticipant.user_id == current_user.id,
-                ChatRoomParticipant.is_admin == True,
-            )
-        )
-        .first()
-    )
-
-    if not admin_check:
-        logger.error(
-            f"User {current_user.username} is not an admin of chat room {room_id}"
-        )
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not an admin of this chat room",
-        )
-
     # 대상 사용자 확인
-    target_user = db.query(User).filter(User.username == username).first()
+    target_user = await user_directory.get_by_username(db, username)
     if not target_user:
         logger.error(f"User with username '{username}' not found")
         raise HTTPException(
@@ -401,7 +251,7 @@ async def remove_admin(
         )
 
     # 채팅방 생성자는 관리자 권한 제거 불가
-    if chat_room.created_by == target_user.id:
+    if membership.created_by == target_user.id:
         logger.error(
             f"Cannot remove admin rights from the creator of chat room {room_id}"
         )
@@ -411,18 +261,7 @@ async def remove_admin(
         )
 
     # 참여자 확인
-    participant = (
-        db.query(ChatRoomParticipant)
-        .filter(
-            and_(
-                ChatRoomParticipant.chat_room_id == room_id,
-                ChatRoomParticipant.user_id == target_user.id,
-            )
-        )
-        .first()
-    )
-
-    if not participant:
+    if not membership.is_member(target_user.id):
         logger.error(f"User '{username}' is not a participant of chat room {room_id}")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -430,13 +269,18 @@ async def remove_admin(
         )
 
     # 관리자 권한이 없는 경우
-    if not participant.is_admin:
+    if not membership.is_admin(target_user.id):
         logger.info(f"{username} is not an admin of chat room {room_id}")
         return {"message": f"{username} is not an admin of this chat room"}
 
     # 관리자 권한 제거
-    participant.is_admin = False
-    db.commit()
+    await db.execute(
+        update(ChatRoomParticipant)
+        .where(_participant_filter(room_id, target_user.id))
+        .values(is_admin=False)
+    )
+    await db.commit()
+    await membership_cache.invalidate_everywhere(room_id)
 
     logger.info(
         f"Successfully removed admin rights from {username} in chat room {room_id}"
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, delete, desc, func, select, tuple_
 from typing import List, Optional
+from datetime import datetime
 import logging
 
 from app.database import get_db
@@ -14,8 +15,32 @@ from app.schemas.chat import (
     ChatRoomList,
     ParticipantInfo,
     ParticipantAdd,
+    UnreadCount,
+    UnreadCountList,
+    RoomPresence,
+    RoomPresenceList,
+    RoomRateLimit,
 )
+from app.services.membership import (
+    RoomMembership,
+    membership_cache,
+    require_room_member,
+    room_not_found,
+)
+from app.services.message_buffer import message_buffer
+from app.services.participants import (
+    ROOM_PARTICIPANT_PREVIEW,
+    insert_participants,
+    list_participants,
+    participants_cursor,
+    resolve_usernames,
+    unique_usernames,
+)
+from app.services.room_summary import adjust_participants_count
 from app.utils.auth import get_current_user
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.user_cache import user_directory
+from app.utils.websocket_manager import manager
 
 # 로거 설정
 logger = logging.getLogger(__name__)
@@ -24,11 +49,39 @@ logging.basicConfig(level=logging.INFO)
 router = APIRouter()
 
 
+def _room_info(
+    chat_room: ChatRoom,
+    creator_username: Optional[str],
+    unread_count: Optional[int] = None,
+) -> ChatRoomInfo:
+    # 채팅방 요약 컬럼으로 목록 항목 구성
+    return ChatRoomInfo(
+        id=chat_room.id,
+        name=chat_room.name,
+        created_by=creator_username or "[사용자 없음]",
+        participants_count=chat_room.participants_count,
+        created_at=chat_room.created_at,
+        updated_at=chat_room.updated_at,
+        last_message=chat_room.last_message_preview,
+        last_message_time=chat_room.last_message_time,
+        unread_count=unread_count,
+    )
+
+
+async def _get_room(db: AsyncSession, room_id: int) -> ChatRoom:
+    # 멤버십 캐시는 TTL 동안 다른 워커에서 삭제된 채팅방을 모를 수 있음
+    chat_room = await db.get(ChatRoom, room_id)
+    if chat_room is None:
+        await membership_cache.invalidate_everywhere(room_id)
+        raise room_not_found(room_id)
+    return chat_room
+
+
 @router.post("/", response_model=ChatRoomDetail, status_code=status.HTTP_201_CREATED)
 async def create_chat_room(
     room_data: ChatRoomCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """새로운 채팅방을 생성합니다."""
     logger.info(
@@ -45,252 +98,230 @@ async def create_chat_room(
         )
 
     # 자기 자신이 참여자 목록에 있는지 확인
-    if current_user.username in room_data.participants:
+    usernames = unique_usernames(room_data.participants)
+    if current_user.username in usernames:
         logger.info(
             f"User {current_user.username} included in participants list - will be automatically added as admin"
         )
         # 자기 자신은 이미 자동으로 추가되므로 목록에서 제거
-        room_data.participants.remove(current_user.username)
-
-    # 초대할 사용자 찾기
-    valid_participants = []
-    for username in room_data.participants:
-        user = db.query(User).filter(User.username == username).first()
-        if not user:
-            logger.error(
-                f"User with username '{username}' not found when creating chat room"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"User with username '{username}' not found",
-            )
-        valid_participants.append(user)
+        usernames.remove(current_user.username)
+
+    # 초대할 사용자를 한 번에 조회 (없는 사용자는 모두 모아서 404)
+    valid_participants = await resolve_usernames(db, usernames)
 
     # 채팅방 생성
-    new_room = ChatRoom(name=room_data.name, created_by=current_user.id)
+    new_room = ChatRoom(
+        name=room_data.name,
+        created_by=current_user.id,
+        participants_count=len(valid_participants) + 1,
+    )
     db.add(new_room)
-    db.flush()
+    await db.flush()
     logger.info(f"Created chat room with ID {new_room.id}")
 
-    # 생성자를 관리자로 추가
-    creator_participant = ChatRoomParticipant(
-        chat_room_id=new_room.id, user_id=current_user.id, is_admin=True
+    # 생성자(관리자)와 초대한 사용자를 한 문장으로 추가하고, 추가된 행으로 응답 구성
+    members = [current_user] + valid_participants
+    inserted = await insert_participants(
+        db,
+        new_room.id,
+        [user.id for user in members],
+        admin_ids=[current_user.id],
     )
-    db.add(creator_participant)
-
-    # 초대한 사용자 추가
-    for user in valid_participants:
-        participant = ChatRoomParticipant(
-            chat_room_id=new_room.id, user_id=user.id, is_admin=False
-        )
-        db.add(participant)
-        logger.info(f"Added user {user.username} to chat room {new_room.id}")
+    logger.info(f"Added {len(inserted)} participants to chat room {new_room.id}")
 
-    db.commit()
-    db.refresh(new_room)
-
-    # 응답 데이터 준비
-    participants_info = []
-
-    # 생성자 정보 추가
-    creator_participant = (
-        db.query(ChatRoomParticipant)
-        .filter(
-            and_(
-                ChatRoomParticipant.chat_room_id == new_room.id,
-                ChatRoomParticipant.user_id == current_user.id,
-            )
-        )
-        .first()
-    )
+    await db.commit()
+    await db.refresh(new_room)
 
-    participants_info.append(
+    # 응답 데이터 준비: 추가된 행을 참여 순(id 순)으로 정렬해 미리보기만 포함
+    usernames_by_id = {user.id: user.username for user in members}
+    inserted.sort(key=lambda participant: participant.id)
+    preview = inserted[:ROOM_PARTICIPANT_PREVIEW]
+    participants_info = [
         ParticipantInfo(
-            username=current_user.username,
-            is_admin=creator_participant.is_admin,
-            joined_at=creator_participant.joined_at,
-        )
-    )
-
-    # 다른 참여자 정보 추가
-    for user in valid_participants:
-        participant = (
-            db.query(ChatRoomParticipant)
-            .filter(
-                and_(
-                    ChatRoomParticipant.chat_room_id == new_room.id,
-                    ChatRoomParticipant.user_id == user.id,
-                )
-            )
-            .first()
-        )
-
-        participants_info.append(
-            ParticipantInfo(
-                username=user.username,
-                is_admin=participant.is_admin,
-                joined_at=participant.joined_at,
-            )
+            username=usernames_by_id[participant.user_id],
+            is_admin=participant.is_admin,
+            joined_at=participant.joined_at,
         )
+        for participant in preview
+    ]
+    next_cursor = None
+    if len(inserted) > len(preview):
+        next_cursor = participants_cursor(preview[-1].id)
 
     logger.info(
-        f"Successfully created chat room {new_room.id} with {len(participants_info)} participants"
+        f"Successfully created chat room {new_room.id} with {len(inserted)} participants"
     )
     return ChatRoomDetail(
         id=new_room.id,
         name=new_room.name,
         created_by=current_user.username,
-        participants_count=len(participants_info),
+        participants_count=len(inserted),
         created_at=new_room.created_at,
         updated_at=new_room.updated_at,
         last_message=None,
         last_message_time=None,
         participants=participants_info,
+        participants_next_cursor=next_cursor,
     )
 
 
 @router.get("/", response_model=ChatRoomList)
 async def get_chat_rooms(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    """현재 사용자가 참여한 채팅방 목록을 조회합니다."""
-    logger.info(f"Getting chat rooms for user {current_user.username}")
-
-    # 사용자가 참여한 채팅방 ID 목록 조회
-    room_ids = (
-        db.query(ChatRoomParticipant.chat_room_id)
-        .filter(ChatRoomParticipant.user_id == current_user.id)
-        .all()
+    """현재 사용자가 참여한 채팅방 목록을 최근 활동 순으로 조회합니다."""
+    logger.info(
+        f"Getting chat rooms for user {current_user.username}. Limit: {limit}, Cursor: {cursor}"
     )
-    room_ids = [room_id[0] for room_id in room_ids]
-
-    if not room_ids:
-        logger.info(f"User {current_user.username} has no chat rooms")
-        return ChatRoomList(chat_rooms=[])
-
-    # 채팅방 정보 조회
-    rooms_info = []
-    for room_id in room_ids:
-        chat_room = db.query(ChatRoom).filter(ChatRoom.id == room_id).first()
-        creator = db.query(User).filter(User.id == chat_room.created_by).first()
-
-        # 참여자 수 조회
-        participants_count = (
-            db.query(ChatRoomParticipant)
-            .filter(ChatRoomParticipant.chat_room_id == room_id)
-            .count()
-        )
 
-        # 마지막 메시지 조회
-        last_message = (
-            db.query(Message)
-            .filter(and_(Message.chat_room_id == room_id, Message.is_deleted == False))
-            .order_by(Message.created_at.desc())
-            .first()
+    # 채팅방 요약 컬럼만으로 목록을 구성하는 단일 쿼리
+    query = (
+        select(
+            ChatRoom,
+            User.username,
+            ChatRoom.message_seq - ChatRoomParticipant.last_read_seq,
         )
-
-        rooms_info.append(
-            ChatRoomInfo(
-                id=chat_room.id,
-                name=chat_room.name,
-                created_by=creator.username,
-                participants_count=participants_count,
-                created_at=chat_room.created_at,
-                updated_at=chat_room.updated_at,
-                last_message=last_message.content if last_message else None,
-                last_message_time=last_message.created_at if last_message else None,
+        .join(
+            ChatRoomParticipant,
+            and_(
+                ChatRoomParticipant.chat_room_id == ChatRoom.id,
+                ChatRoomParticipant.user_id == current_user.id,
+            ),
+        )
+        .outerjoin(User, User.id == ChatRoom.created_by)
+        .order_by(ChatRoom.last_activity_at.desc(), ChatRoom.id.desc())
+    )
+    if cursor:
+        last_activity_at, room_id = decode_cursor(cursor, 2)
+        try:
+            cursor_key = (datetime.fromisoformat(last_activity_at), int(room_id))
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
             )
+        query = query.where(
+            tuple_(ChatRoom.last_activity_at, ChatRoom.id) < tuple_(*cursor_key)
+        )
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    rows = (await db.execute(query)).all()
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last_room = rows[-1][0]
+        next_cursor = encode_cursor(
+            last_room.last_activity_at.isoformat(), last_room.id
         )
 
-    # 최근 메시지 있는 채팅방을 먼저 보여주도록 정렬
-    rooms_info.sort(key=lambda x: x.last_message_time or x.created_at, reverse=True)
+    rooms_info = [
+        _room_info(chat_room, creator_username, max(unread_count, 0))
+        for chat_room, creator_username, unread_count in rows
+    ]
 
     logger.info(
         f"Retrieved {len(rooms_info)} chat rooms for user {current_user.username}"
     )
-    return ChatRoomList(chat_rooms=rooms_info)
+    return ChatRoomList(chat_rooms=rooms_info, next_cursor=next_cursor)
+
+
+@router.get("/unread", response_model=UnreadCountList)
+async def get_unread_counts(
+    current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+):
+    """현재 사용자가 참여한 모든 채팅방의 안 읽은 메시지 수를 조회합니다."""
+    logger.info(f"Getting unread counts for user {current_user.username}")
+
+    # 메시지 순번 차이로 계산 (메시지 행을 세지 않음)
+    rows = (
+        await db.execute(
+            select(
+                ChatRoomParticipant.chat_room_id,
+                ChatRoom.message_seq - ChatRoomParticipant.last_read_seq,
+                ChatRoomParticipant.last_read_message_id,
+            )
+            .join(ChatRoom, ChatRoom.id == ChatRoomParticipant.chat_room_id)
+            .where(ChatRoomParticipant.user_id == current_user.id)
+        )
+    ).all()
+
+    unread_counts = [
+        UnreadCount(
+            room_id=room_id,
+            unread_count=max(unread_count, 0),
+            last_read_message_id=last_read_message_id,
+        )
+        for room_id, unread_count, last_read_message_id in rows
+    ]
+    return UnreadCountList(
+        rooms=unread_counts,
+        total_unread=sum(item.unread_count for item in unread_counts),
+    )
+
+
+@router.get("/online", response_model=RoomPresenceList)
+async def get_online_users(
+    room_ids: Optional[List[int]] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """참여한 채팅방별 접속 중인 사용자를 한 번에 조회합니다. room_ids 가 없으면 모든 채팅방"""
+    logger.info(f"Getting online users for user {current_user.username}")
+
+    # 참여 중인 채팅방만 조회 가능
+    query = select(ChatRoomParticipant.chat_room_id).where(
+        ChatRoomParticipant.user_id == current_user.id
+    )
+    if room_ids:
+        query = query.where(ChatRoomParticipant.chat_room_id.in_(room_ids))
+    allowed = (await db.scalars(query)).all()
+
+    online = await manager.presence.online_in_rooms(allowed)
+    return RoomPresenceList(
+        rooms=[
+            RoomPresence(room_id=room_id, online_users=online[room_id])
+            for room_id in allowed
+        ]
+    )
 
 
 @router.get("/{room_id}", response_model=ChatRoomDetail)
 async def get_chat_room(
     room_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    membership: RoomMembership = Depends(require_room_member()),
+    db: AsyncSession = Depends(get_db),
 ):
     """특정 채팅방의 상세 정보를 조회합니다."""
     logger.info(
         f"Getting details for chat room {room_id}. User: {current_user.username}"
     )
 
-    # 채팅방 존재 확인
-    chat_room = db.query(ChatRoom).filter(ChatRoom.id == room_id).first()
-    if not chat_room:
-        logger.error(f"Chat room with id {room_id} not found")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Chat room with id {room_id} not found",
-        )
-
-    # 사용자가 채팅방 참여자인지 확인
-    participant = (
-        db.query(ChatRoomParticipant)
-        .filter(
-            and_(
-                ChatRoomParticipant.chat_room_id == room_id,
-                ChatRoomParticipant.user_id == current_user.id,
-            )
-        )
-        .first()
-    )
-
-    if not participant:
-        logger.error(
-            f"User {current_user.username} is not a participant of chat room {room_id}"
-        )
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a participant of this chat room",
-        )
+    # 채팅방 정보 조회 (참여 여부는 멤버십으로 확인)
+    chat_room = await _get_room(db, room_id)
 
     # 채팅방 생성자 정보
-    creator = db.query(User).filter(User.id == chat_room.created_by).first()
-
-    # 참여자 목록 조회
-    participants = (
-        db.query(ChatRoomParticipant, User)
-        .join(User, ChatRoomParticipant.user_id == User.id)
-        .filter(ChatRoomParticipant.chat_room_id == room_id)
-        .all()
-    )
+    creator = await user_directory.get_by_id(db, chat_room.created_by)
 
-    participant_infos = []
-    for participant, user in participants:
-        participant_infos.append(
-            ParticipantInfo(
-                username=user.username,
-                is_admin=participant.is_admin,
-                joined_at=participant.joined_at,
-            )
-        )
-
-    # 마지막 메시지 조회
-    last_message = (
-        db.query(Message)
-        .filter(and_(Message.chat_room_id == room_id, Message.is_deleted == False))
-        .order_by(Message.created_at.desc())
-        .first()
+    # 참여자는 참여 시간 순 미리보기만 포함 (전체 목록은 참여자 목록 API 로 페이지 조회)
+    participant_infos, next_cursor = await list_participants(
+        db, room_id, ROOM_PARTICIPANT_PREVIEW
     )
 
     return ChatRoomDetail(
         id=chat_room.id,
         name=chat_room.name,
         created_by=creator.username,
-        participants_count=len(participant_infos),
+        participants_count=chat_room.participants_count,
         created_at=chat_room.created_at,
         updated_at=chat_room.updated_at,
-        last_message=last_message.content if last_message else None,
-        last_message_time=last_message.created_at if last_message else None,
+        last_message=chat_room.last_message_preview,
+        last_message_time=chat_room.last_message_time,
         participants=participant_infos,
+        participants_next_cursor=next_cursor,
     )
 
 
@@ -299,139 +330,105 @@ async def update_chat_room(
     room_id: int,
     name: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    membership: RoomMembership = Depends(require_room_member(admin=True)),
+    db: AsyncSession = Depends(get_db),
 ):
     """채팅방 이름을 수정합니다."""
     logger.info(
         f"Updating chat room {room_id} name to '{name}'. User: {current_user.username}"
     )
 
-    # 채팅방 존재 확인
-    chat_room = db.query(ChatRoom).filter(ChatRoom.id == room_id).first()
-    if not chat_room:
-        logger.error(f"Chat room with id {room_id} not found")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Chat room with id {room_id} not found",
-        )
-
-    # 사용자가 채팅방 관리자인지 확인
-    participant = (
-        db.query(ChatRoomParticipant)
-        .filter(
-            and_(
-                ChatRoomParticipant.chat_room_id == room_id,
-                ChatRoomParticipant.user_id == current_user.id,
-                ChatRoomParticipant.is_admin == True,
-            )
-        )
-        .first()
-    )
-
-    if not participant:
-        logger.error(
-            f"User {current_user.username} is not an admin of chat room {room_id}"
-        )
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not an admin of this chat room",
-        )
+    # 채팅방 정보 조회 (관리자 여부는 멤버십으로 확인)
+    chat_room = await _get_room(db, room_id)
 
     # 채팅방 이름 수정
     old_name = chat_room.name
     chat_room.name = name
-    db.commit()
-    db.refresh(chat_room)
+    await db.commit()
+    await db.refresh(chat_room)
     logger.info(f"Chat room {room_id} name changed from '{old_name}' to '{name}'")
 
     # 생성자 정보
-    creator = db.query(User).filter(User.id == chat_room.created_by).first()
+    creator = await user_directory.get_by_id(db, chat_room.created_by)
+
+    return _room_info(chat_room, creator.username if creator else None)
 
-    # 참여자 수 조회
-    participants_count = (
-        db.query(ChatRoomParticipant)
-        .filter(ChatRoomParticipant.chat_room_id == room_id)
-        .count()
-    )
 
-    # 마지막 메시지 조회
-    last_message = (
-        db.query(Message)
-        .filter(and_(Message.chat_room_id == room_id, Message.is_deleted == False))
-        .order_by(Message.created_at.desc())
-        .first()
+@router.get("/{room_id}/rate-limit", response_model=RoomRateLimit)
+async def get_rate_limit(
+    room_id: int,
+    membership: RoomMembership = Depends(require_room_member()),
+):
+    """채팅방의 메시지 전송 제한 설정을 조회합니다."""
+    return RoomRateLimit(
+        message_rate_per_minute=membership.message_rate_per_minute,
+        slow_mode_seconds=membership.slow_mode_seconds,
     )
 
-    return ChatRoomInfo(
-        id=chat_room.id,
-        name=chat_room.name,
-        created_by=creator.username,
-        participants_count=participants_count,
-        created_at=chat_room.created_at,
-        updated_at=chat_room.updated_at,
-        last_message=last_message.content if last_message else None,
-        last_message_time=last_message.created_at if last_message else None,
+
+@router.put("/{room_id}/rate-limit", response_model=RoomRateLimit)
+async def update_rate_limit(
+    room_id: int,
+    settings: RoomRateLimit,
+    current_user: User = Depends(get_current_user),
+    membership: RoomMembership = Depends(require_room_member(admin=True)),
+    db: AsyncSession = Depends(get_db),
+):
+    """채팅방의 분당 메시지 한도와 슬로우 모드를 설정합니다."""
+    logger.info(
+        f"Updating rate limit of room {room_id} to {settings.message_rate_per_minute}/min, "
+        f"slow mode {settings.slow_mode_seconds}s. User: {current_user.username}"
     )
 
+    chat_room = await _get_room(db, room_id)
+    chat_room.message_rate_per_minute = settings.message_rate_per_minute
+    chat_room.slow_mode_seconds = settings.slow_mode_seconds
+    await db.commit()
+    # 다른 워커의 멤버십 캐시는 백플레인 제어 메시지로 무효화
+    await membership_cache.invalidate_everywhere(room_id)
+
+    return settings
+
 
 @router.delete("/{room_id}/leave")
 async def leave_chat_room(
     room_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    membership: RoomMembership = Depends(require_room_member()),
+    db: AsyncSession = Depends(get_db),
 ):
     """채팅방을 나갑니다."""
     logger.info(f"User {current_user.username} attempting to leave chat room {room_id}")
 
-    # 채팅방 존재 확인
-    chat_room = db.query(ChatRoom).filter(ChatRoom.id == room_id).first()
-    if not chat_room:
-        logger.error(f"Chat room with id {room_id} not found")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Chat room with id {room_id} not found",
-        )
-
-    # 사용자가 채팅방 참여자인지 확인
-    participant = (
-        db.query(ChatRoomParticipant)
-        .filter(
+    # 채팅방 참여자 삭제 (캐시된 멤버십이 오래되어 이미 나간 경우 삭제된 행이 없음)
+    result = await db.execute(
+        delete(ChatRoomParticipant).where(
             and_(
                 ChatRoomParticipant.chat_room_id == room_id,
                 ChatRoomParticipant.user_id == current_user.id,
             )
         )
-        .first()
     )
-
-    if not participant:
-        logger.error(
-            f"User {current_user.username} is not a participant of chat room {room_id}"
-        )
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a participant of this chat room",
-        )
-
-    # 채팅방 참여자 삭제
-    db.delete(participant)
+    await adjust_participants_count(db, room_id, -result.rowcount)
     logger.info(f"Deleted participant {current_user.username} from chat room {room_id}")
 
     # 마지막 참여자인 경우 채팅방도 삭제
-    remaining_participants = (
-        db.query(ChatRoomParticipant)
-        .filter(ChatRoomParticipant.chat_room_id == room_id)
-        .count()
+    remaining_participants = await db.scalar(
+        select(func.count())
+        .select_from(ChatRoomParticipant)
+        .where(ChatRoomParticipant.chat_room_id == room_id)
     )
 
     if remaining_participants == 0:
         # 채팅방의 메시지 삭제
-        messages_count = (
-            db.query(Message).filter(Message.chat_room_id == room_id).count()
+        messages_count = await db.scalar(
+            select(func.count())
+            .select_from(Message)
+            .where(Message.chat_room_id == room_id)
         )
-        db.query(Message).filter(Message.chat_room_id == room_id).delete()
+        await db.execute(delete(Message).where(Message.chat_room_id == room_id))
         # 채팅방 삭제
-        db.delete(chat_room)
+        await db.execute(delete(ChatRoom).where(ChatRoom.id == room_id))
         logger.info(
             f"Chat room {room_id} deleted as the last participant left. Deleted {messages_count} messages."
         )
@@ -440,6 +437,9 @@ async def leave_chat_room(
             f"Chat room {room_id} still has {remaining_participants} participants after {current_user.username} left"
         )
 
-    db.commit()
+    await db.commit()
+    await membership_cache.invalidate_everywhere(room_id)
+    if remaining_participants == 0:
+        await message_buffer.invalidate_everywhere(room_id)
 
     return {"message": "Successfully left the chat room"}
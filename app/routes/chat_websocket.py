@@ -2,23 +2,32 @@ from fastapi import (
     APIRouter,
     WebSocket,
     WebSocketDisconnect,
-    Depends,
     HTTPException,
     status,
 )
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime
-import json
 from pydantic import ValidationError
 import logging
 
-from app.database import get_db
+from app.database import AsyncSessionLocal
 from app.models.user import User
-from app.models.chat import ChatRoom, ChatRoomParticipant, Message
 from app.schemas.websocket import WebSocketMessage, WebSocketIncomingMessage
-from app.utils.websocket_manager import manager
+from app.utils.websocket_manager import WS_MAX_SUBSCRIPTIONS, manager
+from app.utils.codecs import negotiate_codec, receive_frame, to_payload
+from app.services.message_pipeline import message_pipeline
+from app.services.message_buffer import buffered_message, message_buffer
+from app.services.membership import membership_cache
+from app.services.message_rate_limit import check_message_rate
+from app.services.message_replay import load_missed_messages
+from app.services.read_receipts import read_receipts
+from app.services.event_coalescer import event_coalescer
+from app.utils.admission import (
+    AdmissionRejected,
+    AdmissionTicket,
+    reject_websocket,
+    ws_admission,
+)
 from app.utils.auth import get_current_user_ws
 
 # 로거 설정
@@ -30,9 +39,33 @@ router = APIRouter()
 
 @router.websocket("/rooms/{room_id}/ws")
 async def websocket_endpoint(
-    websocket: WebSocket, room_id: int, token: str = None, db: Session = Depends(get_db)
+    websocket: WebSocket,
+    room_id: int,
+    token: str = None,
+    last_seen_message_id: Optional[int] = None,
 ):
     """WebSocket 연결을 통한 실시간 채팅"""
+    # 워커에 여유가 없으면 인증(DB 조회) 전에 1013 으로 거부
+    try:
+        ticket = ws_admission.admit()
+    except AdmissionRejected as e:
+        await reject_websocket(websocket, e)
+        return
+    try:
+        await _serve_room_socket(
+            websocket, room_id, token, last_seen_message_id, ticket
+        )
+    finally:
+        ticket.release()
+
+
+async def _serve_room_socket(
+    websocket: WebSocket,
+    room_id: int,
+    token: Optional[str],
+    last_seen_message_id: Optional[int],
+    ticket: AdmissionTicket,
+):
     if not token:
         # 토큰이 없으면 연결 거부
         logger.error(f"WebSocket connection attempt to room {room_id} without token")
@@ -40,35 +73,27 @@ async def websocket_endpoint(
         return
 
     try:
-        # 토큰으로 사용자 인증
-        user = await get_current_user_ws(token, db)
-        logger.info(
-            f"WebSocket authentication for user {user.username}, connecting to room {room_id}"
-        )
+        # 인증과 참여 여부 확인에만 DB 세션을 잠깐 사용
+        # 연결 내내 세션을 잡고 있으면 풀 크기를 넘는 동시 접속이 커넥션을 기다리며 멈춤
+        async with AsyncSessionLocal() as db:
+            # 토큰으로 사용자 인증
+            user = await get_current_user_ws(token, db)
+            logger.info(
+                f"WebSocket authentication for user {user.username}, connecting to room {room_id}"
+            )
 
-        # 채팅방 존재 확인
-        chat_room = db.query(ChatRoom).filter(ChatRoom.id == room_id).first()
-        if not chat_room:
+            # 채팅방 존재 및 참여 여부 확인 (멤버십 캐시)
+            membership = await membership_cache.get(db, room_id)
+        ticket.authenticated()
+        if membership is None:
             logger.error(
                 f"Chat room with id {room_id} not found for WebSocket connection"
             )
-            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            # 1013 은 수락 제어의 재시도 신호이므로, 재시도해도 소용없는 경우는 1008 로 종료
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return
 
-        # 사용자가 채팅방 참여자인지 확인
-        is_participant = (
-            db.query(ChatRoomParticipant)
-            .filter(
-                and_(
-                    ChatRoomParticipant.chat_room_id == room_id,
-                    ChatRoomParticipant.user_id == user.id,
-                )
-            )
-            .first()
-            is not None
-        )
-
-        if not is_participant:
+        if not membership.is_member(user.id):
             logger.error(
                 f"User {user.username} tried to connect to room {room_id} but is not a participant"
             )
@@ -76,125 +101,310 @@ async def websocket_endpoint(
             return
 
         # 웹소켓 연결 수락
-        await manager.connect(websocket, room_id, user.id, user.username)
+        # 서브프로토콜로 프레임 형식(JSON/MessagePack) 협상
+        codec, subprotocol = negotiate_codec(websocket)
+        # 재연결이면 놓친 메시지를 먼저 보낼 때까지 실시간 메시지는 큐에만 쌓음
+        resuming = last_seen_message_id is not None
+        connection = await manager.connect(
+            websocket,
+            room_id,
+            user.id,
+            user.username,
+            codec,
+            subprotocol,
+            paused=resuming,
+        )
         logger.info(
             f"WebSocket connection established for user {user.username} in room {room_id}"
         )
+        if resuming:
+            await _replay_missed_messages(connection, room_id, last_seen_message_id)
 
         try:
             while True:
                 # 클라이언트로부터 메시지 수신
-                data = await websocket.receive_text()
+                data = await receive_frame(websocket)
                 logger.info(
                     f"Received WebSocket message from user {user.username} in room {room_id}: {data}"
                 )
 
                 # 메시지 처리
                 try:
-                    # JSON 데이터 파싱 시도
+                    # 협상된 코덱으로 파싱 및 스키마 검증
                     try:
-                        message_data = json.loads(data)
-                        # 스키마 검증
-                        logger.info(f"Parsed message data: {message_data}")
-                        incoming_message = WebSocketIncomingMessage(**message_data)
+                        incoming_message = codec.decode_incoming(data)
                         message_content = incoming_message.content
                         client_timestamp = incoming_message.timestamp
                         message_type = incoming_message.message_type
+                        read_message_id = incoming_message.message_id
                         logger.info(
                             f"Parsed WebSocket message: type={message_type}, content={message_content}, timestamp={client_timestamp}"
                         )
-                    except (json.JSONDecodeError, ValidationError) as e:
-                        # JSON 형식이 아니면 텍스트 메시지로 취급
+                    except (ValueError, ValidationError) as e:
+                        # 형식이 맞지 않는 텍스트 프레임은 일반 텍스트 메시지로 취급
                         logger.warning(f"Invalid WebSocket message format: {str(e)}")
-                        message_content = data.strip()
+                        message_content = data.strip() if isinstance(data, str) else ""
                         client_timestamp = None
                         message_type = "chat"
+                        read_message_id = None
 
-                    if not message_content or message_type != "chat":
-                        # 채팅 메시지가 아니거나 내용이 없으면 건너뜀
-                        # 다른 메시지 타입(typing, read 등)은 별도 처리 가능
-                        if message_type in ["typing", "read"]:
-                            # 타이핑 중, 읽음 표시 등 DB에 저장하지 않는 이벤트 처리
-                            logger.debug(
-                                f"Broadcasting {message_type} event from {user.username} in room {room_id}"
-                            )
-                            await manager.broadcast(
-                                room_id=room_id,
-                                message={
-                                    "type": message_type,
-                                    "sender_username": user.username,
-                                    "timestamp": client_timestamp
-                                    or datetime.now().isoformat(),
-                                },
-                            )
-                        continue
-
-                    # 메시지 저장
-                    new_message = Message(
-                        chat_room_id=room_id, sender_id=user.id, content=message_content
-                    )
-
-                    # 클라이언트 타임스탬프 저장
-                    if client_timestamp:
-                        try:
-                            client_ts = datetime.fromisoformat(
-                                client_timestamp.replace("Z", "+00:00")
-                            )
-                            new_message.client_timestamp = client_ts
-                            logger.debug(f"Using client timestamp: {client_timestamp}")
-                        except ValueError as e:
-                            logger.warning(
-                                f"Invalid timestamp format: {client_timestamp}, Error: {str(e)}"
-                            )
-                            pass  # 형식이 잘못되면 무시
-
-                    db.add(new_message)
-                    db.commit()
-                    db.refresh(new_message)
-
-                    # 채팅방 업데이트 시간 갱신
-                    chat_room.updated_at = new_message.created_at
-                    db.commit()
-
-                    # 모든 사용자에게 메시지 브로드캐스트
-                    server_timestamp = new_message.created_at.isoformat()
-                    logger.info(
-                        f"Saved and broadcasting message from {user.username} in room {room_id} (message_id: {new_message.id})"
-                    )
-                    await manager.broadcast(
-                        room_id=room_id,
-                        message={
-                            "type": "chat",
-                            "content": message_content,
-                            "sender_username": user.username,
-                            "timestamp": server_timestamp,
-                            "client_timestamp": client_timestamp,  # 클라이언트 타임스탬프 포함
-                            "id": new_message.id,
-                        },
+                    await _handle_room_event(
+                        connection,
+                        user,
+                        room_id,
+                        message_type,
+                        message_content,
+                        client_timestamp,
+                        read_message_id,
                     )
 
                 except Exception as e:
                     # 에러 발생 시 개인 메시지로 에러 알림
                     logger.error(f"Error processing WebSocket message: {str(e)}")
                     await manager.send_personal_message(
-                        {"type": "system", "content": f"Error: {str(e)}"}, websocket
+                        {"type": "system", "content": f"Error: {str(e)}"}, connection
                     )
 
         except WebSocketDisconnect:
-            # 연결 종료 처리
             logger.info(
                 f"WebSocket disconnected for user {user.username} in room {room_id}"
             )
-            disconnect_message = manager.disconnect(room_id, user.id, user.username)
-            if disconnect_message and room_id in manager.active_connections:
-                # 다른 사용자들에게 나갔다는 메시지 전송
-                logger.info(
-                    f"Broadcasting disconnect event for user {user.username} in room {room_id}"
-                )
-                await manager.broadcast(room_id=room_id, message=disconnect_message)
-                await manager.send_active_users(room_id)
+        finally:
+            # 정상 종료가 아니어도(소켓 오류 등) 연결과 접속 상태를 항상 정리
+            # 퇴장 알림은 매니저가 모아서 변경 이벤트로 전송
+            await manager.disconnect(connection)
 
     except Exception as e:
         # 인증 실패 등의 이유로 연결 거부
         logger.error(f"WebSocket Error: {str(e)}")
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+
+
+@router.websocket("/ws")
+async def multiplexed_websocket_endpoint(websocket: WebSocket, token: str = None):
+    """사용자 단위 WebSocket. 한 번 인증한 뒤 subscribe/unsubscribe 제어 프레임으로 여러 채팅방을 구독"""
+    try:
+        ticket = ws_admission.admit()
+    except AdmissionRejected as e:
+        await reject_websocket(websocket, e)
+        return
+    try:
+        await _serve_multiplexed_socket(websocket, token, ticket)
+    finally:
+        ticket.release()
+
+
+async def _serve_multiplexed_socket(
+    websocket: WebSocket, token: Optional[str], ticket: AdmissionTicket
+):
+    if not token:
+        logger.error("Multiplexed WebSocket connection attempt without token")
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    try:
+        # 인증에만 DB 세션을 잠깐 사용 (연결 내내 세션을 잡고 있지 않음)
+        async with AsyncSessionLocal() as db:
+            user = await get_current_user_ws(token, db)
+    except Exception as e:
+        logger.error(f"Multiplexed WebSocket authentication failed: {str(e)}")
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    ticket.authenticated()
+
+    codec, subprotocol = negotiate_codec(websocket)
+    connection = await manager.connect_multiplexed(
+        websocket, user.id, user.username, codec, subprotocol
+    )
+    try:
+        while True:
+            data = await receive_frame(websocket)
+            try:
+                incoming_message = codec.decode_incoming(data)
+            except (ValueError, ValidationError) as e:
+                logger.warning(f"Invalid multiplexed WebSocket frame: {str(e)}")
+                await manager.send_personal_message(
+                    {"type": "system", "content": f"Error: {str(e)}"}, connection
+                )
+                continue
+
+            room_id = incoming_message.room_id
+            message_type = incoming_message.message_type
+            try:
+                if room_id is None:
+                    raise ValueError("room_id is required")
+                if message_type == "subscribe":
+                    await _subscribe(
+                        connection, user, room_id, incoming_message.last_seen_message_id
+                    )
+                elif message_type == "unsubscribe":
+                    await manager.unsubscribe(connection, room_id)
+                    connection.send({"type": "unsubscribed"}, room_id=room_id)
+                elif room_id not in connection.rooms:
+                    raise ValueError(f"Not subscribed to room {room_id}")
+                else:
+                    await _handle_room_event(
+                        connection,
+                        user,
+                        room_id,
+                        message_type,
+                        incoming_message.content,
+                        incoming_message.timestamp,
+                        incoming_message.message_id,
+                    )
+            except Exception as e:
+                logger.error(f"Error processing multiplexed WebSocket frame: {str(e)}")
+                await manager.send_personal_message(
+                    {"type": "system", "content": f"Error: {str(e)}"},
+                    connection,
+                    room_id=room_id,
+                )
+
+    except WebSocketDisconnect:
+        logger.info(f"Multiplexed WebSocket disconnected for user {user.username}")
+    finally:
+        await manager.disconnect(connection)
+
+
+async def _subscribe(connection, user, room_id: int, last_seen_message_id):
+    """참여 여부를 확인하고 소켓을 채팅방에 구독시킵니다. 필요하면 놓친 메시지를 재전송합니다."""
+    if room_id in connection.rooms:
+        connection.send({"type": "subscribed"}, room_id=room_id)
+        return
+    if len(connection.rooms) >= WS_MAX_SUBSCRIPTIONS:
+        raise ValueError(f"Too many subscriptions (max {WS_MAX_SUBSCRIPTIONS})")
+
+    async with AsyncSessionLocal() as db:
+        membership = await membership_cache.get(db, room_id)
+    if membership is None or not membership.is_member(user.id):
+        raise ValueError(f"Not a participant of room {room_id}")
+
+    resuming = last_seen_message_id is not None
+    connection.send({"type": "subscribed"}, room_id=room_id)
+    await manager.subscribe(connection, room_id, paused=resuming)
+    if resuming:
+        await _replay_missed_messages(connection, room_id, last_seen_message_id)
+
+
+async def _replay_missed_messages(connection, room_id: int, last_seen_message_id):
+    """재연결한 소켓에 놓친 메시지를 재전송합니다. 너무 많으면 REST 재동기화를 요청합니다."""
+    try:
+        # 재전송할 메시지를 읽는 동안만 세션 사용 (버퍼에 있으면 커넥션을 빌리지 않음)
+        async with AsyncSessionLocal() as db:
+            entries = await load_missed_messages(db, room_id, last_seen_message_id)
+    except Exception as e:
+        # 조회에 실패하면 클라이언트가 REST 로 다시 동기화하도록 안내
+        logger.error(f"Failed to load missed messages for room {room_id}: {str(e)}")
+        entries = None
+
+    if entries is None:
+        connection.stats.resyncs += 1
+        replay = [
+            WebSocketMessage(
+                type="resync_required",
+                content="Too many missed messages, reload history via REST",
+                room_id=room_id,
+                id=last_seen_message_id,
+            )
+        ]
+    else:
+        replay = [
+            WebSocketMessage(
+                type="chat",
+                content=entry["content"],
+                sender_username=entry["sender_username"],
+                timestamp=entry["created_at"],
+                client_timestamp=entry["client_timestamp"],
+                id=entry["id"],
+            )
+            for entry in entries
+            if not entry["is_deleted"]
+        ]
+        logger.info(
+            f"Replaying {len(replay)} missed messages to user {connection.username} in room {room_id}"
+        )
+    await manager.resume(
+        connection, room_id, [to_payload(message) for message in replay]
+    )
+
+
+async def _handle_room_event(
+    connection,
+    user,
+    room_id: int,
+    message_type: str,
+    message_content: str,
+    client_timestamp: Optional[str],
+    read_message_id: Optional[int],
+):
+    """채팅방 하나에 대한 클라이언트 이벤트(채팅, 타이핑, 읽음 등)를 처리합니다."""
+    if not message_content or message_type != "chat":
+        # 채팅 메시지가 아니거나 내용이 없으면 건너뜀
+        # 다른 메시지 타입(typing, read 등)은 별도 처리 가능
+        if message_type == "presence_sync":
+            # 변경 이벤트 버전이 건너뛰면 클라이언트가 전체 목록을 다시 요청
+            await manager.send_presence_snapshot(connection, room_id)
+        if message_type == "read" and read_message_id:
+            # 읽음 위치는 모아서 기록 (연속된 읽음 이벤트는 UPDATE 한 번)
+            read_receipts.mark_read(room_id, user.id, read_message_id)
+            # 다른 참여자에게는 채팅방별 activity 프레임으로 모아서 전달
+            event_coalescer.read(room_id, user.username, read_message_id)
+        if message_type == "typing":
+            event_coalescer.typing(room_id, user.username)
+        return
+
+    # 클라이언트 타임스탬프 파싱
+    client_ts = None
+    if client_timestamp:
+        try:
+            client_ts = datetime.fromisoformat(client_timestamp.replace("Z", "+00:00"))
+            logger.debug(f"Using client timestamp: {client_timestamp}")
+        except ValueError as e:
+            logger.warning(
+                f"Invalid timestamp format: {client_timestamp}, Error: {str(e)}"
+            )
+            pass  # 형식이 잘못되면 무시
+
+    # 전송 한도 확인 (멤버십 캐시에 있으면 커넥션을 빌리지 않음)
+    async with AsyncSessionLocal() as db:
+        membership = await membership_cache.get(db, room_id)
+    if membership is None:
+        raise ValueError(f"Chat room {room_id} not found")
+    retry_after = await check_message_rate(membership, user.id)
+    if retry_after:
+        # 한도를 넘은 메시지는 저장하지 않고 보낸 소켓에만 대기 시간을 알림
+        connection.send(
+            to_payload(
+                WebSocketMessage(
+                    type="rate_limited",
+                    content="Too many messages",
+                    retry_after=round(retry_after, 3),
+                )
+            ),
+            room_id=room_id,
+        )
+        return
+
+    # 메시지 저장 (그룹 커밋 파이프라인, 커밋 완료 후 반환)
+    new_message = await message_pipeline.submit(
+        room_id, user.id, message_content, client_ts
+    )
+
+    await message_buffer.append(room_id, buffered_message(new_message, user.username))
+
+    # 모든 사용자에게 메시지 브로드캐스트
+    server_timestamp = new_message.created_at.isoformat()
+    logger.info(
+        f"Saved and broadcasting message from {user.username} in room {room_id} (message_id: {new_message.id})"
+    )
+    await manager.broadcast(
+        room_id=room_id,
+        message=WebSocketMessage(
+            type="chat",
+            content=message_content,
+            sender_username=user.username,
+            timestamp=server_timestamp,
+            client_timestamp=client_timestamp,  # 클라이언트 타임스탬프 포함
+            id=new_message.id,
+        ),
+    )
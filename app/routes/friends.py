@@ -1,43 +1,117 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
 from app.database import get_db
 from app.models.user import User
 from app.models.friendship import Friendship
-from app.schemas.friendship import FriendList, Friend, FriendAdd
+from app.schemas.friendship import (
+    FriendList,
+    Friend,
+    FriendAdd,
+    FriendSuggestion,
+    FriendSuggestionList,
+    MutualFriendCount,
+    OnlineFriend,
+    OnlineFriendList,
+)
+from app.services.friend_graph import friend_graph
 from app.utils.auth import get_current_user
+from app.utils.user_cache import user_directory
+from app.utils.websocket_manager import manager
 
 router = APIRouter()
 
 
 @router.get("/", response_model=FriendList)
 async def get_friends(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
 ):
     """현재 사용자의 친구 목록을 조회합니다."""
-    # 현재 사용자의 친구 관계를 조회
-    friendships = (
-        db.query(Friendship).filter(Friendship.user_id == current_user.id).all()
+    # 친구 그래프에서 친구 ID 와 친구 추가 시각을 조회 (캐시에 없으면 한 번의 쿼리)
+    friendships = await friend_graph.friends(db, current_user.id)
+
+    # 친구 정보를 한 번에 조회 (캐시에 없는 사용자만 DB 조회)
+    friends = await user_directory.get_many(
+        db, [friend_id for friend_id, _ in friendships]
     )
 
     # 친구 목록 생성
     friend_list = []
-    for friendship in friendships:
-        friend = db.query(User).filter(User.id == friendship.friend_id).first()
+    for friend_id, created_at in friendships:
+        friend = friends.get(friend_id)
         if friend:
-            friend_list.append(
-                Friend(username=friend.username, created_at=friendship.created_at)
-            )
+            friend_list.append(Friend(username=friend.username, created_at=created_at))
 
     return FriendList(friends=friend_list)
 
 
+@router.get("/online", response_model=OnlineFriendList)
+async def get_online_friends(
+    current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+):
+    """접속 중인 친구 목록을 조회합니다."""
+    friend_ids = list((await friend_graph.adjacency(db, current_user.id)).ids)
+
+    # 모든 친구의 접속 상태를 한 번에 조회
+    online = await manager.presence.online_users(friend_ids)
+    online_ids = [friend_id for friend_id in friend_ids if online.get(friend_id)]
+    friends = await user_directory.get_many(db, online_ids)
+
+    return OnlineFriendList(
+        friends=[
+            OnlineFriend(
+                username=friends[friend_id].username,
+                connections=sum(online[friend_id].values()),
+            )
+            for friend_id in online_ids
+            if friend_id in friends
+        ]
+    )
+
+
+@router.get("/suggestions", response_model=FriendSuggestionList)
+async def get_friend_suggestions(
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """친구의 친구를 함께 아는 친구 수가 많은 순으로 추천합니다."""
+    ranked = await friend_graph.suggestions(db, current_user.id, limit)
+    users = await user_directory.get_many(db, [user_id for user_id, _ in ranked])
+
+    return FriendSuggestionList(
+        suggestions=[
+            FriendSuggestion(username=users[user_id].username, mutual_friends=count)
+            for user_id, count in ranked
+            if user_id in users
+        ]
+    )
+
+
+@router.get("/mutual/{username}", response_model=MutualFriendCount)
+async def get_mutual_friend_count(
+    username: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """다른 사용자와 함께 아는 친구 수를 조회합니다."""
+    other = await user_directory.get_by_username(db, username)
+    if not other:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with username '{username}' not found",
+        )
+
+    count = await friend_graph.mutual_count(db, current_user.id, other.id)
+    return MutualFriendCount(username=other.username, mutual_friends=count)
+
+
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def add_friend(
     friend_data: FriendAdd,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """새로운 친구를 추가합니다."""
     # 자기 자신을 친구로 추가하는 것 방지
@@ -48,23 +122,15 @@ async def add_friend(
         )
 
     # 친구로 추가할 사용자가 존재하는지 확인
-    friend = db.query(User).filter(User.username == friend_data.username).first()
+    friend = await user_directory.get_by_username(db, friend_data.username)
     if not friend:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with username '{friend_data.username}' not found",
         )
 
-    # 이미 친구인지 확인
-    existing_friendship = (
-        db.query(Friendship)
-        .filter(
-            Friendship.user_id == current_user.id, Friendship.friend_id == friend.id
-        )
-        .first()
-    )
-
-    if existing_friendship:
+    # 이미 친구인지 확인 (친구 그래프의 정렬된 ID 배열에서 이진 탐색)
+    if await friend_graph.is_friend(db, current_user.id, friend.id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Already friends with {friend_data.username}",
@@ -74,12 +140,13 @@ async def add_friend(
     try:
         friendship = Friendship(user_id=current_user.id, friend_id=friend.id)
         db.add(friendship)
-        db.commit()
-        db.refresh(friendship)
+        await db.commit()
+        await db.refresh(friendship)
+        friend_graph.add(current_user.id, friend.id, friendship.created_at)
 
         return {"message": f"Successfully added {friend.username} as a friend"}
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Error adding friend"
         )
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
@@ -12,7 +12,7 @@ class ChatRoomCreate(BaseModel):
 class ParticipantInfo(BaseModel):
     username: str
     is_admin: bool
-    joined_at: datetime
+    joined_at: Optional[datetime] = None  # 참여 시간이 기록되지 않은 기존 행은 null
 
     class Config:
         from_attributes = True
@@ -27,13 +27,24 @@ class ChatRoomInfo(BaseModel):
     updated_at: Optional[datetime] = None
     last_message: Optional[str] = None
     last_message_time: Optional[datetime] = None
+    unread_count: Optional[int] = None  # 채팅방 목록 조회 시 안 읽은 메시지 수
 
     class Config:
         from_attributes = True
 
 
-class ChatRoomDetail(ChatRoomInfo):
+class ParticipantList(BaseModel):
     participants: List[ParticipantInfo]
+    next_cursor: Optional[str] = None  # 다음 페이지 커서 (마지막 페이지면 None)
+
+
+class ChatRoomDetail(ChatRoomInfo):
+    participants: List[
+        ParticipantInfo
+    ]  # 참여 시간 순 미리보기 (전체 수는 participants_count)
+    participants_next_cursor: Optional[str] = (
+        None  # 참여자 목록 API 로 이어서 조회할 커서
+    )
 
     class Config:
         from_attributes = True
@@ -41,6 +52,36 @@ class ChatRoomDetail(ChatRoomInfo):
 
 class ChatRoomList(BaseModel):
     chat_rooms: List[ChatRoomInfo]
+    next_cursor: Optional[str] = None  # limit 지정 시 다음 페이지 커서
+
+
+# 메시지 전송 제한 설정 (관리자만 변경)
+class RoomRateLimit(BaseModel):
+    # 채팅방 전체 분당 메시지 수 (None 이면 서버 기본값)
+    message_rate_per_minute: Optional[int] = Field(None, ge=1)
+    # 참여자별 메시지 간 최소 간격(초), 0 이면 슬로우 모드 꺼짐
+    slow_mode_seconds: int = Field(0, ge=0, le=6 * 60 * 60)
+
+
+# 읽음 표시 관련 스키마
+class UnreadCount(BaseModel):
+    room_id: int
+    unread_count: int
+    last_read_message_id: Optional[int] = None
+
+
+class UnreadCountList(BaseModel):
+    rooms: List[UnreadCount]
+    total_unread: int
+
+
+class RoomPresence(BaseModel):
+    room_id: int
+    online_users: List[str]  # 모든 워커 기준 접속 중인 사용자명
+
+
+class RoomPresenceList(BaseModel):
+    rooms: List[RoomPresence]
 
 
 # 참여자 관련 스키마
@@ -69,6 +110,9 @@ class MessageInfo(BaseModel):
 
 class MessageList(BaseModel):
     messages: List[MessageInfo]
-    total_count: int
-    page: int
+    total_count: Optional[int] = None  # 커서 모드에서는 include_total 요청 시에만 포함
+    page: Optional[int] = None  # page 를 지정한 기존 클라이언트에만 포함
     page_size: int
+    before_cursor: Optional[str] = None  # 더 오래된 메시지 조회용 커서
+    after_cursor: Optional[str] = None  # 더 최신 메시지 조회용 커서
+    has_more: bool = False  # 조회 방향으로 메시지가 더 있는지 여부
@@ -20,3 +20,23 @@ class FriendList(BaseModel):
 
 class FriendAdd(BaseModel):
     username: str
+
+
+class OnlineFriend(FriendBase):
+    connections: int  # 접속 중인 WebSocket 연결 수
+
+
+class OnlineFriendList(BaseModel):
+    friends: List[OnlineFriend]
+
+
+class FriendSuggestion(FriendBase):
+    mutual_friends: int  # 함께 아는 친구 수
+
+
+class FriendSuggestionList(BaseModel):
+    suggestions: List[FriendSuggestion]
+
+
+class MutualFriendCount(FriendBase):
+    mutual_friends: int
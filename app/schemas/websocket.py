@@ -1,16 +1,44 @@
 from pydantic import BaseModel, Field
-from typing import Literal, Optional
+from typing import Dict, List, Literal, Optional
 
 
 class WebSocketMessage(BaseModel):
-    type: Literal["chat", "system", "users_list"] = "chat"
-    content: str
+    type: Literal[
+        "chat",
+        "system",
+        "users_list",
+        "presence",
+        "activity",
+        "resync_required",
+        "subscribed",
+        "unsubscribed",
+        "rate_limited",
+    ] = "chat"
+    content: Optional[str] = None
     sender_username: Optional[str] = None
-    room_id: Optional[int] = None
+    room_id: Optional[int] = None  # 사용자 단위 소켓(/chat/ws)에서는 항상 포함
     timestamp: Optional[str] = None
+    client_timestamp: Optional[str] = None  # 클라이언트 타임스탬프
+    id: Optional[int] = None  # 저장된 메시지 ID
+    users: Optional[List[str]] = None  # users_list 용 접속자 목록
+    joined: Optional[List[str]] = None  # presence: 새로 접속한 사용자
+    left: Optional[List[str]] = None  # presence: 접속을 끊은 사용자
+    version: Optional[int] = None  # users_list, presence: 접속자 목록 버전
+    typing: Optional[List[str]] = None  # activity: 주기 동안 입력 중이던 사용자
+    reads: Optional[Dict[str, int]] = None  # activity: 사용자별 마지막 읽은 메시지 ID
+    retry_after: Optional[float] = (
+        None  # rate_limited: 다시 보낼 수 있을 때까지의 시간(초)
+    )
 
 
 class WebSocketIncomingMessage(BaseModel):
-    content: str
+    content: str = ""
     timestamp: Optional[str] = None  # 클라이언트 타임스탬프
-    message_type: Literal["chat", "typing", "read"] = "chat"  # 메시지 유형
+    # 메시지 유형 (presence_sync: 버전 누락 시 전체 접속자 목록 재요청)
+    message_type: Literal[
+        "chat", "typing", "read", "presence_sync", "subscribe", "unsubscribe"
+    ] = "chat"
+    message_id: Optional[int] = None  # read: 마지막으로 읽은 메시지 ID
+    # 사용자 단위 소켓(/chat/ws)에서 대상 채팅방, subscribe 시 재전송 기준 메시지 ID
+    room_id: Optional[int] = None
+    last_seen_message_id: Optional[int] = None
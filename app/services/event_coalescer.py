@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from dotenv import load_dotenv
+
+from app.utils.websocket_manager import manager
+
+load_dotenv()
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 타이핑/읽음 이벤트를 채팅방별로 모아서 보내는 주기(ms)
+EPHEMERAL_EVENT_INTERVAL_MS = float(os.getenv("EPHEMERAL_EVENT_INTERVAL_MS", "300"))
+
+# (room_id, message) 를 채팅방 전체에 보내는 함수
+Publish = Callable[[int, dict], Awaitable[None]]
+
+
+@dataclass
+class RoomActivity:
+    """주기 동안 모인 채팅방의 타이핑 사용자와 사용자별 마지막 읽음 위치"""
+
+    typing: Set[str] = field(default_factory=set)
+    reads: Dict[str, int] = field(default_factory=dict)
+
+
+class EventCoalescer:
+    """타이핑/읽음 이벤트를 채팅방마다 주기당 최대 한 개의 activity 프레임으로 합칩니다."""
+
+    def __init__(
+        self,
+        publish: Publish = manager.broadcast,
+        interval_ms: float = EPHEMERAL_EVENT_INTERVAL_MS,
+    ):
+        self.publish = publish
+        self.interval = interval_ms / 1000
+        self._rooms: Dict[int, RoomActivity] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.received = 0
+        self.frames = 0
+        self.failed_frames = 0
+
+    async def start(self):
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Event coalescer started (interval={self.interval * 1000}ms)")
+
+    async def stop(self):
+        self._closing = True
+        self._wakeup.set()
+        if self._task:
+            await self._task
+            self._task = None
+        logger.info("Event coalescer stopped")
+
+    def typing(self, room_id: int, username: str):
+        self.received += 1
+        self._rooms.setdefault(room_id, RoomActivity()).typing.add(username)
+        self._wakeup.set()
+
+    def read(self, room_id: int, username: str, message_id: int):
+        self.received += 1
+        reads = self._rooms.setdefault(room_id, RoomActivity()).reads
+        # 같은 사용자의 읽음 위치는 가장 최근(큰) 값만 전달
+        if reads.get(username, 0) < message_id:
+            reads[username] = message_id
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            if not self._closing:
+                await asyncio.sleep(self.interval)
+            self._wakeup.clear()
+            await self._flush()
+            if self._closing:
+                return
+
+    async def _flush(self):
+        batch, self._rooms = self._rooms, {}
+        for room_id, activity in batch.items():
+            message = {"type": "activity"}
+            if activity.typing:
+                message["typing"] = sorted(activity.typing)
+            if activity.reads:
+                message["reads"] = activity.reads
+            try:
+                await self.publish(room_id, message)
+            except Exception as e:
+                self.failed_frames += 1
+                logger.error(f"Failed to publish activity for room {room_id}: {str(e)}")
+                continue
+            self.frames += 1
+
+    def stats(self) -> dict:
+        return {
+            "interval_ms": self.interval * 1000,
+            "pending_rooms": len(self._rooms),
+            "received": self.received,
+            "frames": self.frames,
+            "failed_frames": self.failed_frames,
+            # 이벤트 하나당 보내지 않아도 된 프레임 비율
+            "saved_ratio": (
+                round(1 - self.frames / self.received, 4) if self.received else 0
+            ),
+        }
+
+
+# 전역 타이핑/읽음 이벤트 합치기 인스턴스
+event_coalescer = EventCoalescer()
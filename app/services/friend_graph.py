@@ -0,0 +1,216 @@
+import bisect
+import heapq
+import logging
+import os
+import time
+from array import array
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.friendship import Friendship
+
+load_dotenv()
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 친구 그래프 캐시 설정 (워커 프로세스 단위, 다른 워커의 변경은 TTL 로 반영)
+FRIEND_GRAPH_CACHE_SIZE = int(os.getenv("FRIEND_GRAPH_CACHE_SIZE", "100000"))
+FRIEND_GRAPH_TTL_SECONDS = float(os.getenv("FRIEND_GRAPH_TTL_SECONDS", "60"))
+
+
+def _timestamp(value: Optional[datetime]) -> float:
+    # SQLite 는 시간대 없이 UTC 로 저장
+    if value is None:
+        return 0.0
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def intersection_count(a: array, b: array) -> int:
+    """정렬된 두 ID 배열의 공통 원소 수를 작은 배열의 원소를 큰 배열에서 이진 탐색해 셉니다."""
+    if len(a) > len(b):
+        a, b = b, a
+    count = 0
+    for value in a:
+        index = bisect.bisect_left(b, value)
+        if index < len(b) and b[index] == value:
+            count += 1
+    return count
+
+
+class FriendAdjacency:
+    """사용자 한 명이 추가한 친구 ID(정렬된 배열)와 같은 순서의 친구 추가 시각 배열"""
+
+    __slots__ = ("ids", "since", "expires_at")
+
+    def __init__(self, ids: array, since: array, expires_at: float):
+        self.ids = ids
+        self.since = since
+        self.expires_at = expires_at
+
+    def contains(self, friend_id: int) -> bool:
+        index = bisect.bisect_left(self.ids, friend_id)
+        return index < len(self.ids) and self.ids[index] == friend_id
+
+    def insert(self, friend_id: int, since: float):
+        index = bisect.bisect_left(self.ids, friend_id)
+        if index < len(self.ids) and self.ids[index] == friend_id:
+            return
+        self.ids.insert(index, friend_id)
+        self.since.insert(index, since)
+
+
+class FriendGraph:
+    """사용자별 친구 인접 목록을 필요할 때 한 번의 쿼리로 읽어 LRU + TTL 로 보관합니다."""
+
+    def __init__(
+        self,
+        max_size: int = FRIEND_GRAPH_CACHE_SIZE,
+        ttl_seconds: float = FRIEND_GRAPH_TTL_SECONDS,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self._users: "OrderedDict[int, FriendAdjacency]" = OrderedDict()
+        self.edges = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def _lookup(self, user_id: int) -> Optional[FriendAdjacency]:
+        adjacency = self._users.get(user_id)
+        if adjacency is None:
+            return None
+        if adjacency.expires_at < time.monotonic():
+            self._remove(user_id)
+            return None
+        self._users.move_to_end(user_id)
+        return adjacency
+
+    def _remove(self, user_id: int):
+        adjacency = self._users.pop(user_id, None)
+        if adjacency is not None:
+            self.edges -= len(adjacency.ids)
+
+    def put(self, user_id: int, ids: array, since: array) -> FriendAdjacency:
+        """정렬된 친구 ID 배열을 캐시에 넣습니다."""
+        self._remove(user_id)
+        adjacency = FriendAdjacency(ids, since, time.monotonic() + self.ttl)
+        self._users[user_id] = adjacency
+        self.edges += len(ids)
+        while len(self._users) > self.max_size:
+            _, evicted = self._users.popitem(last=False)
+            self.edges -= len(evicted.ids)
+            self.evictions += 1
+        return adjacency
+
+    async def get_many(
+        self, db: AsyncSession, user_ids: Iterable[int]
+    ) -> Dict[int, FriendAdjacency]:
+        """여러 사용자의 인접 목록을 반환합니다. 캐시에 없는 사용자만 한 번의 IN 쿼리로 가져옵니다."""
+        found: Dict[int, FriendAdjacency] = {}
+        missing = set()
+        for user_id in user_ids:
+            adjacency = self._lookup(user_id)
+            if adjacency is not None:
+                found[user_id] = adjacency
+            else:
+                missing.add(user_id)
+        self.hits += len(found)
+        self.misses += len(missing)
+        if not missing:
+            return found
+
+        # (user_id, friend_id) 유니크 인덱스 순서로 읽으므로 사용자별 ID 가 이미 정렬되어 있음
+        rows = await db.execute(
+            select(Friendship.user_id, Friendship.friend_id, Friendship.created_at)
+            .where(Friendship.user_id.in_(missing))
+            .order_by(Friendship.user_id, Friendship.friend_id)
+        )
+        self.loads += 1
+        loaded = {user_id: (array("q"), array("d")) for user_id in missing}
+        for user_id, friend_id, created_at in rows:
+            ids, since = loaded[user_id]
+            ids.append(friend_id)
+            since.append(_timestamp(created_at))
+        for user_id, (ids, since) in loaded.items():
+            found[user_id] = self.put(user_id, ids, since)
+        return found
+
+    async def adjacency(self, db: AsyncSession, user_id: int) -> FriendAdjacency:
+        return (await self.get_many(db, [user_id]))[user_id]
+
+    async def friends(
+        self, db: AsyncSession, user_id: int
+    ) -> List[Tuple[int, datetime]]:
+        """(친구 ID, 친구 추가 시각) 목록을 친구 ID 순으로 반환합니다."""
+        adjacency = await self.adjacency(db, user_id)
+        return [
+            (friend_id, datetime.fromtimestamp(since, timezone.utc))
+            for friend_id, since in zip(adjacency.ids, adjacency.since)
+        ]
+
+    async def is_friend(self, db: AsyncSession, user_id: int, friend_id: int) -> bool:
+        return (await self.adjacency(db, user_id)).contains(friend_id)
+
+    async def mutual_count(self, db: AsyncSession, user_id: int, other_id: int) -> int:
+        """두 사용자가 모두 친구로 추가한 사용자 수를 반환합니다."""
+        both = await self.get_many(db, [user_id, other_id])
+        return intersection_count(both[user_id].ids, both[other_id].ids)
+
+    async def suggestions(
+        self, db: AsyncSession, user_id: int, limit: int = 10
+    ) -> List[Tuple[int, int]]:
+        """친구의 친구를 함께 아는 친구 수가 많은 순으로 (사용자 ID, 함께 아는 친구 수) 목록을 반환합니다."""
+        mine = await self.adjacency(db, user_id)
+        # 친구들의 인접 목록도 캐시에 없는 것만 한 번에 조회
+        neighbours = await self.get_many(db, mine.ids)
+        counts: Counter = Counter()
+        for adjacency in neighbours.values():
+            counts.update(adjacency.ids)
+        counts.pop(user_id, None)
+        for friend_id in mine.ids:
+            counts.pop(friend_id, None)
+        return heapq.nsmallest(
+            limit, counts.items(), key=lambda item: (-item[1], item[0])
+        )
+
+    def add(self, user_id: int, friend_id: int, created_at: Optional[datetime]):
+        """친구 추가를 커밋한 직후 호출합니다. 캐시에 없는 사용자는 다음 조회 때 DB 에서 읽습니다."""
+        adjacency = self._users.get(user_id)
+        if adjacency is not None:
+            before = len(adjacency.ids)
+            adjacency.insert(friend_id, _timestamp(created_at))
+            self.edges += len(adjacency.ids) - before
+
+    def invalidate(self, user_id: int):
+        self._remove(user_id)
+
+    def clear(self):
+        self._users.clear()
+        self.edges = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "users": len(self._users),
+            "edges": self.edges,
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
+
+
+# 전역 친구 그래프 인스턴스
+friend_graph = FriendGraph()
@@ -0,0 +1,214 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import FrozenSet, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.models.chat import ChatRoom, ChatRoomParticipant
+from app.utils.auth import get_current_user
+from app.utils.backplane import Backplane
+from app.utils.user_cache import CachedUser
+
+load_dotenv()
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 채팅방 멤버십 캐시 설정 (워커 프로세스 단위)
+# 다른 워커의 변경은 백플레인 제어 메시지로 반영하고, 메시지를 놓친 경우에도 TTL 안에 반영
+MEMBERSHIP_CACHE_SIZE = int(os.getenv("MEMBERSHIP_CACHE_SIZE", "5000"))
+MEMBERSHIP_CACHE_TTL_SECONDS = float(os.getenv("MEMBERSHIP_CACHE_TTL_SECONDS", "10"))
+
+# 백플레인 제어 메시지 종류
+INVALIDATE_CONTROL = "membership_invalidate"
+
+
+@dataclass(frozen=True)
+class RoomMembership:
+    """채팅방의 생성자, 참여자, 관리자 ID 집합"""
+
+    room_id: int
+    created_by: int
+    member_ids: FrozenSet[int]
+    admin_ids: FrozenSet[int]
+    # 채팅방 메시지 전송 제한 설정
+    message_rate_per_minute: Optional[int] = None
+    slow_mode_seconds: int = 0
+
+    def is_member(self, user_id: int) -> bool:
+        return user_id in self.member_ids
+
+    def is_admin(self, user_id: int) -> bool:
+        return user_id in self.admin_ids
+
+
+class MembershipCache:
+    """채팅방별 멤버십을 한 번의 쿼리로 읽어 LRU + TTL 로 보관합니다."""
+
+    def __init__(
+        self,
+        max_size: int = MEMBERSHIP_CACHE_SIZE,
+        ttl_seconds: float = MEMBERSHIP_CACHE_TTL_SECONDS,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        # room_id -> (만료 시각, 멤버십)
+        self._rooms: "OrderedDict[int, Tuple[float, RoomMembership]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.remote_invalidations = 0
+        self._backplane: Optional[Backplane] = None
+
+    def attach(self, backplane: Backplane):
+        """다른 워커의 무효화를 받고 이 워커의 무효화를 보낼 백플레인을 연결합니다."""
+        self._backplane = backplane
+        backplane.on_control(INVALIDATE_CONTROL, self._on_remote_invalidate)
+
+    async def _on_remote_invalidate(self, payload: dict):
+        self.remote_invalidations += 1
+        self.invalidate(payload["room_id"])
+
+    async def get(
+        self, db: AsyncSession, room_id: int, fresh: bool = False
+    ) -> Optional[RoomMembership]:
+        """채팅방 멤버십을 반환합니다. 채팅방이 없으면 None 을 반환합니다. fresh 면 항상 DB 에서 읽습니다."""
+        entry = None if fresh else self._rooms.get(room_id)
+        if entry is not None and entry[0] >= time.monotonic():
+            self._rooms.move_to_end(room_id)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        membership = await self._load(db, room_id)
+        if membership is not None:
+            self._rooms[room_id] = (time.monotonic() + self.ttl, membership)
+            self._rooms.move_to_end(room_id)
+            while len(self._rooms) > self.max_size:
+                self._rooms.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._rooms.pop(room_id, None)
+        return membership
+
+    async def _load(self, db: AsyncSession, room_id: int) -> Optional[RoomMembership]:
+        # 채팅방과 참여자를 한 번에 조회 (참여자가 없어도 채팅방 행은 반환)
+        rows = (
+            await db.execute(
+                select(
+                    ChatRoom.created_by,
+                    ChatRoom.message_rate_per_minute,
+                    ChatRoom.slow_mode_seconds,
+                    ChatRoomParticipant.user_id,
+                    ChatRoomParticipant.is_admin,
+                )
+                .outerjoin(
+                    ChatRoomParticipant,
+                    ChatRoomParticipant.chat_room_id == ChatRoom.id,
+                )
+                .where(ChatRoom.id == room_id)
+            )
+        ).all()
+        if not rows:
+            return None
+        return RoomMembership(
+            room_id=room_id,
+            created_by=rows[0].created_by,
+            member_ids=frozenset(row.user_id for row in rows if row.user_id),
+            admin_ids=frozenset(
+                row.user_id for row in rows if row.user_id and row.is_admin
+            ),
+            message_rate_per_minute=rows[0].message_rate_per_minute,
+            slow_mode_seconds=rows[0].slow_mode_seconds or 0,
+        )
+
+    def invalidate(self, room_id: int):
+        """이 워커의 캐시 항목만 지웁니다."""
+        if self._rooms.pop(room_id, None) is not None:
+            self.invalidations += 1
+
+    async def invalidate_everywhere(self, room_id: int):
+        """참여자, 관리자 또는 전송 제한 변경을 커밋한 직후 호출합니다. 모든 워커의 캐시 항목을 지웁니다."""
+        self.invalidate(room_id)
+        if self._backplane is None:
+            return
+        try:
+            await self._backplane.publish_control(
+                INVALIDATE_CONTROL, {"room_id": room_id}
+            )
+        except Exception as e:
+            # 다른 워커는 TTL 안에 반영되고, 관리자 권한 확인은 캐시를 쓰지 않음
+            logger.error(
+                f"Failed to publish membership invalidation for room {room_id}: {str(e)}"
+            )
+
+    def clear(self):
+        self._rooms.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._rooms),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "remote_invalidations": self.remote_invalidations,
+        }
+
+
+# 전역 멤버십 캐시 인스턴스
+membership_cache = MembershipCache()
+
+
+def room_not_found(room_id: int) -> HTTPException:
+    logger.error(f"Chat room with id {room_id} not found")
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Chat room with id {room_id} not found",
+    )
+
+
+def require_room_member(admin: bool = False, fresh: bool = False):
+    """
+    채팅방 참여자(admin=True 면 관리자)만 허용하는 의존성을 만듭니다.
+    관리자 권한이 필요하거나(admin) 되돌릴 수 없는 작업(fresh)은 캐시를 거치지 않고 DB 에서 확인합니다.
+    """
+
+    async def dependency(
+        room_id: int,
+        current_user: CachedUser = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db),
+    ) -> RoomMembership:
+        membership = await membership_cache.get(db, room_id, fresh=admin or fresh)
+        if membership is None:
+            raise room_not_found(room_id)
+        if not membership.is_member(current_user.id):
+            logger.error(
+                f"User {current_user.username} is not a participant of chat room {room_id}"
+            )
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You are not a participant of this chat room",
+            )
+        if admin and not membership.is_admin(current_user.id):
+            logger.error(
+                f"User {current_user.username} is not an admin of chat room {room_id}"
+            )
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You are not an admin of this chat room",
+            )
+        return membership
+
+    return dependency
@@ -0,0 +1,419 @@
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from app.models.chat import Message
+from app.services.message_pipeline import StoredMessage
+from app.utils.backplane import Backplane
+
+load_dotenv()
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 최근 메시지 버퍼 설정
+# "memory": 워커 프로세스 내부, "redis": 모든 워커가 공유
+# memory 로 여러 워커를 실행하면 다른 워커가 저장한 메시지가 빠진 버퍼는 DB 의 마지막 순번과 비교해 쓰지 않고,
+# 메시지 삭제는 백플레인 제어 메시지로 모든 워커의 버퍼를 비움
+MESSAGE_BUFFER_BACKEND = os.getenv("MESSAGE_BUFFER_BACKEND", "memory")
+MESSAGE_BUFFER_SIZE = int(os.getenv("MESSAGE_BUFFER_SIZE", "100"))
+MESSAGE_BUFFER_MAX_BYTES = int(
+    os.getenv("MESSAGE_BUFFER_MAX_BYTES", str(64 * 1024 * 1024))
+)
+MESSAGE_BUFFER_TTL_SECONDS = int(os.getenv("MESSAGE_BUFFER_TTL_SECONDS", "600"))
+MESSAGE_BUFFER_REDIS_PREFIX = os.getenv("MESSAGE_BUFFER_REDIS_PREFIX", "chat:recent:")
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+# 메시지 하나당 내용 외에 차지하는 대략적인 메모리
+ENTRY_OVERHEAD_BYTES = 256
+
+# 백플레인 제어 메시지 종류
+INVALIDATE_CONTROL = "message_buffer_invalidate"
+
+
+def buffered_message(message: StoredMessage, sender_username: str) -> dict:
+    """저장된 메시지를 버퍼 항목(MessageInfo 필드 + seq)으로 변환합니다."""
+    return {
+        "id": message.id,
+        "seq": message.seq,
+        "sender_username": sender_username,
+        "content": message.content,
+        "created_at": message.created_at.isoformat(),
+        "is_deleted": message.is_deleted,
+        "client_timestamp": (
+            message.client_timestamp.isoformat() if message.client_timestamp else None
+        ),
+    }
+
+
+def message_entry(message: Message, sender_username: Optional[str]) -> dict:
+    """DB 에서 읽은 메시지 행을 버퍼 항목과 같은 형식으로 변환합니다."""
+    return {
+        "id": message.id,
+        "seq": message.seq,
+        "sender_username": sender_username or "[사용자 없음]",
+        "content": message.content,
+        "created_at": message.created_at.isoformat(),
+        "is_deleted": message.is_deleted,
+        "client_timestamp": (
+            message.client_timestamp.isoformat() if message.client_timestamp else None
+        ),
+    }
+
+
+def contiguous_newest(entries: List[dict], count: int) -> Optional[List[dict]]:
+    """최신순 항목에서 빈틈 없는 최신 count 개를 반환합니다. 보장할 수 없으면 None."""
+    page = entries[:count]
+    if not page:
+        return None
+    for newer, older in zip(page, page[1:]):
+        if older["seq"] != newer["seq"] - 1:
+            return None
+    # 항목이 모자라면 채팅방의 첫 메시지(seq 1)까지 들어 있는 경우에만 사용
+    if len(page) < count and page[-1]["seq"] != 1:
+        return None
+    return page
+
+
+class MessageBuffer:
+    """채팅방별 최근 메시지 버퍼의 공통 인터페이스"""
+
+    name = "base"
+    # 모든 워커가 같은 버퍼를 보는지 여부 (아니면 무효화를 다른 워커에도 보내야 함)
+    shared = False
+
+    def __init__(self, size: int = MESSAGE_BUFFER_SIZE):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.appends = 0
+        self.fills = 0
+        self.stale_fills = 0
+        self.stale_reads = 0
+        self.invalidations = 0
+        self._backplane: Optional[Backplane] = None
+
+    def attach(self, backplane: Backplane):
+        """워커마다 따로 두는 버퍼라면 다른 워커와 무효화를 주고받을 백플레인을 연결합니다."""
+        if self.shared:
+            return
+        self._backplane = backplane
+        backplane.on_control(INVALIDATE_CONTROL, self._on_remote_invalidate)
+
+    async def _on_remote_invalidate(self, payload: dict):
+        await self.invalidate(payload["room_id"])
+
+    async def invalidate_everywhere(self, room_id: int):
+        """메시지 삭제 등을 커밋한 직후 호출합니다. 모든 워커의 채팅방 버퍼를 비웁니다."""
+        await self.invalidate(room_id)
+        if self._backplane is None:
+            return
+        try:
+            await self._backplane.publish_control(
+                INVALIDATE_CONTROL, {"room_id": room_id}
+            )
+        except Exception as e:
+            logger.error(
+                f"Failed to publish message buffer invalidation for room {room_id}: {str(e)}"
+            )
+
+    def _behind(self, entries: List[dict], latest_seq: Optional[int]) -> bool:
+        # 버퍼의 최신 순번이 채팅방의 마지막 순번과 다르면 다른 워커가 저장한 메시지가 빠져 있음
+        if latest_seq is None or not entries or entries[0]["seq"] == latest_seq:
+            return False
+        self.stale_reads += 1
+        return True
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def newest(
+        self, room_id: int, count: int, latest_seq: Optional[int] = None
+    ) -> Optional[List[dict]]:
+        """
+        최신 메시지 count 개를 최신순으로 반환합니다. 버퍼로 보장할 수 없으면 None.
+        latest_seq 는 DB 의 채팅방 마지막 순번으로, 버퍼가 이보다 뒤처져 있으면 사용하지 않습니다.
+        """
+        if count > self.size:
+            self.misses += 1
+            return None
+        entries = await self._entries(room_id, count)
+        page = None
+        if not self._behind(entries, latest_seq):
+            page = contiguous_newest(entries, count)
+        if page is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return page
+
+    async def since(
+        self, room_id: int, message_id: int, latest_seq: Optional[int] = None
+    ) -> Optional[List[dict]]:
+        """message_id 이후의 메시지를 오래된 순으로 반환합니다. 버퍼로 보장할 수 없으면 None."""
+        entries = await self._entries(room_id, self.size)
+        if self._behind(entries, latest_seq):
+            self.misses += 1
+            return None
+        newer = []
+        for entry in entries:
+            if entry["id"] == message_id:
+                self.hits += 1
+                newer.reverse()
+                return newer
+            if newer and entry["seq"] != newer[-1]["seq"] - 1:
+                break
+            newer.append(entry)
+        self.misses += 1
+        return None
+
+    async def append(self, room_id: int, entry: dict):
+        """새로 저장된 메시지를 버퍼에 추가합니다."""
+        if entry.get("seq") is None:
+            return
+        self.appends += 1
+        await self._store(room_id, [entry], None)
+
+    async def fill(self, room_id: int, entries: List[dict], generation):
+        """DB 에서 읽은 최신 페이지로 버퍼를 채웁니다. 읽는 동안 무효화됐다면 무시합니다."""
+        entries = [entry for entry in entries if entry.get("seq") is not None]
+        if not entries:
+            return
+        if await self._store(room_id, entries, generation):
+            self.fills += 1
+        else:
+            self.stale_fills += 1
+
+    async def generation(self, room_id: int):
+        """DB 조회 전에 받아 두었다가 fill 에 넘기는 무효화 세대 값"""
+        raise NotImplementedError
+
+    async def invalidate(self, room_id: int):
+        """메시지 삭제 등으로 버퍼 내용이 틀려졌을 때 채팅방 버퍼를 비웁니다."""
+        raise NotImplementedError
+
+    async def _entries(self, room_id: int, count: int) -> List[dict]:
+        raise NotImplementedError
+
+    async def _store(self, room_id: int, entries: List[dict], generation) -> bool:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.name,
+            "size_per_room": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0,
+            "appends": self.appends,
+            "fills": self.fills,
+            "stale_fills": self.stale_fills,
+            "stale_reads": self.stale_reads,
+            "invalidations": self.invalidations,
+        }
+
+
+class InMemoryMessageBuffer(MessageBuffer):
+    """워커 프로세스 내부 링 버퍼. 전체 메모리 예산을 넘으면 오래 안 쓴 채팅방부터 제거"""
+
+    name = "memory"
+
+    def __init__(
+        self, size: int = MESSAGE_BUFFER_SIZE, max_bytes: int = MESSAGE_BUFFER_MAX_BYTES
+    ):
+        super().__init__(size)
+        self.max_bytes = max_bytes
+        # room_id -> {seq: entry}, 최근 사용 순
+        self._rooms: "OrderedDict[int, Dict[int, dict]]" = OrderedDict()
+        self._room_bytes: Dict[int, int] = {}
+        self._generations: Dict[int, int] = {}
+        self.total_bytes = 0
+        self.evicted_rooms = 0
+
+    async def generation(self, room_id: int) -> int:
+        return self._generations.get(room_id, 0)
+
+    async def invalidate(self, room_id: int):
+        self._generations[room_id] = self._generations.get(room_id, 0) + 1
+        self._drop(room_id)
+        self.invalidations += 1
+
+    async def _entries(self, room_id: int, count: int) -> List[dict]:
+        room = self._rooms.get(room_id)
+        if not room:
+            return []
+        self._rooms.move_to_end(room_id)
+        return [room[seq] for seq in sorted(room, reverse=True)[:count]]
+
+    async def _store(self, room_id: int, entries: List[dict], generation) -> bool:
+        if generation is not None and generation != self._generations.get(room_id, 0):
+            return False
+        room = self._rooms.setdefault(room_id, {})
+        self._rooms.move_to_end(room_id)
+        for entry in entries:
+            room[entry["seq"]] = entry
+        # 채팅방별 최근 size 개만 유지
+        if len(room) > self.size:
+            for seq in sorted(room)[: len(room) - self.size]:
+                del room[seq]
+        self._account(room_id)
+        self._evict()
+        return True
+
+    def _account(self, room_id: int):
+        room = self._rooms[room_id]
+        room_bytes = sum(
+            len(entry["content"].encode()) + ENTRY_OVERHEAD_BYTES
+            for entry in room.values()
+        )
+        self.total_bytes += room_bytes - self._room_bytes.get(room_id, 0)
+        self._room_bytes[room_id] = room_bytes
+
+    def _drop(self, room_id: int):
+        self._rooms.pop(room_id, None)
+        self.total_bytes -= self._room_bytes.pop(room_id, 0)
+
+    def _evict(self):
+        # 전체 메모리 예산 초과 시 가장 오래 사용하지 않은 채팅방부터 제거
+        while self.total_bytes > self.max_bytes and len(self._rooms) > 1:
+            room_id = next(iter(self._rooms))
+            self._drop(room_id)
+            self.evicted_rooms += 1
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "rooms": len(self._rooms),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "evicted_rooms": self.evicted_rooms,
+        }
+
+
+# 세대 값이 맞을 때만 항목을 seq 순번으로 넣고, 최근 size 개로 자른 뒤 만료 시간 갱신
+# KEYS: 버퍼 키, 세대 키 / ARGV: 세대("*" 면 검사 안 함), size, ttl, seq1, entry1, ...
+STORE_SCRIPT = """
+if ARGV[1] ~= '*' and (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+for i = 4, #ARGV, 2 do
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], ARGV[i], ARGV[i])
+    redis.call('ZADD', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -(tonumber(ARGV[2]) + 1))
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]))
+return 1
+"""
+
+
+class RedisMessageBuffer(MessageBuffer):
+    """모든 워커가 공유하는 Redis 정렬 집합(score = seq) 버퍼. 안 쓰는 채팅방은 TTL 로 만료"""
+
+    name = "redis"
+    shared = True
+
+    def __init__(
+        self,
+        size: int = MESSAGE_BUFFER_SIZE,
+        redis_url: str = REDIS_URL,
+        prefix: str = MESSAGE_BUFFER_REDIS_PREFIX,
+        ttl_seconds: int = MESSAGE_BUFFER_TTL_SECONDS,
+    ):
+        super().__init__(size)
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self.ttl = ttl_seconds
+        self._redis = None
+        self._store_script = None
+        self.errors = 0
+
+    def _key(self, room_id: int) -> str:
+        return f"{self.prefix}{room_id}"
+
+    def _generation_key(self, room_id: int) -> str:
+        return f"{self.prefix}{room_id}:gen"
+
+    async def start(self):
+        import redis.asyncio as aioredis
+
+        self._redis = aioredis.from_url(self.redis_url)
+        self._store_script = self._redis.register_script(STORE_SCRIPT)
+        logger.info("Redis message buffer started")
+
+    async def stop(self):
+        if self._redis:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def generation(self, room_id: int) -> str:
+        try:
+            value = await self._redis.get(self._generation_key(room_id))
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Message buffer generation read failed: {str(e)}")
+            return None
+        return value.decode() if value else "0"
+
+    async def invalidate(self, room_id: int):
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.incr(self._generation_key(room_id))
+                pipe.expire(self._generation_key(room_id), self.ttl)
+                pipe.delete(self._key(room_id))
+                await pipe.execute()
+            self.invalidations += 1
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Message buffer invalidation failed: {str(e)}")
+
+    async def fill(self, room_id: int, entries: List[dict], generation):
+        # 세대 값을 읽지 못했다면 채우지 않음 (삭제된 메시지가 되살아나지 않도록)
+        if generation is None:
+            return
+        await super().fill(room_id, entries, generation)
+
+    async def _entries(self, room_id: int, count: int) -> List[dict]:
+        try:
+            raw = await self._redis.zrevrange(self._key(room_id), 0, count - 1)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Message buffer read failed: {str(e)}")
+            return []
+        return [json.loads(item) for item in raw]
+
+    async def _store(self, room_id: int, entries: List[dict], generation) -> bool:
+        args = ["*" if generation is None else generation, self.size, self.ttl]
+        for entry in entries:
+            args.extend([entry["seq"], json.dumps(entry)])
+        try:
+            stored = await self._store_script(
+                keys=[self._key(room_id), self._generation_key(room_id)], args=args
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Message buffer write failed: {str(e)}")
+            return False
+        return bool(stored)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "ttl_seconds": self.ttl, "errors": self.errors}
+
+
+def create_message_buffer(kind: str = MESSAGE_BUFFER_BACKEND) -> MessageBuffer:
+    if kind == "redis":
+        return RedisMessageBuffer()
+    if kind != "memory":
+        logger.warning(f"Unknown message buffer '{kind}', falling back to in-memory")
+    return InMemoryMessageBuffer()
+
+
+# 전역 최근 메시지 버퍼 인스턴스
+message_buffer = create_message_buffer()
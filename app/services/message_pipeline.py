@@ -0,0 +1,311 @@
+import asyncio
+import logging
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import and_, bindparam, func, insert, or_, update
+
+from app.database import AsyncSessionLocal
+from app.models.chat import ChatRoom, ChatRoomParticipant, Message
+from app.services.room_summary import make_preview
+from app.utils.metrics import LatencyStats
+
+load_dotenv()
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 그룹 커밋 설정: 최대 대기 시간(ms) 또는 최대 행 수에 도달하면 한 번에 기록
+MESSAGE_BATCH_MAX_DELAY_MS = float(os.getenv("MESSAGE_BATCH_MAX_DELAY_MS", "5"))
+MESSAGE_BATCH_MAX_ROWS = int(os.getenv("MESSAGE_BATCH_MAX_ROWS", "100"))
+
+
+@dataclass
+class StoredMessage:
+    id: int
+    chat_room_id: int
+    sender_id: int
+    content: str
+    created_at: datetime
+    is_deleted: bool
+    client_timestamp: Optional[datetime] = None
+    seq: Optional[int] = None
+
+
+@dataclass
+class PendingMessage:
+    chat_room_id: int
+    sender_id: int
+    content: str
+    client_timestamp: Optional[datetime]
+    future: asyncio.Future
+    submitted_at: float = field(default_factory=time.monotonic)
+
+    def values(self, seq: int) -> dict:
+        return {
+            "chat_room_id": self.chat_room_id,
+            "sender_id": self.sender_id,
+            "content": self.content,
+            "client_timestamp": self.client_timestamp,
+            "seq": seq,
+        }
+
+
+class MessageWritePipeline:
+    """워커 내 모든 소켓의 채팅 메시지를 모아 하나의 트랜잭션으로 기록합니다."""
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        max_delay_ms: float = MESSAGE_BATCH_MAX_DELAY_MS,
+        max_rows: int = MESSAGE_BATCH_MAX_ROWS,
+    ):
+        self.session_factory = session_factory
+        self.max_delay = max_delay_ms / 1000
+        self.max_rows = max_rows
+        self._pending: List[PendingMessage] = []
+        self._has_pending = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        # submit 부터 커밋 완료까지의 시간
+        self.batch_latency = LatencyStats()
+        # 배치 하나를 기록하는 데 걸린 시간
+        self.flush_duration = LatencyStats()
+        self.batches = 0
+        self.rows = 0
+        self.failed_batches = 0
+        self.max_batch_size = 0
+
+    async def start(self):
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Message write pipeline started (max_delay={self.max_delay * 1000}ms, max_rows={self.max_rows})"
+        )
+
+    async def stop(self):
+        # 종료 전에 남은 메시지를 모두 기록하도록 대기 없이 플러시
+        self._closing = True
+        self._has_pending.set()
+        self._batch_full.set()
+        if self._task:
+            await self._task
+            self._task = None
+        logger.info("Message write pipeline stopped")
+
+    async def submit(
+        self,
+        chat_room_id: int,
+        sender_id: int,
+        content: str,
+        client_timestamp: Optional[datetime] = None,
+    ) -> StoredMessage:
+        """메시지를 배치에 넣고, 커밋되어 내구성이 확보되면 저장된 행을 반환합니다."""
+        if self._closing:
+            raise RuntimeError("Message write pipeline is stopped")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(
+            PendingMessage(chat_room_id, sender_id, content, client_timestamp, future)
+        )
+        self._has_pending.set()
+        if len(self._pending) >= self.max_rows:
+            self._batch_full.set()
+        return await future
+
+    async def _run(self):
+        while True:
+            await self._has_pending.wait()
+            if not self._pending:
+                if self._closing:
+                    return
+                self._has_pending.clear()
+                continue
+            # 가장 오래 기다린 메시지 기준으로 남은 대기 시간 계산
+            waited = time.monotonic() - self._pending[0].submitted_at
+            timeout = self.max_delay - waited
+            if timeout > 0 and len(self._pending) < self.max_rows:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            await self._flush(self._take_batch())
+
+    def _take_batch(self) -> List[PendingMessage]:
+        batch = self._pending[: self.max_rows]
+        del self._pending[: self.max_rows]
+        if not self._pending and not self._closing:
+            self._has_pending.clear()
+        if len(self._pending) < self.max_rows and not self._closing:
+            self._batch_full.clear()
+        return batch
+
+    async def _flush(self, batch: List[PendingMessage]):
+        if not batch:
+            return
+        started = time.monotonic()
+        try:
+            stored = await self._write_batch(batch)
+        except Exception as e:
+            self.failed_batches += 1
+            logger.error(f"Failed to write batch of {len(batch)} messages: {str(e)}")
+            if len(batch) > 1:
+                # 잘못된 행 하나가 배치 전체를 실패시키지 않도록 행 단위로 재시도
+                for pending in batch:
+                    await self._flush([pending])
+                return
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+
+        finished = time.monotonic()
+        self.flush_duration.record(finished - started)
+        self.batches += 1
+        self.rows += len(batch)
+        self.max_batch_size = max(self.max_batch_size, len(batch))
+        for pending, message in zip(batch, stored):
+            self.batch_latency.record(finished - pending.submitted_at)
+            if not pending.future.done():
+                pending.future.set_result(message)
+
+    async def _write_batch(self, batch: List[PendingMessage]) -> List[StoredMessage]:
+        async with self.session_factory() as db:
+            seqs = await self._reserve_seqs(db, batch)
+
+            # 다중 행 INSERT ... RETURNING (입력 순서대로 결과 반환)
+            rows = (
+                await db.execute(
+                    insert(Message).returning(
+                        Message.id,
+                        Message.created_at,
+                        Message.is_deleted,
+                        sort_by_parameter_order=True,
+                    ),
+                    [pending.values(seq) for pending, seq in zip(batch, seqs)],
+                )
+            ).all()
+
+            # 채팅방별 배치 내 마지막 메시지로 요약 갱신 (같은 트랜잭션)
+            latest = {}
+            for pending, row in zip(batch, rows):
+                latest[pending.chat_room_id] = (pending, row)
+            # 다른 워커가 더 최신 메시지를 이미 반영했다면 덮어쓰지 않음
+            rooms = ChatRoom.__table__
+            await db.execute(
+                update(rooms)
+                .where(
+                    and_(
+                        rooms.c.id == bindparam("b_room_id"),
+                        or_(
+                            rooms.c.last_message_id.is_(None),
+                            rooms.c.last_message_id < bindparam("b_message_id"),
+                        ),
+                    )
+                )
+                .values(
+                    last_message_id=bindparam("b_message_id"),
+                    last_message_preview=bindparam("b_preview"),
+                    last_message_time=bindparam("b_created_at"),
+                    last_activity_at=bindparam("b_created_at"),
+                    updated_at=func.now(),
+                ),
+                [
+                    {
+                        "b_room_id": room_id,
+                        "b_message_id": row.id,
+                        "b_preview": make_preview(pending.content),
+                        "b_created_at": row.created_at,
+                    }
+                    for room_id, (pending, row) in latest.items()
+                ],
+            )
+
+            # 보낸 사람은 자신의 메시지까지 읽은 것으로 처리
+            latest_sent = {}
+            for pending, row, seq in zip(batch, rows, seqs):
+                latest_sent[(pending.chat_room_id, pending.sender_id)] = (row.id, seq)
+            participants = ChatRoomParticipant.__table__
+            await db.execute(
+                update(participants)
+                .where(
+                    and_(
+                        participants.c.chat_room_id == bindparam("b_room_id"),
+                        participants.c.user_id == bindparam("b_user_id"),
+                        participants.c.last_read_seq < bindparam("b_seq"),
+                    )
+                )
+                .values(
+                    last_read_message_id=bindparam("b_message_id"),
+                    last_read_seq=bindparam("b_seq"),
+                ),
+                [
+                    {
+                        "b_room_id": room_id,
+                        "b_user_id": user_id,
+                        "b_message_id": message_id,
+                        "b_seq": seq,
+                    }
+                    for (room_id, user_id), (message_id, seq) in latest_sent.items()
+                ],
+            )
+            await db.commit()
+
+        return [
+            StoredMessage(
+                id=row.id,
+                chat_room_id=pending.chat_room_id,
+                sender_id=pending.sender_id,
+                content=pending.content,
+                created_at=row.created_at,
+                is_deleted=row.is_deleted,
+                client_timestamp=pending.client_timestamp,
+                seq=seq,
+            )
+            for pending, row, seq in zip(batch, rows, seqs)
+        ]
+
+    async def _reserve_seqs(self, db, batch: List[PendingMessage]) -> List[int]:
+        # 채팅방별로 필요한 개수만큼 순번을 한 번에 예약 (교착 방지를 위해 ID 순으로 잠금)
+        counts = Counter(pending.chat_room_id for pending in batch)
+        next_seq = {}
+        for room_id in sorted(counts):
+            last_seq = await db.scalar(
+                update(ChatRoom)
+                .where(ChatRoom.id == room_id)
+                .values(message_seq=ChatRoom.message_seq + counts[room_id])
+                .returning(ChatRoom.message_seq)
+                .execution_options(synchronize_session=False)
+            )
+            if last_seq is None:
+                raise ValueError(f"Chat room with id {room_id} not found")
+            next_seq[room_id] = last_seq - counts[room_id] + 1
+
+        seqs = []
+        for pending in batch:
+            seqs.append(next_seq[pending.chat_room_id])
+            next_seq[pending.chat_room_id] += 1
+        return seqs
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_delay_ms": self.max_delay * 1000,
+            "max_batch_rows": self.max_rows,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "rows": self.rows,
+            "failed_batches": self.failed_batches,
+            "avg_batch_size": round(self.rows / self.batches, 2) if self.batches else 0,
+            "max_batch_size": self.max_batch_size,
+            "batch_latency": self.batch_latency.snapshot(),
+            "flush_duration": self.flush_duration.snapshot(),
+        }
+
+
+# 전역 메시지 기록 파이프라인 인스턴스
+message_pipeline = MessageWritePipeline()
@@ -0,0 +1,71 @@
+import logging
+import math
+import os
+from typing import List
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+
+from app.services.membership import RoomMembership
+from app.utils.rate_limit import Bucket, BucketLimit, rate_limiter
+
+load_dotenv()
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 사용자 한 명이 모든 채팅방에 보내는 메시지 한도 (분당 수, 연속 허용 수)
+MESSAGE_RATE_USER_PER_MINUTE = int(os.getenv("MESSAGE_RATE_USER_PER_MINUTE", "60"))
+MESSAGE_RATE_USER_BURST = int(os.getenv("MESSAGE_RATE_USER_BURST", "10"))
+# 채팅방 하나에 들어오는 메시지 한도 (채팅방별 설정이 없을 때)
+MESSAGE_RATE_ROOM_PER_MINUTE = int(os.getenv("MESSAGE_RATE_ROOM_PER_MINUTE", "600"))
+MESSAGE_RATE_ROOM_BURST = int(os.getenv("MESSAGE_RATE_ROOM_BURST", "100"))
+
+
+def per_minute(count: int, burst: int) -> BucketLimit:
+    return BucketLimit(rate=count / 60, burst=max(1, burst))
+
+
+def message_buckets(membership: RoomMembership, user_id: int) -> List[Bucket]:
+    """메시지 하나를 보낼 때 토큰을 차감할 사용자, 채팅방, 슬로우 모드 버킷 목록을 만듭니다."""
+    room_id = membership.room_id
+    room_rate = membership.message_rate_per_minute or MESSAGE_RATE_ROOM_PER_MINUTE
+    buckets = [
+        (
+            f"user:{user_id}",
+            per_minute(MESSAGE_RATE_USER_PER_MINUTE, MESSAGE_RATE_USER_BURST),
+        ),
+        # 채팅방별 한도가 낮으면 연속 허용 수도 그 한도를 넘지 않음
+        (
+            f"room:{room_id}",
+            per_minute(room_rate, min(room_rate, MESSAGE_RATE_ROOM_BURST)),
+        ),
+    ]
+    # 슬로우 모드는 관리자에게 적용하지 않음
+    if membership.slow_mode_seconds and not membership.is_admin(user_id):
+        buckets.append(
+            (
+                f"slow:{room_id}:{user_id}",
+                BucketLimit(rate=1 / membership.slow_mode_seconds, burst=1),
+            )
+        )
+    return buckets
+
+
+async def check_message_rate(membership: RoomMembership, user_id: int) -> float:
+    """메시지 전송 토큰을 차감합니다. 한도를 넘으면 다시 보낼 수 있을 때까지의 시간(초)을 반환합니다."""
+    retry_after = await rate_limiter.acquire(message_buckets(membership, user_id))
+    if retry_after > 0:
+        logger.warning(
+            f"Message from user {user_id} to room {membership.room_id} rate limited, retry after {retry_after:.2f}s"
+        )
+    return retry_after
+
+
+def rate_limit_exceeded(retry_after: float) -> HTTPException:
+    """Retry-After 헤더(초 단위 올림)를 포함한 429 응답을 만듭니다."""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=f"Too many messages, retry after {retry_after:.1f}s",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
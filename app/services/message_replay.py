@@ -0,0 +1,74 @@
+import logging
+import os
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.chat import ChatRoom, Message
+from app.models.user import User
+from app.services.message_buffer import message_buffer, message_entry
+
+load_dotenv()
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 재연결 시 소켓으로 바로 재전송할 최대 메시지 수 (넘으면 REST 로 다시 동기화)
+WS_REPLAY_MAX_MESSAGES = int(os.getenv("WS_REPLAY_MAX_MESSAGES", "200"))
+
+
+async def load_missed_messages(
+    db: AsyncSession,
+    room_id: int,
+    last_seen_message_id: int,
+    limit: int = WS_REPLAY_MAX_MESSAGES,
+) -> Optional[List[dict]]:
+    """last_seen_message_id 이후의 메시지를 오래된 순으로 반환합니다. 재전송할 수 없으면 None."""
+    # 최근 메시지 버퍼에 채팅방의 마지막 메시지까지 빈틈 없이 남아 있으면 메시지 조회 없이 재전송
+    latest_seq = await db.scalar(
+        select(ChatRoom.message_seq).where(ChatRoom.id == room_id)
+    )
+    buffered = await message_buffer.since(room_id, last_seen_message_id, latest_seq)
+    if buffered is not None and len(buffered) <= limit:
+        return buffered
+
+    # 마지막으로 본 메시지가 이 채팅방의 메시지인지 확인하고 순번을 구함
+    row = (
+        await db.execute(
+            select(Message.seq, ChatRoom.message_seq)
+            .join(ChatRoom, ChatRoom.id == Message.chat_room_id)
+            .where(
+                and_(
+                    Message.id == last_seen_message_id,
+                    Message.chat_room_id == room_id,
+                )
+            )
+        )
+    ).first()
+    if row is None or row.seq is None:
+        logger.info(
+            f"Cannot replay room {room_id} from unknown message {last_seen_message_id}"
+        )
+        return None
+    missed = (row.message_seq or 0) - row.seq
+    if missed > limit:
+        logger.info(
+            f"Room {room_id} has {missed} missed messages after {last_seen_message_id}, exceeding replay limit {limit}"
+        )
+        return None
+    if missed <= 0:
+        return []
+
+    # (chat_room_id, seq) 인덱스를 타는 키셋 조회
+    rows = (
+        await db.execute(
+            select(Message, User.username)
+            .outerjoin(User, Message.sender_id == User.id)
+            .where(and_(Message.chat_room_id == room_id, Message.seq > row.seq))
+            .order_by(Message.seq)
+            .limit(limit)
+        )
+    ).all()
+    return [message_entry(message, username) for message, username in rows]
@@ -0,0 +1,284 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.celery_worker import celery_app
+from app.database import AsyncSessionLocal
+from app.models.outbox import OutboxMessage
+from app.tasks.email import send_email, send_email_batch
+from app.utils.metrics import LatencyStats
+
+load_dotenv()
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 아웃박스 릴레이 설정: 대기 행 확인 주기(ms), 한 번에 전송할 최대 행 수, 재시도 간격 상한(초)
+OUTBOX_POLL_MS = float(os.getenv("OUTBOX_POLL_MS", "1000"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_RETRY_MAX_SECONDS = float(os.getenv("OUTBOX_RETRY_MAX_SECONDS", "300"))
+# 커밋 알림을 받은 뒤 같은 주기에 전송할 행을 더 모으는 시간(ms)
+OUTBOX_LINGER_MS = float(os.getenv("OUTBOX_LINGER_MS", "200"))
+
+# 처리량 계산 구간(초)
+THROUGHPUT_WINDOW_SECONDS = 60
+
+# 인자 하나를 받는 태스크 -> 그 인자 목록을 받는 배치 태스크
+# 한 주기에 모인 같은 태스크 행들은 배치 태스크 메시지 하나로 합쳐서 전송
+BATCH_TASKS = {send_email.name: send_email_batch.name}
+
+# (태스크 이름, args, kwargs) 목록을 브로커로 보내고 (보낸 개수, 실패 원인) 을 반환하는 함수
+Dispatch = Callable[[Sequence[Tuple[str, list, dict]]], Tuple[int, Optional[Exception]]]
+
+
+def enqueue_task(db: AsyncSession, task, *args, **kwargs):
+    """요청 트랜잭션 안에서 Celery 태스크 실행을 아웃박스에 기록합니다. 전송은 릴레이가 담당합니다."""
+    db.add(OutboxMessage(task_name=task.name, args=list(args), kwargs=kwargs))
+
+
+def publish_tasks(
+    messages: Sequence[Tuple[str, list, dict]],
+) -> Tuple[int, Optional[Exception]]:
+    # 배치 전체에 브로커 연결 하나를 사용하고, 재시도는 릴레이가 직접 관리
+    # 결과를 읽지 않으므로 태스크마다 결과 채널을 구독하지 않도록 ignore_result 지정
+    sent = 0
+    try:
+        with celery_app.producer_or_acquire() as producer:
+            # 브로커에 닿지 않으면 kombu 의 연결 재시도를 기다리지 않고 바로 실패
+            producer.connection.ensure_connection(max_retries=0)
+            for task_name, args, kwargs in messages:
+                celery_app.send_task(
+                    task_name,
+                    args=args,
+                    kwargs=kwargs,
+                    producer=producer,
+                    retry=False,
+                    ignore_result=True,
+                )
+                sent += 1
+    except Exception as e:
+        return sent, e
+    return sent, None
+
+
+def coalesce_rows(
+    rows: Sequence[OutboxMessage],
+) -> List[Tuple[List[OutboxMessage], Tuple[str, list, dict]]]:
+    """전송할 행들을 (행 목록, 브로커 메시지) 묶음으로 만듭니다. 배치 태스크가 있는 행은 하나로 합칩니다."""
+    groups = []
+    batches = {}
+    for row in rows:
+        batch_task = BATCH_TASKS.get(row.task_name)
+        if batch_task is None or row.kwargs or len(row.args) != 1:
+            groups.append(([row], (row.task_name, row.args, row.kwargs)))
+            continue
+        if batch_task not in batches:
+            batches[batch_task] = ([], (batch_task, [[]], {}))
+            groups.append(batches[batch_task])
+        group_rows, (_, (values,), _) = batches[batch_task]
+        group_rows.append(row)
+        values.append(row.args[0])
+    return groups
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite 는 시간대 없이 UTC 로 저장
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class OutboxRelay:
+    """아웃박스에 쌓인 태스크를 배치 단위로 Celery 브로커에 전송합니다."""
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        dispatch: Dispatch = publish_tasks,
+        poll_interval_ms: float = OUTBOX_POLL_MS,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        retry_max_seconds: float = OUTBOX_RETRY_MAX_SECONDS,
+        linger_ms: float = OUTBOX_LINGER_MS,
+    ):
+        self.session_factory = session_factory
+        self.dispatch = dispatch
+        self.poll_interval = poll_interval_ms / 1000
+        self.batch_size = batch_size
+        self.retry_max = retry_max_seconds
+        self.linger = linger_ms / 1000
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        # 아웃박스 기록부터 브로커 전송까지의 시간
+        self.dispatch_lag = LatencyStats()
+        self.batch_duration = LatencyStats()
+        self._recent: deque = deque()
+        self.pending = 0
+        self.oldest_pending_seconds = 0.0
+        self.dispatched = 0
+        # 배치 태스크로 합친 뒤 실제로 브로커에 보낸 메시지 수
+        self.messages = 0
+        self.batches = 0
+        self.failed_attempts = 0
+        self.failed_polls = 0
+
+    async def start(self):
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Outbox relay started (poll_interval={self.poll_interval * 1000}ms, batch_size={self.batch_size})"
+        )
+
+    async def stop(self):
+        # 종료 전에 한 번 더 전송 (남은 행은 다음 실행 때 전송)
+        self._closing = True
+        self._wakeup.set()
+        if self._task:
+            await self._task
+            self._task = None
+        logger.info("Outbox relay stopped")
+
+    def notify(self):
+        """아웃박스 기록이 커밋되었음을 알려 다음 주기를 기다리지 않고 전송합니다."""
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                if not self._closing:
+                    # 가입이 몰릴 때 여러 요청을 배치 태스크 하나로 합칠 수 있도록 잠시 대기
+                    await asyncio.sleep(self.linger)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                # 배치가 가득 차 있으면 밀린 행이 없어질 때까지 이어서 전송
+                while await self._relay_batch() >= self.batch_size:
+                    pass
+                await self._measure_backlog()
+            except Exception as e:
+                self.failed_polls += 1
+                logger.error(f"Outbox relay poll failed: {str(e)}")
+            if self._closing:
+                return
+
+    def _ready(self, now: datetime):
+        return or_(
+            OutboxMessage.available_at.is_(None), OutboxMessage.available_at <= now
+        )
+
+    async def _relay_batch(self) -> int:
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as db:
+            # 여러 워커의 릴레이가 같은 행을 중복 전송하지 않도록 잠긴 행은 건너뜀
+            rows = (
+                await db.scalars(
+                    select(OutboxMessage)
+                    .where(self._ready(now))
+                    .order_by(OutboxMessage.id)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+            ).all()
+            if not rows:
+                return 0
+
+            groups = coalesce_rows(rows)
+            started = time.monotonic()
+            sent_messages, error = await asyncio.to_thread(
+                self.dispatch, [message for _, message in groups]
+            )
+            self.batch_duration.record(time.monotonic() - started)
+
+            sent_rows = [row for group, _ in groups[:sent_messages] for row in group]
+            if sent_rows:
+                await db.execute(
+                    delete(OutboxMessage).where(
+                        OutboxMessage.id.in_([row.id for row in sent_rows])
+                    )
+                )
+            if error is not None and sent_messages >= len(groups):
+                # 모든 메시지를 보낸 뒤(연결 반환 등)에 난 오류는 재전송할 필요가 없으므로 기록만 함
+                logger.error(
+                    f"Outbox dispatch raised after all {sent_messages} messages were sent: {str(error)}"
+                )
+                error = None
+            if error is not None:
+                # 브로커 장애로 보고 실패한 메시지의 행만 지수 백오프로 미루고, 배치의 나머지는 다음 주기에 전송
+                failed_rows, (task_name, _, _) = groups[sent_messages]
+                for failed in failed_rows:
+                    failed.attempts += 1
+                    failed.last_error = str(error)[:500]
+                    failed.available_at = now + timedelta(
+                        seconds=min(self.retry_max, 2**failed.attempts)
+                    )
+                self.failed_attempts += 1
+                logger.error(
+                    f"Failed to dispatch {len(failed_rows)} outbox messages ({task_name}, attempt {failed_rows[0].attempts}): {str(error)}"
+                )
+            await db.commit()
+
+        sent = len(sent_rows)
+        dispatched_at = datetime.now(timezone.utc)
+        for row in sent_rows:
+            created_at = _as_utc(row.created_at)
+            if created_at is not None:
+                self.dispatch_lag.record((dispatched_at - created_at).total_seconds())
+        self.batches += 1
+        self.dispatched += sent
+        self.messages += sent_messages
+        self._recent.append((time.monotonic(), sent))
+        # 브로커 장애 중에는 같은 배치를 바로 다시 시도하지 않음
+        return len(rows) if error is None else 0
+
+    async def _measure_backlog(self):
+        async with self.session_factory() as db:
+            count, oldest = (
+                await db.execute(
+                    select(
+                        func.count(OutboxMessage.id), func.min(OutboxMessage.created_at)
+                    )
+                )
+            ).one()
+        self.pending = count
+        oldest = _as_utc(oldest)
+        self.oldest_pending_seconds = (
+            (datetime.now(timezone.utc) - oldest).total_seconds() if oldest else 0.0
+        )
+
+    def _throughput(self) -> float:
+        cutoff = time.monotonic() - THROUGHPUT_WINDOW_SECONDS
+        while self._recent and self._recent[0][0] < cutoff:
+            self._recent.popleft()
+        return sum(count for _, count in self._recent) / THROUGHPUT_WINDOW_SECONDS
+
+    def stats(self) -> dict:
+        return {
+            "poll_interval_ms": self.poll_interval * 1000,
+            "batch_size": self.batch_size,
+            "linger_ms": self.linger * 1000,
+            "pending": self.pending,
+            # 가장 오래된 미전송 행이 기다린 시간 (릴레이 지연)
+            "oldest_pending_seconds": round(self.oldest_pending_seconds, 3),
+            "dispatched": self.dispatched,
+            "messages": self.messages,
+            "throughput_per_second": round(self._throughput(), 3),
+            "batches": self.batches,
+            "failed_attempts": self.failed_attempts,
+            "failed_polls": self.failed_polls,
+            "dispatch_lag": self.dispatch_lag.snapshot(),
+            "batch_duration": self.batch_duration.snapshot(),
+        }
+
+
+# 전역 아웃박스 릴레이 인스턴스
+outbox_relay = OutboxRelay()
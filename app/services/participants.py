@@ -0,0 +1,153 @@
+import logging
+import os
+from datetime import datetime
+from typing import Collection, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.chat import ChatRoomParticipant
+from app.models.user import User
+from app.schemas.chat import ParticipantInfo
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.user_cache import CachedUser, user_directory
+
+load_dotenv()
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 채팅방 상세 응답에 포함할 참여자 미리보기 수
+ROOM_PARTICIPANT_PREVIEW = int(os.getenv("ROOM_PARTICIPANT_PREVIEW", "20"))
+
+# ON CONFLICT DO NOTHING 을 지원하는 방언별 INSERT
+UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class InsertedParticipant(NamedTuple):
+    id: int
+    user_id: int
+    is_admin: bool
+    joined_at: Optional[datetime]
+
+
+def unique_usernames(usernames: Iterable[str]) -> List[str]:
+    """순서를 유지하면서 중복 사용자명을 제거합니다."""
+    return list(dict.fromkeys(usernames))
+
+
+async def resolve_usernames(
+    db: AsyncSession, usernames: Sequence[str]
+) -> List[CachedUser]:
+    """사용자명 목록을 한 번에 조회합니다. 없는 사용자가 있으면 모두 모아 404 로 알립니다."""
+    found = await user_directory.get_many_by_username(db, usernames)
+    unknown = [username for username in usernames if username not in found]
+    if unknown:
+        logger.error(f"Users not found: {', '.join(unknown)}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Users not found: {', '.join(unknown)}",
+        )
+    return [found[username] for username in usernames]
+
+
+async def insert_participants(
+    db: AsyncSession,
+    room_id: int,
+    user_ids: Sequence[int],
+    last_read_seq: int = 0,
+    admin_ids: Iterable[int] = (),
+) -> List[InsertedParticipant]:
+    """참여자를 한 문장으로 추가하고 실제로 추가된 행을 반환합니다. 이미 참여 중인 사용자는 건너뜁니다."""
+    if not user_ids:
+        return []
+    admins = set(admin_ids)
+    rows = [
+        {
+            "chat_room_id": room_id,
+            "user_id": user_id,
+            "is_admin": user_id in admins,
+            "last_read_seq": last_read_seq,
+        }
+        for user_id in user_ids
+    ]
+    participants = ChatRoomParticipant.__table__
+    upsert = UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if upsert is None:
+        # 그 밖의 DB 는 호출자가 걸러낸 사용자만 일반 INSERT
+        statement = participants.insert()
+    else:
+        statement = upsert(participants).on_conflict_do_nothing(
+            index_elements=[participants.c.chat_room_id, participants.c.user_id]
+        )
+    # 여러 행 INSERT ... RETURNING 은 SQLAlchemy 가 묶음 단위로 나눠 실행
+    result = await db.execute(
+        statement.returning(
+            participants.c.id,
+            participants.c.user_id,
+            participants.c.is_admin,
+            participants.c.joined_at,
+        ),
+        rows,
+    )
+    return [InsertedParticipant(*row) for row in result.all()]
+
+
+def participants_cursor(participant_id: int) -> str:
+    return encode_cursor(participant_id)
+
+
+async def list_participants(
+    db: AsyncSession,
+    room_id: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+    admin: Optional[bool] = None,
+    online: Optional[bool] = None,
+    online_usernames: Collection[str] = (),
+) -> Tuple[List[ParticipantInfo], Optional[str]]:
+    """참여자를 참여 순으로 limit 명씩 조회하고 (참여자 목록, 다음 페이지 커서) 를 반환합니다."""
+    # 참여 순서는 참여 행 id 순서와 같으므로 (chat_room_id, id) 인덱스를 타는 키셋 조회
+    # joined_at 은 NULL 일 수 있고 SQLite 에서는 바인딩한 값과 문자열 형식이 달라 키로 쓰지 않음
+    key = ChatRoomParticipant.id
+    query = (
+        select(
+            ChatRoomParticipant.id,
+            ChatRoomParticipant.is_admin,
+            ChatRoomParticipant.joined_at,
+            User.username,
+        )
+        .join(User, ChatRoomParticipant.user_id == User.id)
+        .where(ChatRoomParticipant.chat_room_id == room_id)
+        .order_by(key.desc() if descending else key)
+        .limit(limit + 1)
+    )
+    if admin is True:
+        query = query.where(ChatRoomParticipant.is_admin.is_(True))
+    elif admin is False:
+        query = query.where(ChatRoomParticipant.is_admin.isnot(True))
+    if online is True:
+        query = query.where(User.username.in_(list(online_usernames)))
+    elif online is False and online_usernames:
+        query = query.where(User.username.notin_(list(online_usernames)))
+    if cursor:
+        (cursor_key,) = decode_cursor(cursor, 1)
+        if not isinstance(cursor_key, int) or isinstance(cursor_key, bool):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+        query = query.where(key < cursor_key if descending else key > cursor_key)
+
+    rows = (await db.execute(query)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = participants_cursor(rows[-1].id)
+    return [
+        ParticipantInfo(username=username, is_admin=is_admin, joined_at=joined_at)
+        for _, is_admin, joined_at, username in rows
+    ], next_cursor
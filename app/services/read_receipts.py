@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import and_, bindparam, exists, func, or_, select, update
+
+from app.database import AsyncSessionLocal
+from app.models.chat import ChatRoomParticipant, Message
+from app.utils.metrics import LatencyStats
+
+load_dotenv()
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 읽음 표시를 모아서 기록하는 주기(ms)
+READ_RECEIPT_FLUSH_MS = float(os.getenv("READ_RECEIPT_FLUSH_MS", "500"))
+
+
+class ReadReceiptWriter:
+    """읽음 이벤트를 (채팅방, 사용자)별 최신 값으로 합쳐 주기적으로 한 번에 기록합니다."""
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        flush_interval_ms: float = READ_RECEIPT_FLUSH_MS,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval_ms / 1000
+        # (room_id, user_id) -> 읽은 마지막 message_id
+        self._pending: Dict[Tuple[int, int], int] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.flush_duration = LatencyStats()
+        self.received = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.rows = 0
+        self.failed_flushes = 0
+
+    async def start(self):
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Read receipt writer started (flush_interval={self.flush_interval * 1000}ms)"
+        )
+
+    async def stop(self):
+        # 종료 전에 남은 읽음 표시를 기록
+        self._closing = True
+        self._wakeup.set()
+        if self._task:
+            await self._task
+            self._task = None
+        logger.info("Read receipt writer stopped")
+
+    def mark_read(self, room_id: int, user_id: int, message_id: int):
+        """읽음 위치를 기록 대기열에 넣습니다. 같은 사용자의 이전 값은 덮어씁니다."""
+        self.received += 1
+        key = (room_id, user_id)
+        current = self._pending.get(key)
+        if current is not None:
+            self.coalesced += 1
+            if current >= message_id:
+                return
+        self._pending[key] = message_id
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            if not self._closing:
+                # 주기 동안 들어온 이벤트를 모아서 기록
+                await asyncio.sleep(self.flush_interval)
+            self._wakeup.clear()
+            await self._flush()
+            if self._closing and not self._pending:
+                return
+
+    async def _flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        started = time.monotonic()
+        try:
+            await self._write_batch(batch)
+        except Exception as e:
+            self.failed_flushes += 1
+            logger.error(f"Failed to write {len(batch)} read receipts: {str(e)}")
+            return
+        self.flush_duration.record(time.monotonic() - started)
+        self.flushes += 1
+        self.rows += len(batch)
+
+    async def _write_batch(self, batch: Dict[Tuple[int, int], int]):
+        participants = ChatRoomParticipant.__table__
+        messages = Message.__table__
+        # 읽은 메시지가 해당 채팅방의 메시지일 때만, 그리고 앞으로만 이동
+        read_message = and_(
+            messages.c.id == bindparam("b_message_id"),
+            messages.c.chat_room_id == bindparam("b_room_id"),
+        )
+        async with self.session_factory() as db:
+            await db.execute(
+                update(participants)
+                .where(
+                    and_(
+                        participants.c.chat_room_id == bindparam("b_room_id"),
+                        participants.c.user_id == bindparam("b_user_id"),
+                        or_(
+                            participants.c.last_read_message_id.is_(None),
+                            participants.c.last_read_message_id
+                            < bindparam("b_message_id"),
+                        ),
+                        exists().where(read_message),
+                    )
+                )
+                .values(
+                    last_read_message_id=bindparam("b_message_id"),
+                    last_read_seq=func.coalesce(
+                        select(messages.c.seq).where(read_message).scalar_subquery(),
+                        participants.c.last_read_seq,
+                    ),
+                ),
+                [
+                    {"b_room_id": room_id, "b_user_id": user_id, "b_message_id": mid}
+                    for (room_id, user_id), mid in batch.items()
+                ],
+            )
+            await db.commit()
+
+    def stats(self) -> dict:
+        return {
+            "flush_interval_ms": self.flush_interval * 1000,
+            "pending": len(self._pending),
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "flushes": self.flushes,
+            "rows": self.rows,
+            "failed_flushes": self.failed_flushes,
+            "flush_duration": self.flush_duration.snapshot(),
+        }
+
+
+# 전역 읽음 표시 기록기 인스턴스
+read_receipts = ReadReceiptWriter()
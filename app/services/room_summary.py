@@ -0,0 +1,132 @@
+import logging
+from typing import Optional
+
+from sqlalchemy import and_, bindparam, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.chat import ChatRoom, ChatRoomParticipant, Message
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 채팅방 목록에 표시할 마지막 메시지 미리보기 길이
+LAST_MESSAGE_PREVIEW_LENGTH = 100
+
+
+def make_preview(content: Optional[str]) -> Optional[str]:
+    """마지막 메시지 미리보기 문자열을 만듭니다."""
+    if content is None:
+        return None
+    return content[:LAST_MESSAGE_PREVIEW_LENGTH]
+
+
+async def adjust_participants_count(db: AsyncSession, room_id: int, delta: int):
+    """채팅방 요약의 참여자 수를 호출자의 트랜잭션 안에서 증감합니다."""
+    if not delta:
+        return
+    await db.execute(
+        update(ChatRoom)
+        .where(ChatRoom.id == room_id)
+        .values(participants_count=ChatRoom.participants_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def refresh_last_message(db: AsyncSession, room_id: int):
+    """삭제되지 않은 최신 메시지로 채팅방 요약의 마지막 메시지를 다시 계산합니다."""
+    last_message = (
+        await db.execute(
+            select(Message.id, Message.content, Message.created_at)
+            .where(and_(Message.chat_room_id == room_id, Message.is_deleted == False))
+            .order_by(Message.created_at.desc(), Message.id.desc())
+            .limit(1)
+        )
+    ).first()
+    await db.execute(
+        update(ChatRoom)
+        .where(ChatRoom.id == room_id)
+        .values(
+            last_message_id=last_message.id if last_message else None,
+            last_message_preview=(
+                make_preview(last_message.content) if last_message else None
+            ),
+            last_message_time=last_message.created_at if last_message else None,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def rebuild_room_summaries(db: AsyncSession) -> int:
+    """기존 데이터로부터 모든 채팅방 요약을 다시 계산합니다. (일회성 백필용)"""
+    # 순번이 없는 기존 메시지에 채팅방별 순번 부여
+    numbered = select(
+        Message.id,
+        func.row_number()
+        .over(partition_by=Message.chat_room_id, order_by=Message.id)
+        .label("seq"),
+    ).subquery()
+    await db.execute(
+        update(Message)
+        .where(Message.id == numbered.c.id)
+        .values(seq=numbered.c.seq)
+        .execution_options(synchronize_session=False)
+    )
+
+    room_ids = (await db.scalars(select(ChatRoom.id))).all()
+    for room_id in room_ids:
+        participants_count = await db.scalar(
+            select(func.count())
+            .select_from(ChatRoomParticipant)
+            .where(ChatRoomParticipant.chat_room_id == room_id)
+        )
+        await db.execute(
+            update(ChatRoom)
+            .where(ChatRoom.id == room_id)
+            .values(
+                participants_count=participants_count,
+                message_seq=select(func.coalesce(func.max(Message.seq), 0))
+                .where(Message.chat_room_id == room_id)
+                .scalar_subquery(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        # 기존 참여자는 현재까지의 메시지를 모두 읽은 것으로 간주
+        await db.execute(
+            update(ChatRoomParticipant)
+            .where(
+                and_(
+                    ChatRoomParticipant.chat_room_id == room_id,
+                    ChatRoomParticipant.last_read_message_id.is_(None),
+                )
+            )
+            .values(
+                last_read_seq=select(ChatRoom.message_seq)
+                .where(ChatRoom.id == room_id)
+                .scalar_subquery()
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await refresh_last_message(db, room_id)
+    # last_activity_at 은 커서 비교 형식을 맞추기 위해 읽은 값을 다시 바인딩해 저장
+    activity = (
+        await db.execute(
+            select(
+                ChatRoom.id,
+                func.coalesce(ChatRoom.last_message_time, ChatRoom.created_at),
+            )
+        )
+    ).all()
+    if activity:
+        rooms = ChatRoom.__table__
+        await db.execute(
+            update(rooms)
+            .where(rooms.c.id == bindparam("b_room_id"))
+            .values(last_activity_at=bindparam("b_activity_at")),
+            [
+                {"b_room_id": room_id, "b_activity_at": activity_at}
+                for room_id, activity_at in activity
+            ],
+        )
+    await db.commit()
+    logger.info(f"Rebuilt summaries for {len(room_ids)} chat rooms")
+    return len(room_ids)
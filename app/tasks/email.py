@@ -1,30 +1,127 @@
 import asyncio
+import logging
+import os
 import random
+import smtplib
+import ssl
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from typing import List, Sequence
+
+from dotenv import load_dotenv
+
 from app.celery_worker import celery_app
 
-import time
+load_dotenv()
 
+# 로거 설정
+logger = logging.getLogger(__name__)
 
-@celery_app.task(bind=True, max_retries=5)
-def send_email(self, user_id: int):
-    """
-    이메일 전송을 시뮬레이션하는 태스크
-    10% 확률로 실패하며, 실패 시 최대 5회까지 재시도
-    """
-    try:
-        # 10% 확률로 실패
-        if random.random() < 0.1:
-            raise Exception("이메일 전송 실패")
+# 메일 서버 설정 (로컬에서는 python -m app.utils.smtp_stub 으로 대체 서버 실행)
+SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "1025"))
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+# 실제 메일 서버용 STARTTLS 와 로그인 정보 (로컬 대체 서버는 사용하지 않음)
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "false").lower() == "true"
+SMTP_USERNAME = os.getenv("SMTP_USERNAME", "")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+EMAIL_SENDER = os.getenv("EMAIL_SENDER", "noreply@test.com")
+
+# 배치 하나에서 동시에 진행할 최대 전송 수와 재시도 설정
+EMAIL_SEND_CONCURRENCY = int(os.getenv("EMAIL_SEND_CONCURRENCY", "20"))
+EMAIL_MAX_RETRIES = int(os.getenv("EMAIL_MAX_RETRIES", "5"))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "2"))
+EMAIL_RETRY_MAX_SECONDS = float(os.getenv("EMAIL_RETRY_MAX_SECONDS", "300"))
+
+
+def email_address(user_id: int) -> str:
+    return f"{user_id}@test.com"
+
+
+def retry_delay(attempt: int) -> float:
+    """상한이 있는 지수 백오프에 full jitter 를 적용한 재시도 대기 시간(초)을 반환합니다."""
+    ceiling = min(EMAIL_RETRY_MAX_SECONDS, EMAIL_RETRY_BASE_SECONDS * 2**attempt)
+    return random.uniform(0, ceiling)
+
+
+def send_message(recipient: str, subject: str, body: str):
+    """smtplib 으로 메일 한 통을 보냅니다. 설정에 따라 STARTTLS 와 로그인을 진행합니다."""
+    message = EmailMessage()
+    message["From"] = EMAIL_SENDER
+    message["To"] = recipient
+    message["Subject"] = subject
+    message.set_content(body)
+    # 소켓 단위 제한 시간으로 응답하지 않는 메일 서버에서 스레드가 멈추지 않도록 함
+    with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT_SECONDS) as smtp:
+        if SMTP_STARTTLS:
+            smtp.starttls(context=ssl.create_default_context())
+        if SMTP_USERNAME:
+            smtp.login(SMTP_USERNAME, SMTP_PASSWORD)
+        smtp.send_message(message)
 
-        # 이메일 전송 시뮬레이션 (3초 대기)
-        time.sleep(3)
 
-        print(f"이메일 전송 성공: {user_id}@test.com")
-        return {"status": "success", "email": f"{user_id}@test.com"}
+async def deliver_batch(
+    user_ids: Sequence[int], concurrency: int = EMAIL_SEND_CONCURRENCY
+) -> List[int]:
+    """사용자들에게 환영 메일을 최대 concurrency 개씩 동시에 보내고 실패한 사용자 ID 를 반환합니다."""
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
 
-    except Exception as exc:
-        print(
-            f"이메일 전송 실패 (시도 {self.request.retries + 1}/5): {user_id}@test.com"
+    # smtplib 은 블로킹이므로 동시 전송 수만큼의 스레드에서 실행
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(concurrency, len(user_ids))),
+        thread_name_prefix="smtp",
+    ) as executor:
+
+        async def deliver(user_id: int) -> bool:
+            async with semaphore:
+                try:
+                    await loop.run_in_executor(
+                        executor,
+                        send_message,
+                        email_address(user_id),
+                        "채팅 서비스 가입을 환영합니다",
+                        "회원가입이 완료되었습니다.",
+                    )
+                    return True
+                except Exception as e:
+                    logger.warning(
+                        f"Email to {email_address(user_id)} failed: {str(e)}"
+                    )
+                    return False
+
+        results = await asyncio.gather(*(deliver(user_id) for user_id in user_ids))
+    return [user_id for user_id, ok in zip(user_ids, results) if not ok]
+
+
+@celery_app.task(ignore_result=True)
+def send_email_batch(user_ids: List[int], attempt: int = 0):
+    """
+    여러 사용자에게 환영 메일을 한 번에 보내는 태스크
+    실패한 사용자만 모아 jitter 를 적용한 백오프 후 최대 EMAIL_MAX_RETRIES 회 재시도
+    """
+    failed = asyncio.run(deliver_batch(user_ids))
+    logger.info(
+        f"Email batch sent {len(user_ids) - len(failed)}/{len(user_ids)} (attempt {attempt + 1})"
+    )
+    if not failed:
+        return
+    if attempt + 1 >= EMAIL_MAX_RETRIES:
+        logger.error(
+            f"Giving up on {len(failed)} emails after {attempt + 1} attempts: {failed}"
         )
-        # 재시도
-        self.retry(exc=exc, countdown=2**self.request.retries)  # 지수 백오프
+        return
+    countdown = retry_delay(attempt)
+    send_email_batch.apply_async(
+        (failed,), {"attempt": attempt + 1}, countdown=countdown
+    )
+    logger.info(f"Retrying {len(failed)} emails in {countdown:.1f}s")
+
+
+@celery_app.task(ignore_result=True)
+def send_email(user_id: int):
+    """
+    사용자 한 명에게 환영 메일을 보내는 태스크
+    아웃박스 릴레이는 같은 주기의 요청을 send_email_batch 하나로 합쳐 전송
+    """
+    send_email_batch([user_id])
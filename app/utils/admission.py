@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import random
+import time
+from collections import Counter
+
+from dotenv import load_dotenv
+from fastapi import WebSocket, status
+
+from app.database import DB_MAX_OVERFLOW, DB_POOL_SIZE
+from app.utils.rate_limit import BucketLimit, InMemoryRateLimiter
+
+load_dotenv()
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 워커 하나가 동시에 유지할 최대 WebSocket 수 (인증 중인 소켓 포함)
+WS_MAX_CONNECTIONS = int(os.getenv("WS_MAX_CONNECTIONS", "10000"))
+# 워커 하나가 받아들이는 초당 새 연결 수와 한 번에 몰려도 허용하는 수
+WS_MAX_CONNECTS_PER_SECOND = float(os.getenv("WS_MAX_CONNECTS_PER_SECOND", "100"))
+WS_CONNECT_BURST = int(os.getenv("WS_CONNECT_BURST", "200"))
+# 동시에 인증(토큰 확인, 참여 여부 조회) 중일 수 있는 소켓 수
+# 기본값은 DB 커넥션 풀이 한 번에 처리할 수 있는 수의 두 배
+WS_MAX_PENDING_AUTH = int(
+    os.getenv("WS_MAX_PENDING_AUTH", str((DB_POOL_SIZE + DB_MAX_OVERFLOW) * 2))
+)
+# 거부한 클라이언트에게 알려 줄 재시도 대기 시간의 기준과 상한(초)
+# 최근 거부가 많을수록 기준보다 길게 알려 주고, 실제 값은 0.5 ~ 1.5 배 사이에서 무작위
+WS_ADMISSION_RETRY_SECONDS = float(os.getenv("WS_ADMISSION_RETRY_SECONDS", "2"))
+WS_ADMISSION_RETRY_MAX_SECONDS = float(
+    os.getenv("WS_ADMISSION_RETRY_MAX_SECONDS", "60")
+)
+
+CONNECT_BUCKET = "connect"
+# 재시도 시간 계산에 쓰는 최근 수락/거부 수의 집계 구간(초)
+PRESSURE_WINDOW_SECONDS = 1.0
+
+
+class AdmissionRejected(Exception):
+    """워커가 새 WebSocket 을 받을 여유가 없을 때 발생합니다."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"{reason}, retry after {retry_after:.1f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def close_reason(self) -> str:
+        # 종료 프레임의 reason 은 123 바이트 이하
+        return json.dumps(
+            {"reason": self.reason, "retry_after": round(self.retry_after, 1)},
+            separators=(",", ":"),
+        )
+
+
+class AdmissionTicket:
+    """받아들인 소켓 하나가 차지한 연결 수와 인증 대기 슬롯"""
+
+    def __init__(self, controller: "AdmissionController"):
+        self.controller = controller
+        self.pending = True
+        self.open = True
+
+    def authenticated(self):
+        """인증과 참여 여부 확인이 끝나면 호출합니다. 인증 대기 슬롯을 반납합니다."""
+        if self.pending:
+            self.pending = False
+            self.controller.pending_auth -= 1
+
+    def release(self):
+        """소켓 처리가 끝나면(실패 포함) 항상 호출합니다."""
+        self.authenticated()
+        if self.open:
+            self.open = False
+            self.controller.connections -= 1
+
+
+class AdmissionController:
+    """워커 단위로 WebSocket 연결 수, 초당 새 연결 수, 인증 대기 수를 제한합니다."""
+
+    def __init__(
+        self,
+        max_connections: int = WS_MAX_CONNECTIONS,
+        connects_per_second: float = WS_MAX_CONNECTS_PER_SECOND,
+        connect_burst: int = WS_CONNECT_BURST,
+        max_pending_auth: int = WS_MAX_PENDING_AUTH,
+        retry_seconds: float = WS_ADMISSION_RETRY_SECONDS,
+        retry_max_seconds: float = WS_ADMISSION_RETRY_MAX_SECONDS,
+    ):
+        self.max_connections = max_connections
+        self.max_pending_auth = max_pending_auth
+        self.retry_seconds = retry_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.connect_limit = BucketLimit(rate=connects_per_second, burst=connect_burst)
+        self._connect_bucket = InMemoryRateLimiter(max_keys=1)
+        self.connections = 0
+        self.pending_auth = 0
+        self.max_pending_seen = 0
+        self.admitted = 0
+        self.rejected: Counter = Counter()
+        # 직전 구간과 현재 구간의 (수락 수, 거부 수)
+        self._window_started = time.monotonic()
+        self._previous_window = (0, 0)
+        self._current_window = [0, 0]
+
+    def _record(self, admitted: bool):
+        now = time.monotonic()
+        elapsed = now - self._window_started
+        if elapsed >= PRESSURE_WINDOW_SECONDS:
+            # 한 구간 넘게 조용했다면 직전 구간은 비어 있는 것으로 봄
+            self._previous_window = (
+                tuple(self._current_window)
+                if elapsed < 2 * PRESSURE_WINDOW_SECONDS
+                else (0, 0)
+            )
+            self._current_window = [0, 0]
+            self._window_started = now
+        self._current_window[0 if admitted else 1] += 1
+
+    def retry_hint(self, wait: float = 0.0) -> float:
+        """
+        거부한 클라이언트가 다시 시도할 때까지 기다릴 시간(초)
+        최근 받아들인 수보다 거부한 수가 많을수록 재시도 시점을 넓게 흩뜨려, 대기 중인 클라이언트가
+        같은 순간에 다시 몰려 거부 처리에 CPU 를 쓰지 않도록 함
+        """
+        admitted = self._previous_window[0] + self._current_window[0]
+        rejected = self._previous_window[1] + self._current_window[1]
+        pressure = rejected / max(1, admitted)
+        base = min(self.retry_max_seconds, self.retry_seconds * (1 + pressure))
+        return wait + base * random.uniform(0.5, 1.5)
+
+    def _reject(self, reason: str, wait: float = 0.0):
+        self.rejected[reason] += 1
+        self._record(admitted=False)
+        raise AdmissionRejected(reason, self.retry_hint(wait))
+
+    def admit(self) -> AdmissionTicket:
+        """새 소켓을 받아들일 수 있으면 슬롯을 잡은 티켓을 반환하고, 아니면 AdmissionRejected 를 발생시킵니다."""
+        if self.connections >= self.max_connections:
+            self._reject("connections")
+        if self.pending_auth >= self.max_pending_auth:
+            self._reject("pending_auth")
+        wait = self._connect_bucket.take(
+            [(CONNECT_BUCKET, self.connect_limit)], time.monotonic()
+        )
+        if wait > 0:
+            self._reject("connect_rate", wait)
+
+        self.connections += 1
+        self.pending_auth += 1
+        self.max_pending_seen = max(self.max_pending_seen, self.pending_auth)
+        self.admitted += 1
+        self._record(admitted=True)
+        return AdmissionTicket(self)
+
+    def headroom(self) -> dict:
+        """로드 밸런서가 트래픽을 조절할 수 있도록 남은 여유를 반환합니다."""
+        connect_tokens = self._connect_bucket.level(
+            CONNECT_BUCKET, self.connect_limit, time.monotonic()
+        )
+        connection_headroom = max(0, self.max_connections - self.connections)
+        pending_headroom = max(0, self.max_pending_auth - self.pending_auth)
+        return {
+            "accepting": connection_headroom > 0
+            and pending_headroom > 0
+            and connect_tokens >= 1,
+            "connections": self.connections,
+            "max_connections": self.max_connections,
+            "connection_headroom": connection_headroom,
+            "pending_auth": self.pending_auth,
+            "max_pending_auth": self.max_pending_auth,
+            "pending_auth_headroom": pending_headroom,
+            "connect_tokens": int(connect_tokens),
+            # 가장 부족한 자원 기준의 남은 비율 (0 ~ 1, 가중치 기반 분산용)
+            "headroom_ratio": round(
+                min(
+                    connection_headroom / max(1, self.max_connections),
+                    pending_headroom / max(1, self.max_pending_auth),
+                    connect_tokens / max(1, self.connect_limit.burst),
+                ),
+                4,
+            ),
+        }
+
+    def stats(self) -> dict:
+        return {
+            **self.headroom(),
+            "connects_per_second": self.connect_limit.rate,
+            "connect_burst": self.connect_limit.burst,
+            "max_pending_seen": self.max_pending_seen,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
+
+
+async def reject_websocket(websocket: WebSocket, rejection: AdmissionRejected):
+    """
+    소켓을 받아들인 뒤 바로 1013(Try Again Later)으로 닫습니다.
+    수락 전에 닫으면 클라이언트는 종료 코드 없이 HTTP 403 만 받으므로 재시도 시간을 전달할 수 없음
+    """
+    logger.debug(f"Rejecting WebSocket connection: {str(rejection)}")
+    try:
+        await websocket.accept()
+        await websocket.close(
+            code=status.WS_1013_TRY_AGAIN_LATER, reason=rejection.close_reason
+        )
+    except Exception as e:
+        logger.debug(f"Client left before rejection was sent: {str(e)}")
+
+
+# 전역 WebSocket 수락 제어 인스턴스
+ws_admission = AdmissionController()
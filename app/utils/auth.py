@@ -1,15 +1,20 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, UTC
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
 from app.database import get_db
-from app.models.user import User
 from app.schemas.user import TokenData
+from app.utils.metrics import LatencyStats
+from app.utils.user_cache import CachedUser, user_directory
 
 # 로거 설정
 logger = logging.getLogger(__name__)
@@ -19,7 +24,22 @@ SECRET_KEY = "your-secret-key-here"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 비밀번호 해시 설정: 비용(rounds)을 바꾸면 다음 로그인 때 기존 해시를 새 비용으로 재해시
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# 해시 실행기: "thread", "process" 또는 "auto" (비용이 높으면 프로세스 풀)
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "auto")
+PASSWORD_HASH_PROCESS_MIN_ROUNDS = int(
+    os.getenv("PASSWORD_HASH_PROCESS_MIN_ROUNDS", "14")
+)
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+# 동시 실행 한도를 넘어 대기할 수 있는 최대 요청 수 (초과 시 503)
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
@@ -31,6 +51,124 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    # 비용 설정이 바뀐 해시라면 새 해시도 함께 반환
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """bcrypt 연산을 이벤트 루프 밖의 전용 실행기에서 동시 실행 수를 제한해 처리합니다."""
+
+    def __init__(
+        self,
+        kind: str = PASSWORD_HASH_EXECUTOR,
+        workers: int = PASSWORD_HASH_WORKERS,
+        max_queue: int = PASSWORD_HASH_MAX_QUEUE,
+        rounds: int = BCRYPT_ROUNDS,
+    ):
+        if kind == "auto":
+            kind = "process" if rounds >= PASSWORD_HASH_PROCESS_MIN_ROUNDS else "thread"
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self._executor: Optional[Executor] = None
+        self._slots = asyncio.Semaphore(self.workers)
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        # 실행 슬롯을 기다린 시간과 실제 해시 계산 시간
+        self.queue_wait = LatencyStats()
+        self.duration = LatencyStats()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            logger.warning(
+                f"Password hasher overloaded ({self.queued} queued), rejecting request"
+            )
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        enqueued = time.monotonic()
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        started = time.monotonic()
+        self.queue_wait.record(started - enqueued)
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), fn, *args
+            )
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+            self.completed += 1
+            self.duration.record(time.monotonic() - started)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, password, hashed_password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        verified, new_hash = await self._run(
+            verify_and_update_password, password, hashed_password
+        )
+        if new_hash:
+            self.rehashed += 1
+        return verified, new_hash
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "bcrypt_rounds": self.rounds,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "queue_wait": self.queue_wait.snapshot(),
+            "duration": self.duration.snapshot(),
+        }
+
+
+# 전역 비밀번호 해시 실행기 인스턴스
+password_hasher = PasswordHasher()
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -42,9 +180,23 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+async def resolve_token_user(payload: dict, db: AsyncSession) -> Optional[CachedUser]:
+    """토큰의 사용자 ID(uid)로 캐시에서 사용자를 찾고, 없으면 사용자명으로 조회합니다."""
+    username = payload.get("sub")
+    user_id = payload.get("uid")
+    if user_id is not None:
+        user = await user_directory.get_by_id(db, user_id)
+        # 삭제 후 같은 ID 로 다른 사용자가 생긴 경우 등은 거부
+        if user is not None and user.username == username:
+            return user
+        return None
+    # uid 가 없는 이전 토큰
+    return await user_directory.get_by_username(db, username)
+
+
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> User:
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+) -> CachedUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -59,14 +211,14 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.username == token_data.username).first()
+    user = await resolve_token_user(payload, db)
     if user is None:
         raise credentials_exception
     return user
 
 
 # WebSocket 인증용 함수
-async def get_current_user_ws(token: str, db: Session) -> User:
+async def get_current_user_ws(token: str, db: AsyncSession) -> CachedUser:
     """WebSocket 연결을 위한 사용자 인증 함수"""
     logger.info(f"WebSocket authentication requested with token: {token[:10]}...")
     try:
@@ -78,7 +230,7 @@ async def get_current_user_ws(token: str, db: Session) -> User:
             logger.error("Token payload does not contain username (sub field)")
             raise ValueError("Invalid token")
 
-        user = db.query(User).filter(User.username == username).first()
+        user = await resolve_token_user(payload, db)
         if user is None:
             logger.error(f"User with username '{username}' not found in database")
             raise ValueError("User not found")
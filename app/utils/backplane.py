@@ -0,0 +1,236 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from dotenv import load_dotenv
+
+from app.utils.metrics import LatencyStats
+
+load_dotenv()
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 브로드캐스트 백플레인 설정 ("memory" 또는 "redis")
+BROADCAST_BACKPLANE = os.getenv("BROADCAST_BACKPLANE", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+BACKPLANE_CHANNEL_PREFIX = os.getenv("BACKPLANE_CHANNEL_PREFIX", "chat:room:")
+# 채팅방 구독과 관계없이 모든 워커가 받는 제어 메시지(캐시 무효화 등) 채널
+BACKPLANE_CONTROL_CHANNEL = os.getenv("BACKPLANE_CONTROL_CHANNEL", "chat:control")
+
+# (room_id, message, exclude_user_id) 를 받아 로컬 소켓으로 전달하는 콜백
+DeliverHandler = Callable[[int, dict, Optional[int]], Awaitable[None]]
+# 제어 메시지의 payload 를 받아 워커 내부 상태에 반영하는 콜백
+ControlHandler = Callable[[dict], Awaitable[None]]
+
+
+class Backplane:
+    """워커 간 채팅방 이벤트를 전달하는 백플레인의 공통 인터페이스"""
+
+    name = "base"
+
+    def __init__(self):
+        self.worker_id = uuid.uuid4().hex
+        self.latency = LatencyStats()
+        self.published = 0
+        self.delivered = 0
+        self._handler: Optional[DeliverHandler] = None
+        self._rooms: Set[int] = set()
+        self._control_handlers: Dict[str, ControlHandler] = {}
+        self.control_published = 0
+        self.control_delivered = 0
+
+    async def start(self, handler: DeliverHandler):
+        self._handler = handler
+
+    async def stop(self):
+        self._rooms.clear()
+
+    async def subscribe(self, room_id: int):
+        self._rooms.add(room_id)
+
+    async def unsubscribe(self, room_id: int):
+        self._rooms.discard(room_id)
+
+    async def publish(
+        self, room_id: int, message: dict, exclude_user_id: Optional[int] = None
+    ):
+        raise NotImplementedError
+
+    def on_control(self, kind: str, handler: ControlHandler):
+        """다른 워커가 보낸 kind 제어 메시지를 처리할 콜백을 등록합니다."""
+        self._control_handlers[kind] = handler
+
+    async def publish_control(self, kind: str, payload: dict):
+        """다른 모든 워커에 제어 메시지를 보냅니다. 보낸 워커 자신은 받지 않습니다."""
+        raise NotImplementedError
+
+    async def _deliver_control(self, envelope: dict):
+        if envelope.get("origin") == self.worker_id:
+            return
+        handler = self._control_handlers.get(envelope.get("kind"))
+        if handler is None:
+            return
+        self.control_delivered += 1
+        await handler(envelope["payload"])
+
+    def _envelope(
+        self, room_id: int, message: dict, exclude_user_id: Optional[int]
+    ) -> dict:
+        return {
+            "room_id": room_id,
+            "message": message,
+            "exclude_user_id": exclude_user_id,
+            "origin": self.worker_id,
+            "published_at": time.time(),
+        }
+
+    async def _deliver(self, envelope: dict):
+        room_id = envelope["room_id"]
+        if room_id not in self._rooms or self._handler is None:
+            return
+        self.latency.record(time.time() - envelope["published_at"])
+        self.delivered += 1
+        await self._handler(
+            room_id, envelope["message"], envelope.get("exclude_user_id")
+        )
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "worker_id": self.worker_id,
+            "subscribed_rooms": len(self._rooms),
+            "published": self.published,
+            "delivered": self.delivered,
+            "control_published": self.control_published,
+            "control_delivered": self.control_delivered,
+            "publish_to_deliver": self.latency.snapshot(),
+        }
+
+
+class InMemoryBackplane(Backplane):
+    """단일 프로세스(테스트, 로컬 실행)용 백플레인"""
+
+    name = "memory"
+
+    async def publish(
+        self, room_id: int, message: dict, exclude_user_id: Optional[int] = None
+    ):
+        self.published += 1
+        await self._deliver(self._envelope(room_id, message, exclude_user_id))
+
+    async def publish_control(self, kind: str, payload: dict):
+        # 같은 프로세스에는 다른 워커가 없음
+        self.control_published += 1
+
+
+class RedisBackplane(Backplane):
+    """Redis Pub/Sub 으로 모든 워커에 채팅방 이벤트를 전달하는 백플레인"""
+
+    name = "redis"
+
+    def __init__(
+        self,
+        redis_url: str = REDIS_URL,
+        prefix: str = BACKPLANE_CHANNEL_PREFIX,
+        control_channel: str = BACKPLANE_CONTROL_CHANNEL,
+    ):
+        super().__init__()
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self.control_channel = control_channel
+        self._redis = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def _channel(self, room_id: int) -> str:
+        return f"{self.prefix}{room_id}"
+
+    async def start(self, handler: DeliverHandler):
+        import redis.asyncio as aioredis
+
+        await super().start(handler)
+        self._redis = aioredis.from_url(self.redis_url)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.control_channel)
+        self._listener = asyncio.create_task(self._listen())
+        logger.info(f"Redis backplane started (worker {self.worker_id})")
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._pubsub:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        if self._redis:
+            await self._redis.aclose()
+            self._redis = None
+        await super().stop()
+        logger.info(f"Redis backplane stopped (worker {self.worker_id})")
+
+    async def subscribe(self, room_id: int):
+        if room_id in self._rooms:
+            return
+        await super().subscribe(room_id)
+        await self._pubsub.subscribe(self._channel(room_id))
+        logger.info(f"Backplane subscribed to room {room_id}")
+
+    async def unsubscribe(self, room_id: int):
+        if room_id not in self._rooms:
+            return
+        await super().unsubscribe(room_id)
+        await self._pubsub.unsubscribe(self._channel(room_id))
+        logger.info(f"Backplane unsubscribed from room {room_id}")
+
+    async def publish(
+        self, room_id: int, message: dict, exclude_user_id: Optional[int] = None
+    ):
+        envelope = self._envelope(room_id, message, exclude_user_id)
+        await self._redis.publish(self._channel(room_id), json.dumps(envelope))
+        self.published += 1
+
+    async def publish_control(self, kind: str, payload: dict):
+        envelope = {"kind": kind, "payload": payload, "origin": self.worker_id}
+        await self._redis.publish(self.control_channel, json.dumps(envelope))
+        self.control_published += 1
+
+    async def _listen(self):
+        while True:
+            try:
+                # 구독 중인 채널이 없으면 pubsub 연결에서 읽을 것이 없음
+                if not self._pubsub.subscribed:
+                    await asyncio.sleep(0.05)
+                    continue
+                raw = await self._pubsub.get_message(timeout=1.0)
+                if raw is None or raw.get("type") != "message":
+                    continue
+                channel = raw["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                if channel == self.control_channel:
+                    await self._deliver_control(json.loads(raw["data"]))
+                    continue
+                await self._deliver(json.loads(raw["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 리스너가 죽으면 이 워커의 모든 방이 멈추므로 계속 진행
+                logger.error(f"Backplane listener error: {str(e)}")
+                await asyncio.sleep(0.5)
+
+
+def create_backplane(kind: str = BROADCAST_BACKPLANE) -> Backplane:
+    if kind == "redis":
+        return RedisBackplane()
+    if kind != "memory":
+        logger.warning(f"Unknown backplane '{kind}', falling back to in-memory")
+    return InMemoryBackplane()
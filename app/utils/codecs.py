@@ -0,0 +1,109 @@
+from fastapi import WebSocket, WebSocketDisconnect
+from pydantic import BaseModel
+from typing import Dict, List, Optional, Tuple, Union
+import json
+import logging
+
+from app.schemas.websocket import WebSocketIncomingMessage, WebSocketMessage
+
+try:
+    import msgpack
+except ImportError:  # msgpack 미설치 환경에서는 JSON 만 지원
+    msgpack = None
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+Frame = Union[str, bytes]
+
+
+class Codec:
+    """WebSocket 프레임 인코딩/디코딩 방식"""
+
+    name = "base"
+    subprotocol: Optional[str] = None
+    binary = False
+
+    def encode(self, payload: dict) -> Frame:
+        raise NotImplementedError
+
+    def decode(self, data: Frame) -> dict:
+        raise NotImplementedError
+
+    def encode_message(self, message: Union[dict, WebSocketMessage]) -> Frame:
+        return self.encode(to_payload(message))
+
+    def decode_incoming(self, data: Frame) -> WebSocketIncomingMessage:
+        return WebSocketIncomingMessage(**self.decode(data))
+
+
+class JsonCodec(Codec):
+    """브라우저용 JSON 텍스트 프레임"""
+
+    name = "json"
+    subprotocol = "chat.json"
+    binary = False
+
+    def encode(self, payload: dict) -> Frame:
+        return json.dumps(payload)
+
+    def decode(self, data: Frame) -> dict:
+        payload = json.loads(data)
+        if not isinstance(payload, dict):
+            raise ValueError("WebSocket payload must be an object")
+        return payload
+
+
+class MsgPackCodec(Codec):
+    """모바일 클라이언트용 MessagePack 바이너리 프레임"""
+
+    name = "msgpack"
+    subprotocol = "chat.msgpack"
+    binary = True
+
+    def encode(self, payload: dict) -> Frame:
+        return msgpack.packb(payload, use_bin_type=True)
+
+    def decode(self, data: Frame) -> dict:
+        if isinstance(data, str):
+            data = data.encode()
+        payload = msgpack.unpackb(data, raw=False)
+        if not isinstance(payload, dict):
+            raise ValueError("WebSocket payload must be a map")
+        return payload
+
+
+JSON_CODEC = JsonCodec()
+CODECS: Dict[str, Codec] = {JSON_CODEC.subprotocol: JSON_CODEC}
+if msgpack is not None:
+    _msgpack_codec = MsgPackCodec()
+    CODECS[_msgpack_codec.subprotocol] = _msgpack_codec
+
+
+def to_payload(message: Union[dict, BaseModel]) -> dict:
+    if isinstance(message, BaseModel):
+        return message.model_dump(exclude_none=True)
+    return message
+
+
+def negotiate_codec(websocket: WebSocket) -> Tuple[Codec, Optional[str]]:
+    """클라이언트가 요청한 서브프로토콜 중 첫 번째로 지원하는 코덱을 선택합니다."""
+    requested: List[str] = websocket.scope.get("subprotocols") or []
+    for subprotocol in requested:
+        codec = CODECS.get(subprotocol)
+        if codec is not None:
+            return codec, subprotocol
+    if requested:
+        logger.warning(f"No supported WebSocket subprotocol in {requested}, using JSON")
+    # 서브프로토콜을 지정하지 않은 브라우저 클라이언트는 JSON
+    return JSON_CODEC, None
+
+
+async def receive_frame(websocket: WebSocket) -> Frame:
+    """텍스트/바이너리 프레임을 모두 받아 그대로 반환합니다."""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    if message.get("text") is not None:
+        return message["text"]
+    return message.get("bytes") or b""
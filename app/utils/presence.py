@@ -0,0 +1,353 @@
+import logging
+import os
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 접속 상태 저장소 설정 ("memory": 워커 프로세스 내부, "redis": 모든 워커가 공유)
+PRESENCE_BACKEND = os.getenv("PRESENCE_BACKEND", "memory")
+# 하트비트가 끊긴 연결이 접속 중으로 남아 있는 최대 시간(초)
+PRESENCE_TTL_SECONDS = float(os.getenv("PRESENCE_TTL_SECONDS", "30"))
+# 워커가 자신의 연결을 갱신하는 주기(초)
+PRESENCE_HEARTBEAT_SECONDS = float(os.getenv("PRESENCE_HEARTBEAT_SECONDS", "10"))
+# 짧은 시간 안의 입장/퇴장을 하나의 변경 이벤트로 묶는 시간(ms)
+PRESENCE_DEBOUNCE_MS = float(os.getenv("PRESENCE_DEBOUNCE_MS", "250"))
+PRESENCE_REDIS_PREFIX = os.getenv("PRESENCE_REDIS_PREFIX", "chat:presence:")
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+# 사용하지 않는 채팅방의 버전 키 만료 시간 (만료 후 버전이 줄어들면 클라이언트가 다시 동기화)
+PRESENCE_VERSION_TTL_SECONDS = 24 * 60 * 60
+
+
+@dataclass(frozen=True)
+class PresenceEntry:
+    """WebSocket 연결 하나의 접속 정보"""
+
+    connection_id: str
+    room_id: int
+    user_id: int
+    username: str
+
+    @property
+    def room_member(self) -> str:
+        # 채팅방 집합의 항목: 연결 ID|사용자 ID|사용자명
+        return f"{self.connection_id}|{self.user_id}|{self.username}"
+
+    @property
+    def user_member(self) -> str:
+        # 사용자 집합의 항목: 연결 ID|채팅방 ID
+        return f"{self.connection_id}|{self.room_id}"
+
+
+class PresenceStore:
+    """사용자 → 채팅방 → 연결 수를 만료 시각과 함께 보관하는 저장소의 공통 인터페이스"""
+
+    name = "base"
+
+    def __init__(self, ttl_seconds: float = PRESENCE_TTL_SECONDS):
+        self.ttl = ttl_seconds
+        self.joins = 0
+        self.leaves = 0
+        self.heartbeats = 0
+        self.queries = 0
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def join(self, entry: PresenceEntry):
+        self.joins += 1
+        await self._touch([entry], time.time() + self.ttl)
+
+    async def heartbeat(self, entries: List[PresenceEntry]):
+        """살아 있는 연결의 만료 시각을 한 번에 연장합니다."""
+        if not entries:
+            return
+        self.heartbeats += 1
+        await self._touch(entries, time.time() + self.ttl)
+
+    async def leave(self, entry: PresenceEntry):
+        self.leaves += 1
+        await self._remove([entry])
+
+    async def online_in_rooms(self, room_ids: Iterable[int]) -> Dict[int, List[str]]:
+        """채팅방별 접속 중인 사용자명 목록을 한 번에 조회합니다."""
+        room_ids = list(dict.fromkeys(room_ids))
+        self.queries += 1
+        members = await self._room_members(room_ids, time.time())
+        result = {}
+        for room_id in room_ids:
+            usernames = {member.split("|", 2)[2] for member in members.get(room_id, [])}
+            result[room_id] = sorted(usernames)
+        return result
+
+    async def online_users(self, user_ids: Iterable[int]) -> Dict[int, Dict[int, int]]:
+        """사용자별 접속 중인 채팅방과 채팅방별 연결 수를 한 번에 조회합니다."""
+        user_ids = list(dict.fromkeys(user_ids))
+        self.queries += 1
+        members = await self._user_members(user_ids, time.time())
+        result = {}
+        for user_id in user_ids:
+            rooms: Dict[int, int] = defaultdict(int)
+            for member in members.get(user_id, []):
+                rooms[int(member.split("|", 1)[1])] += 1
+            result[user_id] = dict(rooms)
+        return result
+
+    async def version(self, room_id: int) -> int:
+        """채팅방 접속자 목록의 현재 버전"""
+        raise NotImplementedError
+
+    async def bump_version(self, room_id: int) -> int:
+        """접속자 변경 이벤트를 보내기 전에 버전을 올리고 새 버전을 반환합니다."""
+        raise NotImplementedError
+
+    async def _touch(self, entries: List[PresenceEntry], expires_at: float):
+        raise NotImplementedError
+
+    async def _remove(self, entries: List[PresenceEntry]):
+        raise NotImplementedError
+
+    async def _room_members(
+        self, room_ids: List[int], now: float
+    ) -> Dict[int, List[str]]:
+        raise NotImplementedError
+
+    async def _user_members(
+        self, user_ids: List[int], now: float
+    ) -> Dict[int, List[str]]:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "ttl_seconds": self.ttl,
+            "joins": self.joins,
+            "leaves": self.leaves,
+            "heartbeats": self.heartbeats,
+            "queries": self.queries,
+        }
+
+
+class InMemoryPresenceStore(PresenceStore):
+    """단일 프로세스(테스트, 로컬 실행)용 접속 상태 저장소"""
+
+    name = "memory"
+
+    def __init__(self, ttl_seconds: float = PRESENCE_TTL_SECONDS):
+        super().__init__(ttl_seconds)
+        # room_id -> {항목: 만료 시각}, user_id -> {항목: 만료 시각}
+        self._rooms: Dict[int, Dict[str, float]] = {}
+        self._users: Dict[int, Dict[str, float]] = {}
+        self._versions: Dict[int, int] = {}
+
+    async def version(self, room_id: int) -> int:
+        return self._versions.get(room_id, 0)
+
+    async def bump_version(self, room_id: int) -> int:
+        self._versions[room_id] = self._versions.get(room_id, 0) + 1
+        return self._versions[room_id]
+
+    async def _touch(self, entries: List[PresenceEntry], expires_at: float):
+        for entry in entries:
+            self._rooms.setdefault(entry.room_id, {})[entry.room_member] = expires_at
+            self._users.setdefault(entry.user_id, {})[entry.user_member] = expires_at
+
+    async def _remove(self, entries: List[PresenceEntry]):
+        for entry in entries:
+            self._discard(self._rooms, entry.room_id, entry.room_member)
+            self._discard(self._users, entry.user_id, entry.user_member)
+
+    @staticmethod
+    def _discard(index: Dict[int, Dict[str, float]], key: int, member: str):
+        members = index.get(key)
+        if members is not None:
+            members.pop(member, None)
+            if not members:
+                del index[key]
+
+    @staticmethod
+    def _alive(
+        index: Dict[int, Dict[str, float]], keys: List[int], now: float
+    ) -> Dict[int, List[str]]:
+        result = {}
+        for key in keys:
+            members = index.get(key)
+            if not members:
+                continue
+            # 만료된 연결은 조회할 때 정리
+            for member in [m for m, expires in members.items() if expires <= now]:
+                del members[member]
+            if members:
+                result[key] = list(members)
+            else:
+                del index[key]
+        return result
+
+    async def _room_members(self, room_ids, now):
+        return self._alive(self._rooms, room_ids, now)
+
+    async def _user_members(self, user_ids, now):
+        return self._alive(self._users, user_ids, now)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "rooms": len(self._rooms), "users": len(self._users)}
+
+
+# 연결마다 (채팅방 키, 사용자 키) 쌍의 점수(만료 시각)를 갱신하고 키 만료 시간을 연장
+# KEYS: 채팅방 키1, 사용자 키1, ... / ARGV: 만료 시각, 키 TTL, 채팅방 항목1, 사용자 항목1, ...
+TOUCH_SCRIPT = """
+for i = 1, #KEYS, 2 do
+    redis.call('ZADD', KEYS[i], ARGV[1], ARGV[i + 2])
+    redis.call('ZADD', KEYS[i + 1], ARGV[1], ARGV[i + 3])
+    redis.call('EXPIRE', KEYS[i], ARGV[2])
+    redis.call('EXPIRE', KEYS[i + 1], ARGV[2])
+end
+return 1
+"""
+
+# KEYS: 채팅방 키1, 사용자 키1, ... / ARGV: 채팅방 항목1, 사용자 항목1, ...
+REMOVE_SCRIPT = """
+for i = 1, #KEYS do
+    redis.call('ZREM', KEYS[i], ARGV[i])
+end
+return 1
+"""
+
+# 키마다 만료된 항목을 정리하고 남은 항목을 반환
+# KEYS: 조회할 키들 / ARGV: 현재 시각
+MEMBERS_SCRIPT = """
+local result = {}
+for i = 1, #KEYS do
+    redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', ARGV[1])
+    result[i] = redis.call('ZRANGE', KEYS[i], 0, -1)
+end
+return result
+"""
+
+
+class RedisPresenceStore(PresenceStore):
+    """모든 워커가 공유하는 Redis 정렬 집합(score = 만료 시각) 저장소"""
+
+    name = "redis"
+
+    def __init__(
+        self,
+        ttl_seconds: float = PRESENCE_TTL_SECONDS,
+        redis_url: str = REDIS_URL,
+        prefix: str = PRESENCE_REDIS_PREFIX,
+    ):
+        super().__init__(ttl_seconds)
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self._redis = None
+        self._touch_script = None
+        self._remove_script = None
+        self._members_script = None
+        self.errors = 0
+
+    def _room_key(self, room_id: int) -> str:
+        return f"{self.prefix}room:{room_id}"
+
+    def _user_key(self, user_id: int) -> str:
+        return f"{self.prefix}user:{user_id}"
+
+    async def start(self):
+        import redis.asyncio as aioredis
+
+        self._redis = aioredis.from_url(self.redis_url)
+        self._touch_script = self._redis.register_script(TOUCH_SCRIPT)
+        self._remove_script = self._redis.register_script(REMOVE_SCRIPT)
+        self._members_script = self._redis.register_script(MEMBERS_SCRIPT)
+        logger.info("Redis presence store started")
+
+    async def stop(self):
+        if self._redis:
+            await self._redis.aclose()
+            self._redis = None
+
+    def _version_key(self, room_id: int) -> str:
+        return f"{self.prefix}room:{room_id}:version"
+
+    async def version(self, room_id: int) -> int:
+        try:
+            value = await self._redis.get(self._version_key(room_id))
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Presence version read failed: {str(e)}")
+            return 0
+        return int(value) if value else 0
+
+    async def bump_version(self, room_id: int) -> int:
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.incr(self._version_key(room_id))
+                pipe.expire(self._version_key(room_id), PRESENCE_VERSION_TTL_SECONDS)
+                version, _ = await pipe.execute()
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Presence version update failed: {str(e)}")
+            return 0
+        return int(version)
+
+    async def _touch(self, entries: List[PresenceEntry], expires_at: float):
+        keys, args = [], [expires_at, int(self.ttl * 2) + 1]
+        for entry in entries:
+            keys.extend([self._room_key(entry.room_id), self._user_key(entry.user_id)])
+            args.extend([entry.room_member, entry.user_member])
+        try:
+            await self._touch_script(keys=keys, args=args)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Presence update failed: {str(e)}")
+
+    async def _remove(self, entries: List[PresenceEntry]):
+        keys, args = [], []
+        for entry in entries:
+            keys.extend([self._room_key(entry.room_id), self._user_key(entry.user_id)])
+            args.extend([entry.room_member, entry.user_member])
+        try:
+            await self._remove_script(keys=keys, args=args)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Presence removal failed: {str(e)}")
+
+    async def _members(self, keys: List[str], now: float) -> List[List[str]]:
+        if not keys:
+            return []
+        try:
+            raw = await self._members_script(keys=keys, args=[now])
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Presence query failed: {str(e)}")
+            return [[] for _ in keys]
+        return [[member.decode() for member in members] for members in raw]
+
+    async def _room_members(self, room_ids, now):
+        members = await self._members([self._room_key(i) for i in room_ids], now)
+        return dict(zip(room_ids, members))
+
+    async def _user_members(self, user_ids, now):
+        members = await self._members([self._user_key(i) for i in user_ids], now)
+        return dict(zip(user_ids, members))
+
+    def stats(self) -> dict:
+        return {**super().stats(), "errors": self.errors}
+
+
+def create_presence_store(kind: str = PRESENCE_BACKEND) -> PresenceStore:
+    if kind == "redis":
+        return RedisPresenceStore()
+    if kind != "memory":
+        logger.warning(f"Unknown presence backend '{kind}', falling back to in-memory")
+    return InMemoryPresenceStore()
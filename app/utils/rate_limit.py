@@ -0,0 +1,223 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 토큰 버킷 저장소 설정 ("memory": 워커 프로세스 내부, "redis": 모든 워커가 공유)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_REDIS_PREFIX = os.getenv("RATE_LIMIT_REDIS_PREFIX", "chat:ratelimit:")
+# 워커 내부 저장소가 보관할 최대 버킷 수 (넘으면 오래 안 쓴 버킷부터 제거)
+RATE_LIMIT_MEMORY_MAX_KEYS = int(os.getenv("RATE_LIMIT_MEMORY_MAX_KEYS", "100000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+
+@dataclass(frozen=True)
+class BucketLimit:
+    """토큰 버킷 설정: 초당 충전되는 토큰 수와 최대 토큰 수(연속으로 허용하는 요청 수)"""
+
+    rate: float
+    burst: int
+
+    def retry_after(self, tokens: float) -> float:
+        # 토큰 하나가 찰 때까지 남은 시간(초)
+        return (1 - tokens) / self.rate
+
+
+Bucket = Tuple[str, BucketLimit]
+
+
+class RateLimiter:
+    """여러 토큰 버킷을 한 번에 확인하고 차감하는 저장소의 공통 인터페이스"""
+
+    name = "base"
+
+    def __init__(self):
+        self.allowed = 0
+        self.rejected = 0
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def acquire(self, buckets: Sequence[Bucket]) -> float:
+        """
+        모든 버킷에 토큰이 있으면 하나씩 차감하고 0 을 반환합니다.
+        하나라도 비어 있으면 아무것도 차감하지 않고 다시 시도할 수 있을 때까지의 시간(초)을 반환합니다.
+        """
+        if not buckets:
+            return 0.0
+        retry_after = await self._acquire(buckets)
+        if retry_after > 0:
+            self.rejected += 1
+        else:
+            self.allowed += 1
+        return retry_after
+
+    async def _acquire(self, buckets: Sequence[Bucket]) -> float:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+        }
+
+
+class InMemoryRateLimiter(RateLimiter):
+    """단일 프로세스(테스트, 로컬 실행)용 토큰 버킷 저장소. Redis 장애 시 대체 저장소로도 사용"""
+
+    name = "memory"
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MEMORY_MAX_KEYS):
+        super().__init__()
+        self.max_keys = max_keys
+        # 버킷 키 -> (남은 토큰, 마지막 갱신 시각)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.evictions = 0
+
+    async def _acquire(self, buckets: Sequence[Bucket]) -> float:
+        return self.take(buckets, time.monotonic())
+
+    def level(self, key: str, limit: BucketLimit, now: float) -> float:
+        """차감하지 않고 버킷에 현재 남은 토큰 수를 반환합니다."""
+        tokens, updated_at = self._buckets.get(key, (limit.burst, now))
+        return min(limit.burst, tokens + (now - updated_at) * limit.rate)
+
+    def take(self, buckets: Sequence[Bucket], now: float) -> float:
+        levels: List[float] = []
+        retry_after = 0.0
+        for key, limit in buckets:
+            tokens = self.level(key, limit, now)
+            levels.append(tokens)
+            if tokens < 1:
+                retry_after = max(retry_after, limit.retry_after(tokens))
+        if retry_after > 0:
+            return retry_after
+
+        for (key, _), tokens in zip(buckets, levels):
+            self._buckets[key] = (tokens - 1, now)
+            self._buckets.move_to_end(key)
+        # 제거된 버킷은 다음 요청 때 가득 찬 상태로 다시 시작
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+        return 0.0
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "buckets": len(self._buckets),
+            "max_keys": self.max_keys,
+            "evictions": self.evictions,
+        }
+
+
+# 모든 버킷을 Redis 서버 시각 기준으로 충전한 뒤, 모두 토큰이 있을 때만 하나씩 차감
+# 토큰이 부족하면 차감하지 않고 가장 오래 기다려야 하는 버킷의 대기 시간(초)을 문자열로 반환
+# KEYS: 버킷 키들 / ARGV: 버킷마다 (초당 충전량, 최대 토큰 수)
+ACQUIRE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local levels = {}
+local wait = 0
+for i = 1, #KEYS do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local burst = tonumber(ARGV[i * 2])
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local tokens = tonumber(state[1])
+    if tokens == nil then
+        tokens = burst
+    else
+        tokens = math.min(burst, tokens + math.max(0, now - tonumber(state[2])) * rate)
+    end
+    levels[i] = tokens
+    if tokens < 1 then
+        wait = math.max(wait, (1 - tokens) / rate)
+    end
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i = 1, #KEYS do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local burst = tonumber(ARGV[i * 2])
+    redis.call('HSET', KEYS[i], 'tokens', tostring(levels[i] - 1), 'ts', tostring(now))
+    redis.call('PEXPIRE', KEYS[i], math.ceil(burst / rate * 1000) + 1000)
+end
+return '0'
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """모든 워커가 공유하는 Redis 해시 토큰 버킷. 가득 찰 시간이 지나면 키가 만료됨"""
+
+    name = "redis"
+
+    def __init__(
+        self, redis_url: str = REDIS_URL, prefix: str = RATE_LIMIT_REDIS_PREFIX
+    ):
+        super().__init__()
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self._redis = None
+        self._acquire_script = None
+        # Redis 에 접근할 수 없는 동안은 워커 단위 버킷으로 제한
+        self.fallback = InMemoryRateLimiter()
+        self.errors = 0
+
+    async def start(self):
+        import redis.asyncio as aioredis
+
+        self._redis = aioredis.from_url(self.redis_url)
+        self._acquire_script = self._redis.register_script(ACQUIRE_SCRIPT)
+        logger.info("Redis rate limiter started")
+
+    async def stop(self):
+        if self._redis:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def _acquire(self, buckets: Sequence[Bucket]) -> float:
+        keys, args = [], []
+        for key, limit in buckets:
+            keys.append(f"{self.prefix}{key}")
+            args.extend([limit.rate, limit.burst])
+        try:
+            return float(await self._acquire_script(keys=keys, args=args))
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Rate limit check failed, using in-process buckets: {str(e)}")
+            return await self.fallback._acquire(buckets)
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "errors": self.errors,
+            "fallback": self.fallback.stats(),
+        }
+
+
+def create_rate_limiter(kind: str = RATE_LIMIT_BACKEND) -> RateLimiter:
+    if kind == "redis":
+        return RedisRateLimiter()
+    if kind != "memory":
+        logger.warning(
+            f"Unknown rate limit backend '{kind}', falling back to in-memory"
+        )
+    return InMemoryRateLimiter()
+
+
+# 전역 토큰 버킷 저장소 인스턴스
+rate_limiter = create_rate_limiter()
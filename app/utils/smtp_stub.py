@@ -0,0 +1,100 @@
+"""
+로컬 개발용 SMTP 대체 서버
+
+받은 메일은 저장하지 않고 개수만 셉니다. 실제 메일 서버처럼 응답 지연과
+일시적 실패(451)를 흉내 낼 수 있습니다.
+
+실행: python -m app.utils.smtp_stub --port 1025 --latency 0.5 --failure-rate 0.1
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+
+class SMTPStub:
+    """메일 한 통마다 latency 초 후 응답하고 failure_rate 확률로 451 을 반환하는 SMTP 서버"""
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.delivered = 0
+        self.rejected = 0
+        self._server = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 1025):
+        self._server = await asyncio.start_server(self._handle, host, port)
+        logger.info(f"SMTP stub listening on {host}:{port}")
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+
+        reply("220 smtp-stub ready")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                verb = line.decode(errors="replace").strip().split(" ", 1)[0].upper()
+                if verb in ("EHLO", "HELO"):
+                    reply("250 smtp-stub")
+                elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                    reply("250 OK")
+                elif verb == "DATA":
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    while True:
+                        data = await reader.readline()
+                        # 본문을 보내는 중에 연결이 끊기면 세션 종료
+                        if not data or data.rstrip(b"\r\n") == b".":
+                            break
+                    if not data:
+                        break
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    if random.random() < self.failure_rate:
+                        self.rejected += 1
+                        reply("451 Temporary failure")
+                    else:
+                        self.delivered += 1
+                        reply("250 Queued")
+                elif verb == "QUIT":
+                    reply("221 Bye")
+                    break
+                else:
+                    reply("502 Command not implemented")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    stub = SMTPStub(args.latency, args.failure_rate)
+    await stub.start(args.host, args.port)
+    while True:
+        await asyncio.sleep(60)
+        logger.info(f"delivered={stub.delivered} rejected={stub.rejected}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
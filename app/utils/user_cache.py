@@ -0,0 +1,191 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User
+
+load_dotenv()
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 사용자 캐시 설정 (워커 프로세스 단위)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+
+# 사용자명 IN 쿼리 한 번에 넣을 최대 사용자명 수
+USERNAME_LOOKUP_CHUNK = 1000
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """세션에 묶이지 않는 사용자 정보 (비밀번호 해시는 캐시하지 않음)"""
+
+    id: int
+    username: str
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, user: User) -> "CachedUser":
+        return cls(
+            id=user.id,
+            username=user.username,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+
+class UserDirectory:
+    """사용자 ID ↔ 사용자명 ↔ 사용자 정보를 매핑하는 LRU + TTL 캐시"""
+
+    def __init__(
+        self,
+        max_size: int = USER_CACHE_SIZE,
+        ttl_seconds: float = USER_CACHE_TTL_SECONDS,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        # user_id -> (만료 시각, 사용자)
+        self._by_id: "OrderedDict[int, Tuple[float, CachedUser]]" = OrderedDict()
+        self._id_by_username: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _lookup(self, user_id: int) -> Optional[CachedUser]:
+        entry = self._by_id.get(user_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            self._remove(user_id)
+            return None
+        self._by_id.move_to_end(user_id)
+        return user
+
+    def _remove(self, user_id: int):
+        entry = self._by_id.pop(user_id, None)
+        if entry is not None:
+            self._id_by_username.pop(entry[1].username, None)
+
+    def put(self, user: CachedUser) -> CachedUser:
+        self._remove(user.id)
+        self._by_id[user.id] = (time.monotonic() + self.ttl, user)
+        self._id_by_username[user.username] = user.id
+        while len(self._by_id) > self.max_size:
+            _, (_, evicted) = self._by_id.popitem(last=False)
+            self._id_by_username.pop(evicted.username, None)
+            self.evictions += 1
+        return user
+
+    def invalidate(self, user_id: Optional[int] = None, username: Optional[str] = None):
+        """사용자 정보가 바뀌었을 때 캐시에서 제거합니다."""
+        if user_id is None and username is not None:
+            user_id = self._id_by_username.get(username)
+        if user_id is not None and user_id in self._by_id:
+            self._remove(user_id)
+            self.invalidations += 1
+
+    def clear(self):
+        self._by_id.clear()
+        self._id_by_username.clear()
+
+    async def get_by_id(self, db: AsyncSession, user_id: int) -> Optional[CachedUser]:
+        user = self._lookup(user_id)
+        if user is not None:
+            self.hits += 1
+            return user
+        self.misses += 1
+        row = await db.get(User, user_id)
+        return self.put(CachedUser.from_row(row)) if row else None
+
+    async def get_by_username(
+        self, db: AsyncSession, username: str
+    ) -> Optional[CachedUser]:
+        user_id = self._id_by_username.get(username)
+        user = self._lookup(user_id) if user_id is not None else None
+        if user is not None:
+            self.hits += 1
+            return user
+        self.misses += 1
+        row = await db.scalar(select(User).where(User.username == username).limit(1))
+        return self.put(CachedUser.from_row(row)) if row else None
+
+    async def get_many(
+        self, db: AsyncSession, user_ids: Iterable[int]
+    ) -> Dict[int, CachedUser]:
+        """여러 사용자를 조회합니다. 캐시에 없는 사용자만 한 번의 IN 쿼리로 가져옵니다."""
+        found: Dict[int, CachedUser] = {}
+        missing = set()
+        for user_id in set(user_ids):
+            user = self._lookup(user_id)
+            if user is not None:
+                found[user_id] = user
+            else:
+                missing.add(user_id)
+        self.hits += len(found)
+        self.misses += len(missing)
+        if missing:
+            rows = (await db.scalars(select(User).where(User.id.in_(missing)))).all()
+            for row in rows:
+                found[row.id] = self.put(CachedUser.from_row(row))
+        return found
+
+    async def get_many_by_username(
+        self, db: AsyncSession, usernames: Iterable[str]
+    ) -> Dict[str, CachedUser]:
+        """여러 사용자를 사용자명으로 조회합니다. 캐시에 없는 사용자만 IN 쿼리로 가져옵니다."""
+        found: Dict[str, CachedUser] = {}
+        missing = []
+        for username in set(usernames):
+            user_id = self._id_by_username.get(username)
+            user = self._lookup(user_id) if user_id is not None else None
+            if user is not None:
+                found[username] = user
+            else:
+                missing.append(username)
+        self.hits += len(found)
+        self.misses += len(missing)
+        # 바인드 파라미터 수 제한을 넘지 않도록 나눠서 조회
+        for start in range(0, len(missing), USERNAME_LOOKUP_CHUNK):
+            chunk = missing[start : start + USERNAME_LOOKUP_CHUNK]
+            rows = (
+                await db.scalars(select(User).where(User.username.in_(chunk)))
+            ).all()
+            for row in rows:
+                found[row.username] = self.put(CachedUser.from_row(row))
+        return found
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._by_id),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# 전역 사용자 캐시 인스턴스
+user_directory = UserDirectory()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target):
+    # 이 프로세스에서 사용자 행이 바뀌면 즉시 제거 (다른 워커는 TTL 로 만료)
+    user_directory.invalidate(user_id=target.id)
@@ -1,114 +1,649 @@
-from fastapi import WebSocket
-from typing import Dict, List, Set
-import json
+from fastapi import WebSocket, status
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from collections import deque
+from dataclasses import dataclass, field
+import asyncio
+import itertools
 import logging
+import os
+import time
+
+from app.utils.backplane import Backplane, create_backplane
+from app.utils.codecs import JSON_CODEC, Codec, Frame, to_payload
+from app.utils.metrics import LatencyStats
+from app.utils.presence import (
+    PRESENCE_DEBOUNCE_MS,
+    PRESENCE_HEARTBEAT_SECONDS,
+    PresenceEntry,
+    PresenceStore,
+    create_presence_store,
+)
 
 # 로거 설정
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# 연결별 송신 큐 설정
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+# 큐가 가득 찼을 때의 처리 방식: drop_oldest, coalesce, disconnect
+WS_QUEUE_OVERFLOW_POLICY = os.getenv("WS_QUEUE_OVERFLOW_POLICY", "drop_oldest")
+QUEUE_OVERFLOW_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+# 큐가 이 비율 이상 차 있으면 타이핑/읽음 같은 일시적 이벤트는 넣지 않고 버림
+WS_EPHEMERAL_SHED_RATIO = float(os.getenv("WS_EPHEMERAL_SHED_RATIO", "0.5"))
+# 사용자 단위 소켓 하나가 구독할 수 있는 최대 채팅방 수
+WS_MAX_SUBSCRIPTIONS = int(os.getenv("WS_MAX_SUBSCRIPTIONS", "100"))
+
+
+@dataclass
+class OutboundFrame:
+    data: Frame
+    enqueued_at: float
+    # 같은 키를 가진 프레임은 최신 것 하나만 의미가 있음 (예: users_list)
+    coalesce_key: Optional[str] = None
+    # 채팅 메시지 프레임의 메시지 ID (재연결 시 재전송분과 중복 제거용)
+    message_id: Optional[int] = None
+    # 잃어도 되는 일시적 이벤트 (큐가 밀리면 가장 먼저 버림)
+    ephemeral: bool = False
+
+
+@dataclass
+class PendingPresence:
+    """디바운스 시간 동안 모인 채팅방의 입장/퇴장 사용자명"""
+
+    joined: Set[str] = field(default_factory=set)
+    left: Set[str] = field(default_factory=set)
+
+
+class RoomStats:
+    """채팅방 단위 팬아웃 지표"""
 
-class ConnectionManager:
     def __init__(self):
-        # {room_id: {user_id: websocket}}
-        self.active_connections: Dict[int, Dict[int, WebSocket]] = {}
-        # {room_id: {username}}
-        self.active_users: Dict[int, Set[str]] = {}
-        logger.info("ConnectionManager initialized")
+        # broadcast 한 번을 모든 로컬 큐에 넣는 데 걸린 시간
+        self.fanout = LatencyStats()
+        # 큐에 들어간 뒤 실제로 소켓에 쓰일 때까지 걸린 시간
+        self.delivery = LatencyStats()
+        self.dropped = 0
+        self.disconnected = 0
+        # 큐가 밀려서 넣지 않은 일시적 이벤트 수
+        self.shed = 0
+        # 재연결 시 놓친 메시지 재전송 건수, 재전송 대신 REST 재동기화를 요청한 횟수
+        self.replayed = 0
+        self.resyncs = 0
 
-    async def connect(
-        self, websocket: WebSocket, room_id: int, user_id: int, username: str
+    def snapshot(self) -> dict:
+        return {
+            "fanout": self.fanout.snapshot(),
+            "delivery": self.delivery.snapshot(),
+            "dropped": self.dropped,
+            "disconnected": self.disconnected,
+            "shed": self.shed,
+            "replayed": self.replayed,
+            "resyncs": self.resyncs,
+        }
+
+
+class ClientConnection:
+    """소켓 하나와 그 소켓 전용 송신 큐, 송신 태스크
+
+    room_id 가 None 이면 여러 채팅방을 구독하는 사용자 단위 소켓이며,
+    모든 프레임에 room_id 가 붙습니다.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        room_id: Optional[int],
+        user_id: int,
+        username: str,
+        stats: RoomStats,
+        codec: Codec = JSON_CODEC,
+        connection_id: str = "",
+        max_queue: int = WS_SEND_QUEUE_SIZE,
+        policy: str = WS_QUEUE_OVERFLOW_POLICY,
     ):
-        await websocket.accept()
+        if policy not in QUEUE_OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown queue overflow policy: {policy}")
+        self.websocket = websocket
+        self.room_id = room_id
+        self.multiplexed = room_id is None
+        self.user_id = user_id
+        self.username = username
+        self.stats = stats
+        self.codec = codec
+        self.connection_id = connection_id
+        # 구독 중인 채팅방과 채팅방별 접속 상태 항목
+        self.rooms: Dict[int, PresenceEntry] = {}
+        self.max_queue = max_queue
+        self.shed_threshold = int(max_queue * WS_EPHEMERAL_SHED_RATIO)
+        self.policy = policy
+        self.queue: Deque[OutboundFrame] = deque()
+        # 놓친 메시지를 재전송하는 동안 잠시 보류하는 채팅방별 실시간 프레임
+        self._held: Dict[int, List[OutboundFrame]] = {}
+        self.closed = False
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+
+    @property
+    def label(self) -> str:
+        return "multiplexed socket" if self.multiplexed else f"room {self.room_id}"
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def hold(self, room_id: int):
+        """release() 전까지 해당 채팅방의 실시간 프레임을 큐에 넣지 않고 보류합니다."""
+        self._held.setdefault(room_id, [])
+
+    def release(self, room_id: int, replay: List[dict] = ()):
+        """놓친 메시지를 먼저 넣고, 보류했던 실시간 프레임을 이어서 넣습니다."""
+        held = self._held.pop(room_id, [])
+        if self.closed:
+            return
+        # 보류 중에 실시간으로 들어온 같은 메시지는 재전송분만 남김
+        replayed_ids = {message.get("id") for message in replay}
+        now = time.monotonic()
+        for message in replay:
+            # 재전송분은 큐 길이 제한 없이 넣음 (개수는 재전송 상한으로 제한됨)
+            self.queue.append(
+                OutboundFrame(
+                    self.codec.encode_message(self._tag(message, room_id)),
+                    now,
+                    None,
+                    message.get("id"),
+                )
+            )
+        self.stats.replayed += len(replay)
+        for frame in held:
+            if frame.message_id is None or frame.message_id not in replayed_ids:
+                self.enqueue(
+                    frame.data, frame.coalesce_key, frame.message_id, frame.ephemeral
+                )
+        self._ready.set()
+
+    def _tag(self, message: dict, room_id: Optional[int]) -> dict:
+        if self.multiplexed and room_id is not None:
+            return {**message, "room_id": room_id}
+        return message
+
+    def send(
+        self,
+        message: dict,
+        coalesce_key: Optional[str] = None,
+        room_id: Optional[int] = None,
+    ) -> bool:
+        return self.enqueue(
+            self.codec.encode_message(self._tag(message, room_id)), coalesce_key
+        )
+
+    def enqueue(
+        self,
+        data: Frame,
+        coalesce_key: Optional[str] = None,
+        message_id: Optional[int] = None,
+        ephemeral: bool = False,
+        room_id: Optional[int] = None,
+    ) -> bool:
+        """프레임을 큐에 넣습니다. 소켓 쓰기를 기다리지 않습니다."""
+        if self.closed:
+            return False
+        frame = OutboundFrame(
+            data, time.monotonic(), coalesce_key, message_id, ephemeral
+        )
+        held = self._held.get(room_id) if room_id is not None else None
+        if held is not None:
+            if len(held) >= self.max_queue:
+                del held[0]
+                self.stats.dropped += 1
+            held.append(frame)
+            return True
+        if ephemeral and len(self.queue) >= self.shed_threshold:
+            self.stats.shed += 1
+            return False
+
+        if self.policy == "coalesce" and coalesce_key and self._replace(frame):
+            self._ready.set()
+            return True
+
+        if len(self.queue) >= self.max_queue:
+            if self.policy == "disconnect":
+                logger.warning(
+                    f"Send queue full for user {self.username} in {self.label}, disconnecting slow consumer"
+                )
+                self.stats.disconnected += 1
+                asyncio.create_task(self.close(code=status.WS_1008_POLICY_VIOLATION))
+                return False
+            self._drop_one()
+
+        self.queue.append(frame)
+        self._ready.set()
+        return True
+
+    def _replace(self, frame: OutboundFrame) -> bool:
+        for index, queued in enumerate(self.queue):
+            if queued.coalesce_key == frame.coalesce_key:
+                # 큐 위치와 대기 시작 시각은 유지하고 내용만 최신으로 교체
+                queued.data = frame.data
+                return True
+        return False
+
+    def _drop_one(self):
+        victim = 0
+        # 일시적 이벤트가 있으면 정책과 관계없이 먼저 버림
+        for index, queued in enumerate(self.queue):
+            if queued.ephemeral:
+                del self.queue[index]
+                self.stats.shed += 1
+                return
+        if self.policy == "coalesce":
+            # 상태성 프레임을 먼저 버리고, 없으면 가장 오래된 프레임을 버림
+            for index, queued in enumerate(self.queue):
+                if queued.coalesce_key:
+                    victim = index
+                    break
+        del self.queue[victim]
+        self.stats.dropped += 1
+
+    async def _write_loop(self):
+        try:
+            while not self.closed:
+                if not self.queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                frame = self.queue.popleft()
+                if isinstance(frame.data, bytes):
+                    await self.websocket.send_bytes(frame.data)
+                else:
+                    await self.websocket.send_text(frame.data)
+                self.stats.delivery.record(time.monotonic() - frame.enqueued_at)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 죽은 소켓은 이후 브로드캐스트에서 즉시 건너뜀
+            logger.warning(
+                f"Writer for user {self.username} in {self.label} failed: {str(e)}"
+            )
+            self.closed = True
+            self.queue.clear()
+
+    async def close(self, code: Optional[int] = None):
+        if self._writer and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        already_closed = self.closed
+        self.closed = True
+        self.queue.clear()
+        if code is not None and not already_closed:
+            try:
+                await self.websocket.close(code=code)
+            except Exception:
+                pass
+
+
+class ConnectionManager:
+    def __init__(
+        self,
+        backplane: Optional[Backplane] = None,
+        presence: Optional[PresenceStore] = None,
+        heartbeat_interval: float = PRESENCE_HEARTBEAT_SECONDS,
+        presence_debounce_ms: float = PRESENCE_DEBOUNCE_MS,
+    ):
+        # {room_id: {user_id: ClientConnection}} - 이 워커에 연결된 소켓만 보관
+        self.active_connections: Dict[int, Dict[int, ClientConnection]] = {}
+        # {room_id: RoomStats}
+        self.room_stats: Dict[int, RoomStats] = {}
+        # 사용자 단위(여러 채팅방) 소켓의 큐 지표
+        self.multiplexed_stats = RoomStats()
+        # 워커 간 브로드캐스트를 전달하는 백플레인
+        self.backplane = backplane or create_backplane()
+        # 모든 워커의 접속 상태 (사용자 → 채팅방 → 연결 수)
+        self.presence = presence or create_presence_store()
+        self.heartbeat_interval = heartbeat_interval
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._connection_ids = itertools.count(1)
+        # 입장/퇴장은 채팅방별로 모았다가 버전이 붙은 변경 이벤트 하나로 전송
+        self.presence_debounce = presence_debounce_ms / 1000
+        self._pending_presence: Dict[int, PendingPresence] = {}
+        self._presence_flushes: Dict[int, asyncio.Task] = {}
+        self.presence_events = 0
+        self.presence_snapshots = 0
+        logger.info(
+            f"ConnectionManager initialized (backplane: {self.backplane.name}, presence: {self.presence.name})"
+        )
+
+    async def start(self):
+        await self.backplane.start(self._deliver_local)
+        await self.presence.start()
+        self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self):
+        if self._heartbeat:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat = None
+        for task in list(self._presence_flushes.values()):
+            task.cancel()
+        self._presence_flushes.clear()
+        for connection in self._local_connections():
+            await connection.close()
+            for entry in connection.rooms.values():
+                await self.presence.leave(entry)
+        await self.presence.stop()
+        await self.backplane.stop()
+
+    def _local_connections(self) -> List[ClientConnection]:
+        # 여러 채팅방을 구독한 소켓도 한 번만 포함
+        unique = {}
+        for connections in self.active_connections.values():
+            for connection in connections.values():
+                unique[id(connection)] = connection
+        return list(unique.values())
+
+    async def _heartbeat_loop(self):
+        # 살아 있는 로컬 연결만 갱신하므로 끊긴 소켓이나 죽은 워커의 연결은 TTL 후 만료
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            entries = [
+                entry
+                for connection in self._local_connections()
+                if not connection.closed
+                for entry in connection.rooms.values()
+            ]
+            try:
+                await self.presence.heartbeat(entries)
+            except Exception as e:
+                logger.error(f"Presence heartbeat failed: {str(e)}")
+
+    def _new_connection(
+        self,
+        websocket: WebSocket,
+        room_id: Optional[int],
+        user_id: int,
+        username: str,
+        codec: Codec,
+    ) -> ClientConnection:
+        if room_id is None:
+            stats = self.multiplexed_stats
+        else:
+            stats = self.room_stats.setdefault(room_id, RoomStats())
+        connection = ClientConnection(
+            websocket,
+            room_id,
+            user_id,
+            username,
+            stats,
+            codec,
+            connection_id=f"{self.backplane.worker_id}:{next(self._connection_ids)}",
+        )
+        connection.start()
+        return connection
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        room_id: int,
+        user_id: int,
+        username: str,
+        codec: Codec = JSON_CODEC,
+        subprotocol: Optional[str] = None,
+        paused: bool = False,
+    ) -> ClientConnection:
+        """채팅방 하나 전용 소켓을 등록합니다. paused=True 면 resume() 전까지 실시간 프레임을 보류합니다."""
+        await websocket.accept(subprotocol=subprotocol)
         logger.info(
             f"Accepting WebSocket connection for user {username} (ID: {user_id}) in room {room_id}"
         )
+        connection = self._new_connection(websocket, room_id, user_id, username, codec)
+        await self.subscribe(connection, room_id, paused=paused)
+        return connection
+
+    async def connect_multiplexed(
+        self,
+        websocket: WebSocket,
+        user_id: int,
+        username: str,
+        codec: Codec = JSON_CODEC,
+        subprotocol: Optional[str] = None,
+    ) -> ClientConnection:
+        """여러 채팅방을 구독할 수 있는 사용자 단위 소켓을 등록합니다."""
+        await websocket.accept(subprotocol=subprotocol)
+        logger.info(
+            f"Accepting multiplexed WebSocket connection for user {username} (ID: {user_id})"
+        )
+        return self._new_connection(websocket, None, user_id, username, codec)
 
+    async def subscribe(
+        self, connection: ClientConnection, room_id: int, paused: bool = False
+    ):
+        """소켓이 채팅방의 이벤트를 받도록 팬아웃 색인에 등록합니다."""
         # 채팅방이 아직 매니저에 등록되지 않은 경우
         if room_id not in self.active_connections:
             self.active_connections[room_id] = {}
-            self.active_users[room_id] = set()
+            self.room_stats.setdefault(room_id, RoomStats())
+            await self.backplane.subscribe(room_id)
             logger.info(f"Created new room entry for room {room_id}")
 
-        # 사용자 연결 정보 저장
-        self.active_connections[room_id][user_id] = websocket
-        self.active_users[room_id].add(username)
+        # 같은 사용자의 이전 연결이 남아 있으면 정리 (사용자 단위 소켓은 해당 채팅방만 해제)
+        previous = self.active_connections[room_id].get(connection.user_id)
+        if previous is not None and previous is not connection:
+            if previous.multiplexed:
+                await self._detach(previous, room_id, record=False)
+                previous.send(
+                    {
+                        "type": "unsubscribed",
+                        "content": "Replaced by a newer connection",
+                    },
+                    room_id=room_id,
+                )
+            else:
+                await previous.close(code=status.WS_1008_POLICY_VIOLATION)
+                await self._detach(previous, room_id, record=False)
+
+        if paused:
+            connection.hold(room_id)
+        entry = PresenceEntry(
+            connection.connection_id, room_id, connection.user_id, connection.username
+        )
+        connection.rooms[room_id] = entry
+        self.active_connections[room_id][connection.user_id] = connection
+        await self.presence.join(entry)
         logger.info(
-            f"User {username} connected to room {room_id}. Active users: {len(self.active_users[room_id])}"
+            f"User {connection.username} subscribed to room {room_id}. Local users: {len(self.active_connections[room_id])}"
         )
 
-        # 새로운 사용자가 접속했다는 메시지를 모든 사용자에게 전송
-        await self.broadcast(
-            room_id=room_id,
-            message={"type": "system", "content": f"{username} 님이 입장했습니다."},
-        )
+        # 전체 접속자 목록은 새로 접속한 소켓에만 보내고, 다른 사용자에게는 변경분만 전송
+        if not paused:
+            await self.send_presence_snapshot(connection, room_id)
+        self._record_presence(room_id, connection.username, joined=True)
 
-        # 현재 접속 중인 사용자 목록 전송
-        await self.send_active_users(room_id)
-
-    def disconnect(self, room_id: int, user_id: int, username: str):
-        # 연결 종료 시 사용자 정보 제거
-        if (
-            room_id in self.active_connections
-            and user_id in self.active_connections[room_id]
-        ):
-            del self.active_connections[room_id][user_id]
-            self.active_users[room_id].discard(username)
-            logger.info(f"User {username} disconnected from room {room_id}")
-
-            # 채팅방에 아무도 없으면 채팅방 정보도 제거
-            if not self.active_connections[room_id]:
-                del self.active_connections[room_id]
-                del self.active_users[room_id]
-                logger.info(
-                    f"Room {room_id} removed from connection manager (no active users)"
-                )
-                return
+    async def resume(
+        self, connection: ClientConnection, room_id: int, replay: List[dict] = ()
+    ):
+        """보류했던 채팅방에 놓친 메시지와 실시간 프레임을 보내고 접속자 목록을 보냅니다."""
+        connection.release(room_id, replay)
+        if room_id in connection.rooms:
+            await self.send_presence_snapshot(connection, room_id)
 
-            logger.info(
-                f"Room {room_id} has {len(self.active_users[room_id])} active users after disconnect"
-            )
-            # 나간 사용자 정보 전송 (비동기 함수지만 disconnect에서는 직접 호출할 수 없으므로 별도 처리 필요)
-            return {"type": "system", "content": f"{username} 님이 나갔습니다."}
-        else:
+    async def unsubscribe(self, connection: ClientConnection, room_id: int):
+        await self._detach(connection, room_id, record=True)
+
+    async def _detach(
+        self, connection: ClientConnection, room_id: int, record: bool = True
+    ):
+        connection._held.pop(room_id, None)
+        entry = connection.rooms.pop(room_id, None)
+        if entry is None:
+            return
+        await self.presence.leave(entry)
+        room = self.active_connections.get(room_id)
+        if room is None or room.get(connection.user_id) is not connection:
+            # 같은 사용자의 새 연결로 이미 교체된 경우
             logger.warning(
-                f"Attempted to disconnect user {username} from room {room_id}, but user or room not found"
+                f"Attempted to detach user {connection.username} from room {room_id}, but connection not found"
             )
+            return
+
+        del room[connection.user_id]
+        logger.info(f"User {connection.username} left room {room_id}")
+        if record:
+            self._record_presence(room_id, connection.username, joined=False)
 
-    async def send_personal_message(self, message: dict, websocket: WebSocket):
-        await websocket.send_text(json.dumps(message))
-        logger.info(f"Sent personal message: {message}")
-
-    async def broadcast(self, room_id: int, message: dict, exclude_user_id: int = None):
-        # 특정 채팅방의 모든 사용자에게 메시지 전송 (특정 사용자 제외 가능)
-        if room_id in self.active_connections:
-            recipients_count = 0
-            logger.info(f"Broadcasting message to room {room_id}: {message}")
-            for user_id, connection in self.active_connections[room_id].items():
-                if exclude_user_id is None or user_id != exclude_user_id:
-                    await connection.send_text(json.dumps(message))
-                    recipients_count += 1
+        # 채팅방에 아무도 없으면 채팅방 정보도 제거
+        if not room:
+            del self.active_connections[room_id]
+            del self.room_stats[room_id]
+            await self.backplane.unsubscribe(room_id)
             logger.info(
-                f"Broadcasted message to {recipients_count} users in room {room_id}"
+                f"Room {room_id} removed from connection manager (no local users)"
             )
         else:
+            logger.info(f"Room {room_id} has {len(room)} local users after disconnect")
+
+    async def disconnect(self, connection: ClientConnection):
+        # 연결 종료 시 구독 중인 모든 채팅방에서 제거
+        await connection.close()
+        for room_id in list(connection.rooms):
+            await self._detach(connection, room_id)
+        logger.info(f"User {connection.username} disconnected ({connection.label})")
+
+    async def send_personal_message(
+        self, message, connection: ClientConnection, room_id: Optional[int] = None
+    ):
+        connection.send(to_payload(message), room_id=room_id)
+        logger.info(f"Queued personal message: {message}")
+
+    async def broadcast(self, room_id: int, message, exclude_user_id: int = None):
+        message = to_payload(message)
+        # 백플레인을 통해 모든 워커에 전달하고, 각 워커는 자신의 소켓에만 전송
+        await self.backplane.publish(room_id, message, exclude_user_id)
+
+    async def _deliver_local(
+        self, room_id: int, message: dict, exclude_user_id: Optional[int] = None
+    ):
+        # 특정 채팅방의 모든 사용자 큐에 메시지 적재 (특정 사용자 제외 가능)
+        if room_id not in self.active_connections:
             logger.warning(
-                f"Attempted to broadcast to room {room_id}, but room not found"
+                f"Attempted to deliver to room {room_id}, but no local connections"
             )
+            return
 
-    async def send_active_users(self, room_id: int):
-        # 현재 채팅방에 접속 중인 사용자 목록 전송
-        if room_id in self.active_users:
-            message = {"type": "users_list", "users": list(self.active_users[room_id])}
-            await self.broadcast(room_id, message)
+        started = time.monotonic()
+        coalesce_key = (
+            f"users_list:{room_id}" if message.get("type") == "users_list" else None
+        )
+        message_id = message.get("id") if message.get("type") == "chat" else None
+        ephemeral = message.get("type") == "activity"
+        # (코덱, room_id 포함 여부)별로 한 번만 직렬화하고 같은 프레임을 모든 수신자가 공유
+        frames: Dict[Tuple[str, bool], Frame] = {}
+        recipients_count = 0
+        for user_id, connection in list(self.active_connections[room_id].items()):
+            if exclude_user_id is not None and user_id == exclude_user_id:
+                continue
+            key = (connection.codec.name, connection.multiplexed)
+            frame = frames.get(key)
+            if frame is None:
+                frame = connection.codec.encode(connection._tag(message, room_id))
+                frames[key] = frame
+            if connection.enqueue(frame, coalesce_key, message_id, ephemeral, room_id):
+                recipients_count += 1
+        self.room_stats[room_id].fanout.record(time.monotonic() - started)
+        logger.info(f"Queued message for {recipients_count} users in room {room_id}")
+
+    async def send_presence_snapshot(self, connection: ClientConnection, room_id: int):
+        """모든 워커 기준 접속자 목록을 버전과 함께 해당 소켓에만 보냅니다."""
+        # 버전을 먼저 읽어 목록이 그 버전보다 오래되지 않도록 함
+        version = await self.presence.version(room_id)
+        users = (await self.presence.online_in_rooms([room_id]))[room_id]
+        connection.send(
+            {"type": "users_list", "users": users, "version": version},
+            coalesce_key=f"users_list:{room_id}",
+            room_id=room_id,
+        )
+        self.presence_snapshots += 1
+        logger.info(
+            f"Sent presence snapshot for room {room_id} to {connection.username}: {len(users)} users (version {version})"
+        )
+
+    def _record_presence(self, room_id: int, username: str, joined: bool):
+        pending = self._pending_presence.setdefault(room_id, PendingPresence())
+        if joined:
+            pending.joined.add(username)
+            pending.left.discard(username)
+        else:
+            pending.left.add(username)
+            pending.joined.discard(username)
+        if room_id not in self._presence_flushes:
+            self._presence_flushes[room_id] = asyncio.create_task(
+                self._flush_presence(room_id)
+            )
+
+    async def _flush_presence(self, room_id: int):
+        await asyncio.sleep(self.presence_debounce)
+        self._presence_flushes.pop(room_id, None)
+        pending = self._pending_presence.pop(room_id, None)
+        if pending is None:
+            return
+        try:
+            # 다른 연결(다른 워커, 재접속)로 아직 접속 중인 사용자는 퇴장으로 보지 않음
+            online = set((await self.presence.online_in_rooms([room_id]))[room_id])
+            joined = sorted(pending.joined & online)
+            left = sorted(pending.left - online)
+            if not joined and not left:
+                return
+            version = await self.presence.bump_version(room_id)
+            await self.broadcast(
+                room_id,
+                {
+                    "type": "presence",
+                    "joined": joined,
+                    "left": left,
+                    "version": version,
+                },
+            )
+            if joined:
+                await self.broadcast(
+                    room_id,
+                    {
+                        "type": "system",
+                        "content": f"{', '.join(joined)} 님이 입장했습니다.",
+                    },
+                )
+            if left:
+                await self.broadcast(
+                    room_id,
+                    {
+                        "type": "system",
+                        "content": f"{', '.join(left)} 님이 나갔습니다.",
+                    },
+                )
+            self.presence_events += 1
             logger.info(
-                f"Sent active users list for room {room_id}: {len(self.active_users[room_id])} users"
+                f"Broadcast presence change for room {room_id} (version {version}): joined={joined}, left={left}"
             )
-        else:
-            logger.warning(
-                f"Attempted to send user list for room {room_id}, but room not found"
+        except Exception as e:
+            logger.error(
+                f"Presence change broadcast failed for room {room_id}: {str(e)}"
             )
 
+    def stats(self) -> dict:
+        return {
+            # 채팅방을 구독하고 있는 이 워커의 소켓 수
+            "connections": len(self._local_connections()),
+            "backplane": self.backplane.stats(),
+            "presence": {
+                **self.presence.stats(),
+                "events": self.presence_events,
+                "snapshots": self.presence_snapshots,
+            },
+            "rooms": {
+                room_id: room_stats.snapshot()
+                for room_id, room_stats in self.room_stats.items()
+            },
+            "multiplexed": self.multiplexed_stats.snapshot(),
+        }
+
 
 # 전역 연결 관리자 인스턴스
 manager = ConnectionManager()
@@ -0,0 +1,109 @@
+"""
+브로드캐스트 팬아웃 CPU 벤치마크
+
+수신자마다 json.dumps 를 호출하던 기존 방식과, 브로드캐스트당 한 번만
+직렬화하는 방식(JSON / MessagePack / 혼합)을 방 크기별로 비교합니다.
+
+실행: python -m benchmarks.fanout_codec_bench
+"""
+
+import asyncio
+import json
+import logging
+import time
+
+from app.utils.backplane import InMemoryBackplane
+from app.utils.codecs import CODECS, JSON_CODEC
+from app.utils.websocket_manager import ClientConnection, ConnectionManager, RoomStats
+
+ROOM_SIZES = [10, 100, 500, 1000]
+ITERATIONS = 200
+
+MESSAGE = {
+    "type": "chat",
+    "content": "안녕하세요! 오늘 회의는 3시에 시작합니다. " * 3,
+    "sender_username": "kihoon",
+    "timestamp": "2024-03-01T12:00:00.000000+00:00",
+    "client_timestamp": "2024-03-01T12:00:00.000Z",
+    "id": 123456,
+}
+
+
+class NullWebSocket:
+    async def send_text(self, data):
+        pass
+
+    async def send_bytes(self, data):
+        pass
+
+
+def build_manager(room_size: int, codecs) -> ConnectionManager:
+    manager = ConnectionManager(backplane=InMemoryBackplane())
+    stats = RoomStats()
+    manager.room_stats[1] = stats
+    manager.active_connections[1] = {
+        user_id: ClientConnection(
+            NullWebSocket(),
+            1,
+            user_id,
+            f"user{user_id}",
+            stats,
+            codecs[user_id % len(codecs)],
+            max_queue=ITERATIONS + 1,
+        )
+        for user_id in range(room_size)
+    }
+    return manager
+
+
+def clear_queues(manager: ConnectionManager):
+    for connection in manager.active_connections[1].values():
+        connection.queue.clear()
+
+
+async def bench_per_recipient(manager: ConnectionManager) -> float:
+    # 기존 방식: 수신자마다 직렬화
+    started = time.process_time()
+    for _ in range(ITERATIONS):
+        for connection in manager.active_connections[1].values():
+            connection.enqueue(json.dumps(MESSAGE))
+    elapsed = time.process_time() - started
+    clear_queues(manager)
+    return elapsed
+
+
+async def bench_encode_once(manager: ConnectionManager) -> float:
+    started = time.process_time()
+    for _ in range(ITERATIONS):
+        await manager._deliver_local(1, MESSAGE)
+    elapsed = time.process_time() - started
+    clear_queues(manager)
+    return elapsed
+
+
+async def main():
+    # 메시지마다 남는 INFO 로그가 측정값을 왜곡하지 않도록 비활성화
+    logging.disable(logging.INFO)
+    msgpack_codec = CODECS.get("chat.msgpack")
+    scenarios = [("encode-once json", [JSON_CODEC])]
+    if msgpack_codec is not None:
+        scenarios.append(("encode-once msgpack", [msgpack_codec]))
+        scenarios.append(("encode-once mixed", [JSON_CODEC, msgpack_codec]))
+    else:
+        print("msgpack 이 설치되어 있지 않아 MessagePack 시나리오는 건너뜁니다.")
+
+    print(f"{'room size':>10} {'scenario':<22} {'CPU/fan-out (us)':>18}")
+    for room_size in ROOM_SIZES:
+        manager = build_manager(room_size, [JSON_CODEC])
+        baseline = await bench_per_recipient(manager)
+        print(
+            f"{room_size:>10} {'per-recipient json':<22} {baseline / ITERATIONS * 1e6:>18.1f}"
+        )
+        for name, codecs in scenarios:
+            manager = build_manager(room_size, codecs)
+            elapsed = await bench_encode_once(manager)
+            print(f"{room_size:>10} {name:<22} {elapsed / ITERATIONS * 1e6:>18.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+"""
+친구 그래프 벤치마크
+
+간선 100만 개의 합성 친구 그래프를 친구 그래프 캐시에 올린 뒤, 메모리 사용량과
+친구 목록, 친구 여부 확인, 함께 아는 친구 수, 친구의 친구 추천의 지연 시간을 측정합니다.
+메모리는 사용자별 정수 set 으로 같은 그래프를 보관하는 경우와 비교합니다.
+
+실행: python -m benchmarks.friend_graph_bench
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+from array import array
+
+from app.services.friend_graph import FriendGraph
+from app.utils.metrics import LatencyStats
+
+# 친구의 대부분은 가까운 ID(같은 커뮤니티)에서, 나머지는 전체에서 무작위로 선택
+COMMUNITY_SIZE = 1000
+COMMUNITY_RATIO = 0.8
+
+
+def synthetic_adjacency(users: int, edges: int, seed: int = 7):
+    rng = random.Random(seed)
+    average = edges / users
+    remaining = edges
+    for user_id in range(users):
+        # 친구 수는 평균 주변에서 한쪽으로 긴 분포를 따르도록 생성
+        degree = min(remaining, int(rng.expovariate(1 / average)) + 1)
+        if user_id == users - 1:
+            degree = remaining
+        degree = min(degree, users - 1)
+        remaining -= degree
+        friends = set()
+        base = user_id - user_id % COMMUNITY_SIZE
+        while len(friends) < degree:
+            if rng.random() < COMMUNITY_RATIO:
+                friend_id = base + rng.randrange(COMMUNITY_SIZE)
+            else:
+                friend_id = rng.randrange(users)
+            if friend_id != user_id and friend_id < users:
+                friends.add(friend_id)
+        yield user_id, sorted(friends)
+
+
+def measure(label: str, stats: LatencyStats):
+    snapshot = stats.snapshot()
+    print(
+        f"{label:<22} n={snapshot['count']:<6} p50={snapshot['p50_ms'] * 1000:8.1f}us "
+        f"p99={snapshot['p99_ms'] * 1000:8.1f}us max={snapshot['max_ms'] * 1000:8.1f}us"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--edges", type=int, default=1_000_000)
+    parser.add_argument("--samples", type=int, default=2000)
+    args = parser.parse_args()
+
+    adjacency = list(synthetic_adjacency(args.users, args.edges))
+    edges = sum(len(friends) for _, friends in adjacency)
+    print(f"synthetic graph: {args.users} users, {edges} edges")
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    graph = FriendGraph(max_size=args.users)
+    for user_id, friends in adjacency:
+        graph.put(user_id, array("q", friends), array("d", [0.0] * len(friends)))
+    load_seconds = time.perf_counter() - started
+    graph_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    baseline = {user_id: set(friends) for user_id, friends in adjacency}
+    set_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del baseline
+
+    print(f"load into cache: {load_seconds:.2f}s")
+    print(
+        f"memory: sorted arrays (ids + since) {graph_bytes / 2**20:.1f} MiB, "
+        f"dict of sets {set_bytes / 2**20:.1f} MiB (ids only)"
+    )
+
+    rng = random.Random(11)
+    friends_stats = LatencyStats(args.samples)
+    is_friend_stats = LatencyStats(args.samples)
+    mutual_stats = LatencyStats(args.samples)
+    suggestion_stats = LatencyStats(args.samples)
+    # 모든 인접 목록이 캐시에 있으므로 DB 세션 없이 호출
+    for _ in range(args.samples):
+        user_id = rng.randrange(args.users)
+        other_id = rng.randrange(args.users)
+
+        started = time.perf_counter()
+        await graph.friends(None, user_id)
+        friends_stats.record(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await graph.is_friend(None, user_id, other_id)
+        is_friend_stats.record(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await graph.mutual_count(None, user_id, other_id)
+        mutual_stats.record(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await graph.suggestions(None, user_id, 10)
+        suggestion_stats.record(time.perf_counter() - started)
+
+    measure("friend list", friends_stats)
+    measure("is friend", is_friend_stats)
+    measure("mutual friend count", mutual_stats)
+    measure("suggestions (top 10)", suggestion_stats)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
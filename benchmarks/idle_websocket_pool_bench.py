@@ -0,0 +1,208 @@
+"""
+유휴 WebSocket 다수 접속 시 DB 커넥션 풀 사용량 벤치마크
+
+실행 중인 서버(워커 1개)에 수천 개의 WebSocket 을 열어 둔 채로 /metrics 의
+DB 커넥션 풀 사용량을 확인하고, 그 상태에서 REST 히스토리 조회와 WebSocket
+채팅 왕복 지연 시간을 측정합니다. 서버는 작은 풀로 실행합니다.
+
+    DB_POOL_SIZE=2 DB_MAX_OVERFLOW=0 uvicorn app.main:app --port 8002
+
+실행: python -m benchmarks.idle_websocket_pool_bench --base-url http://localhost:8002
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import resource
+import statistics
+import time
+import urllib.parse
+import urllib.request
+
+import websockets
+
+
+def http_json(method: str, url: str, body=None, token: str = None, form=False):
+    headers = {}
+    data = None
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if body is not None:
+        if form:
+            data = urllib.parse.urlencode(body).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        else:
+            data = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+    request = urllib.request.Request(url, data=data, headers=headers, method=method)
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read() or b"null")
+
+
+def setup(base_url: str, users: int, rooms: int):
+    # 벤치마크 전용 사용자와, 모든 사용자가 참여한 채팅방 생성
+    suffix = random.randint(1, 100000000)
+    usernames = [f"idle{suffix}u{index}" for index in range(users)]
+    tokens = []
+    for username in usernames:
+        http_json(
+            "POST",
+            f"{base_url}/auth/register",
+            {"username": username, "password": "benchpassword"},
+        )
+        token = http_json(
+            "POST",
+            f"{base_url}/auth/token",
+            {"username": username, "password": "benchpassword"},
+            form=True,
+        )["access_token"]
+        tokens.append(token)
+
+    room_ids = [
+        http_json(
+            "POST",
+            f"{base_url}/chat/rooms/",
+            {"name": f"idle-{suffix}-{index}", "participants": usernames[1:]},
+            token=tokens[0],
+        )["id"]
+        for index in range(rooms)
+    ]
+    return room_ids, tokens
+
+
+async def hold_socket(url: str, opened: asyncio.Event, stop: asyncio.Event, result):
+    # 연결을 연 뒤 서버가 보내는 입장/퇴장 이벤트만 읽고 버리며 대기
+    try:
+        async with websockets.connect(url, open_timeout=60) as websocket:
+            result["open"] += 1
+            opened.set()
+            stop_wait = asyncio.create_task(stop.wait())
+            while not stop.is_set():
+                receive = asyncio.create_task(websocket.recv())
+                done, _ = await asyncio.wait(
+                    {receive, stop_wait}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if receive not in done:
+                    receive.cancel()
+                    break
+                receive.result()
+    except Exception:
+        result["failed"] += 1
+        opened.set()
+
+
+async def open_sockets(ws_base: str, room_ids, tokens, concurrency: int, stop):
+    result = {"open": 0, "failed": 0}
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = []
+
+    async def open_one(url: str):
+        async with semaphore:
+            opened = asyncio.Event()
+            tasks.append(asyncio.create_task(hold_socket(url, opened, stop, result)))
+            await opened.wait()
+
+    await asyncio.gather(
+        *(
+            open_one(f"{ws_base}/chat/rooms/{room_id}/ws?token={token}")
+            for room_id in room_ids
+            for token in tokens
+        )
+    )
+    return tasks, result
+
+
+async def measure_rest(base_url: str, room_id: int, token: str, samples: int):
+    latencies = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        await asyncio.to_thread(
+            http_json,
+            "GET",
+            f"{base_url}/chat/{room_id}/messages?page_size=50",
+            None,
+            token,
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def measure_ws(ws_base: str, room_id: int, token: str, samples: int):
+    # 사용자 단위 소켓으로 구독한 뒤 채팅 메시지 저장과 브로드캐스트 왕복 시간 측정
+    latencies = []
+    async with websockets.connect(f"{ws_base}/chat/ws?token={token}") as websocket:
+        await websocket.send(
+            json.dumps({"message_type": "subscribe", "room_id": room_id})
+        )
+        for index in range(samples):
+            marker = f"pool-probe-{index}-{time.time_ns()}"
+            started = time.perf_counter()
+            await websocket.send(json.dumps({"content": marker, "room_id": room_id}))
+            while True:
+                message = json.loads(await websocket.recv())
+                if message.get("type") == "chat" and message.get("content") == marker:
+                    break
+            latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def summarize(label: str, latencies):
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"{label:<24} n={len(ordered):<5} p50={statistics.median(ordered):8.2f}ms "
+        f"p99={p99:8.2f}ms max={ordered[-1]:8.2f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8002")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rooms", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--samples", type=int, default=100)
+    args = parser.parse_args()
+
+    # 소켓 수만큼 파일 디스크립터가 필요하므로 소프트 한도를 하드 한도까지 올림
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    room_ids, tokens = await asyncio.to_thread(
+        setup, args.base_url, args.users, args.rooms
+    )
+    ws_base = args.base_url.replace("http://", "ws://").replace("https://", "wss://")
+
+    stop = asyncio.Event()
+    started = time.perf_counter()
+    tasks, result = await open_sockets(
+        ws_base, room_ids, tokens, args.concurrency, stop
+    )
+    elapsed = time.perf_counter() - started
+    print(
+        f"idle sockets open={result['open']} failed={result['failed']} "
+        f"in {elapsed:.1f}s ({result['open'] / elapsed:.0f} connects/s)"
+    )
+
+    # 입장 이벤트가 정리될 때까지 잠시 대기한 뒤 풀 사용량 확인
+    await asyncio.sleep(2)
+    metrics = await asyncio.to_thread(http_json, "GET", f"{args.base_url}/metrics")
+    print(f"server connections: {metrics['websocket']['connections']}")
+    print(f"database pool: {metrics['database_pool']}")
+
+    summarize(
+        "REST history read",
+        await measure_rest(args.base_url, room_ids[0], tokens[1], args.samples),
+    )
+    summarize(
+        "WS chat round trip",
+        await measure_ws(ws_base, room_ids[0], tokens[0], args.samples),
+    )
+
+    stop.set()
+    await asyncio.gather(*tasks)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
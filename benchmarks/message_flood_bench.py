@@ -0,0 +1,175 @@
+"""
+메시지 폭주 시 전송 제한 벤치마크
+
+실행 중인 서버에서 사용자 한 명(봇)이 여러 스레드로 POST /chat/{room_id}/messages 를
+쉬지 않고 호출하고, 같은 시간 동안 WebSocket 으로도 메시지를 연속으로 보냅니다.
+허용/거부된 요청 수와 응답 지연 시간, 그리고 /metrics 의 메시지 파이프라인 저장 행 수를
+비교해 거부된 메시지가 DB 에 닿지 않는지 확인합니다.
+
+실행: python -m benchmarks.message_flood_bench --base-url http://localhost:8002
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import websockets
+
+
+def http_json(method: str, url: str, body=None, token: str = None, form=False):
+    headers = {}
+    data = None
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if body is not None:
+        if form:
+            data = urllib.parse.urlencode(body).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        else:
+            data = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+    request = urllib.request.Request(url, data=data, headers=headers, method=method)
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read() or b"null")
+
+
+def setup(base_url: str):
+    # 봇 사용자와 다른 사용자 하나가 참여한 채팅방 생성
+    suffix = random.randint(1, 100000000)
+    usernames = [f"flood{suffix}", f"flood{suffix}peer"]
+    tokens = []
+    for username in usernames:
+        http_json(
+            "POST",
+            f"{base_url}/auth/register",
+            {"username": username, "password": "benchpassword"},
+        )
+        token = http_json(
+            "POST",
+            f"{base_url}/auth/token",
+            {"username": username, "password": "benchpassword"},
+            form=True,
+        )["access_token"]
+        tokens.append(token)
+    room = http_json(
+        "POST",
+        f"{base_url}/chat/rooms/",
+        {"name": f"flood-{suffix}", "participants": [usernames[1]]},
+        token=tokens[0],
+    )
+    return room["id"], tokens[0]
+
+
+def stored_rows(base_url: str) -> int:
+    return http_json("GET", f"{base_url}/metrics")["message_pipeline"]["rows"]
+
+
+def http_flood(base_url: str, room_id: int, token: str, threads: int, seconds: float):
+    # 상태 코드별 응답 지연 시간(ms)
+    latencies = {200: [], 429: []}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def sender():
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                http_json(
+                    "POST",
+                    f"{base_url}/chat/{room_id}/messages",
+                    {"content": "flood"},
+                    token=token,
+                )
+                code = 200
+            except urllib.error.HTTPError as e:
+                code = e.code
+            with lock:
+                latencies.setdefault(code, []).append(
+                    (time.perf_counter() - started) * 1000
+                )
+
+    workers = [threading.Thread(target=sender) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return latencies
+
+
+async def ws_flood(ws_url: str, seconds: float):
+    counts = {"chat": 0, "rate_limited": 0}
+    async with websockets.connect(ws_url) as websocket:
+
+        async def receiver():
+            async for frame in websocket:
+                kind = json.loads(frame).get("type")
+                if kind in counts:
+                    counts[kind] += 1
+
+        task = asyncio.create_task(receiver())
+        deadline = time.monotonic() + seconds
+        sent = 0
+        while time.monotonic() < deadline:
+            await websocket.send(json.dumps({"content": "flood"}))
+            sent += 1
+            await asyncio.sleep(0.001)
+        # 마지막 응답까지 받을 시간
+        await asyncio.sleep(1)
+        task.cancel()
+    return sent, counts
+
+
+def summarize(label: str, latencies):
+    if not latencies:
+        print(f"{label:<16} n=0")
+        return
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"{label:<16} n={len(ordered):<6} p50={statistics.median(ordered):8.2f}ms "
+        f"p99={p99:8.2f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8002")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    room_id, token = setup(args.base_url)
+    rows_before = stored_rows(args.base_url)
+
+    latencies = await asyncio.to_thread(
+        http_flood, args.base_url, room_id, token, args.threads, args.seconds
+    )
+    print(f"HTTP flood: {args.threads} threads for {args.seconds}s")
+    summarize("200 accepted", latencies.pop(200))
+    summarize("429 rejected", latencies.pop(429))
+    for code, values in latencies.items():
+        summarize(f"{code}", values)
+
+    ws_url = (
+        args.base_url.replace("http", "ws", 1)
+        + f"/chat/rooms/{room_id}/ws?token={token}"
+    )
+    sent, counts = await ws_flood(ws_url, args.seconds)
+    print(
+        f"WebSocket flood: sent {sent}, broadcast {counts['chat']}, "
+        f"rate_limited {counts['rate_limited']}"
+    )
+
+    rows = stored_rows(args.base_url) - rows_before
+    print(f"messages stored during flood: {rows}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,189 @@
+"""
+WebSocket 재연결 폭주 벤치마크
+
+실행 중인 서버(워커 1개)에 수천 개의 WebSocket 이 한꺼번에 접속을 시도하는 상황(워커 재시작 직후)을
+재현합니다. 클라이언트는 1013 으로 거부되면 종료 reason 의 retry_after 만큼 기다렸다가, 그 밖의 오류면
+1초 정도 기다렸다가 다시 접속합니다. 모든 소켓이 접속을 마칠 때까지의 시간, 1013 거부 수,
+인증 실패 등 그 밖의 오류 수와 접속 완료까지의 지연 시간을 측정합니다.
+
+서버는 작은 풀과 짧은 캐시 TTL(폭주 시점에 캐시가 비어 있도록)로 실행합니다.
+수락 제어를 끈 상태와 비교하려면 WS_MAX_PENDING_AUTH, WS_MAX_CONNECTS_PER_SECOND,
+WS_CONNECT_BURST 를 매우 큰 값으로 설정합니다.
+
+    BCRYPT_ROUNDS=4 USER_CACHE_TTL_SECONDS=1 MEMBERSHIP_CACHE_TTL_SECONDS=1 \\
+    DB_POOL_SIZE=2 DB_MAX_OVERFLOW=0 DB_POOL_TIMEOUT=2 uvicorn app.main:app --port 8002
+
+실행: python -m benchmarks.reconnect_storm_bench --base-url http://localhost:8002
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import resource
+import statistics
+import time
+import urllib.parse
+import urllib.request
+from collections import Counter
+
+import websockets
+
+
+def http_json(method: str, url: str, body=None, token: str = None, form=False):
+    headers = {}
+    data = None
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if body is not None:
+        if form:
+            data = urllib.parse.urlencode(body).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        else:
+            data = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+    request = urllib.request.Request(url, data=data, headers=headers, method=method)
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read() or b"null")
+
+
+def setup(base_url: str, users: int):
+    # 벤치마크 전용 사용자와, 모든 사용자가 참여한 채팅방 생성
+    suffix = random.randint(1, 100000000)
+    usernames = [f"storm{suffix}u{index}" for index in range(users)]
+    tokens = []
+    for username in usernames:
+        http_json(
+            "POST",
+            f"{base_url}/auth/register",
+            {"username": username, "password": "benchpassword"},
+        )
+        token = http_json(
+            "POST",
+            f"{base_url}/auth/token",
+            {"username": username, "password": "benchpassword"},
+            form=True,
+        )["access_token"]
+        tokens.append(token)
+
+    room_id = http_json(
+        "POST",
+        f"{base_url}/chat/rooms/",
+        {"name": f"storm-{suffix}", "participants": usernames[1:]},
+        token=tokens[0],
+    )["id"]
+    return room_id, tokens
+
+
+async def connect_until_open(url: str, deadline: float, stop: asyncio.Event, result):
+    """접속에 성공할 때까지 재시도하고, 성공하면 stop 까지 연결을 유지합니다."""
+    started = time.perf_counter()
+    while time.monotonic() < deadline:
+        connected = False
+        try:
+            async with websockets.connect(url, open_timeout=30) as websocket:
+                # 첫 프레임(접속자 목록)을 받아야 인증과 입장이 끝난 것
+                await asyncio.wait_for(websocket.recv(), 30)
+                result["latencies"].append((time.perf_counter() - started) * 1000)
+                result["open"] += 1
+                connected = True
+                while not stop.is_set():
+                    try:
+                        await asyncio.wait_for(websocket.recv(), 1)
+                    except asyncio.TimeoutError:
+                        pass
+                return
+        except websockets.exceptions.ConnectionClosed as e:
+            if e.rcvd is not None and e.rcvd.code == 1013:
+                result["rejected"] += 1
+                await asyncio.sleep(json.loads(e.rcvd.reason)["retry_after"])
+                continue
+            error = f"close {e.rcvd.code if e.rcvd else None}"
+        except Exception as e:
+            error = type(e).__name__
+        if connected:
+            # 접속을 마친 뒤 끊긴 소켓은 다시 접속하지 않고 따로 집계
+            result["dropped"][error] += 1
+            return
+        result["failed"][error] += 1
+        await asyncio.sleep(random.uniform(0.5, 1.5))
+    result["gave_up"] += 1
+
+
+def summarize(label: str, latencies):
+    if not latencies:
+        print(f"{label:<24} n=0")
+        return
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"{label:<24} n={len(ordered):<5} p50={statistics.median(ordered):8.1f}ms "
+        f"p99={p99:8.1f}ms max={ordered[-1]:8.1f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8002")
+    # 같은 사용자의 같은 채팅방 소켓은 새 연결이 이전 연결을 대체하므로 사용자마다 소켓 하나
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    # 소켓 수만큼 파일 디스크립터가 필요하므로 소프트 한도를 하드 한도까지 올림
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    room_id, tokens = await asyncio.to_thread(setup, args.base_url, args.users)
+    ws_base = args.base_url.replace("http://", "ws://").replace("https://", "wss://")
+    # 서버의 사용자/멤버십 캐시가 만료되도록 대기 (재시작 직후와 같은 상태)
+    await asyncio.sleep(2)
+
+    result = {
+        "open": 0,
+        "rejected": 0,
+        "failed": Counter(),
+        "dropped": Counter(),
+        "gave_up": 0,
+        "latencies": [],
+    }
+    stop = asyncio.Event()
+    deadline = time.monotonic() + args.timeout
+    started = time.perf_counter()
+    tasks = [
+        asyncio.create_task(
+            connect_until_open(
+                f"{ws_base}/chat/rooms/{room_id}/ws?token={token}",
+                deadline,
+                stop,
+                result,
+            )
+        )
+        for token in tokens
+    ]
+    total = len(tasks)
+    while result["open"] + result["gave_up"] < total and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"storm of {total} sockets: open={result['open']} in {elapsed:.1f}s, "
+        f"1013 rejections={result['rejected']}, "
+        f"other failures={sum(result['failed'].values())} {dict(result['failed'])}, "
+        f"gave up={result['gave_up']}, dropped after open={dict(result['dropped'])}"
+    )
+    summarize("time to connected", result["latencies"])
+    metrics = await asyncio.to_thread(http_json, "GET", f"{args.base_url}/metrics")
+    admission = metrics["websocket_admission"]
+    print(
+        f"admission: admitted={admission['admitted']} rejected={admission['rejected']} "
+        f"max pending auth={admission['max_pending_seen']}"
+    )
+    print(f"database pool: {metrics['database_pool']}")
+
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
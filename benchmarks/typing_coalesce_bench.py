@@ -0,0 +1,100 @@
+"""
+타이핑 이벤트 팬아웃 벤치마크
+
+타이핑 이벤트마다 채팅방 전체에 바로 브로드캐스트하던 기존 방식과,
+채팅방별로 주기당 한 개의 activity 프레임으로 합치는 방식을 비교합니다.
+수신자 한 명이 받는 프레임 수와 바이트 수, 채팅방 전체 팬아웃 프레임 수를 출력합니다.
+
+실행: python -m benchmarks.typing_coalesce_bench
+"""
+
+import asyncio
+import logging
+
+from app.services.event_coalescer import EventCoalescer
+from app.utils.backplane import InMemoryBackplane
+from app.utils.websocket_manager import ClientConnection, ConnectionManager, RoomStats
+
+ROOM_SIZE = 500
+TYPISTS = 10
+# 입력 중인 사용자 한 명이 타이핑 이벤트를 보내는 간격과 측정 시간
+KEYSTROKE_INTERVAL_MS = 50
+DURATION_SECONDS = 2.0
+COALESCE_INTERVALS_MS = [100, 300, 1000]
+
+
+class NullWebSocket:
+    async def send_text(self, data):
+        pass
+
+    async def send_bytes(self, data):
+        pass
+
+
+def build_manager() -> ConnectionManager:
+    manager = ConnectionManager(backplane=InMemoryBackplane())
+    stats = RoomStats()
+    manager.room_stats[1] = stats
+    manager.active_connections[1] = {
+        user_id: ClientConnection(
+            NullWebSocket(), 1, user_id, f"user{user_id}", stats, max_queue=100_000
+        )
+        for user_id in range(ROOM_SIZE)
+    }
+    return manager
+
+
+def received(manager: ConnectionManager):
+    # 수신자 한 명 기준 프레임 수와 바이트 수
+    queue = manager.active_connections[1][0].queue
+    return len(queue), sum(len(frame.data) for frame in queue)
+
+
+async def run_direct() -> tuple:
+    manager = build_manager()
+    ticks = int(DURATION_SECONDS * 1000 / KEYSTROKE_INTERVAL_MS)
+    for _ in range(ticks):
+        for typist in range(TYPISTS):
+            await manager._deliver_local(
+                1,
+                {
+                    "type": "typing",
+                    "sender_username": f"user{typist}",
+                    "timestamp": "2024-03-01T12:00:00.000000",
+                },
+            )
+    return received(manager)
+
+
+async def run_coalesced(interval_ms: float) -> tuple:
+    manager = build_manager()
+    coalescer = EventCoalescer(publish=manager._deliver_local, interval_ms=interval_ms)
+    await coalescer.start()
+    ticks = int(DURATION_SECONDS * 1000 / KEYSTROKE_INTERVAL_MS)
+    for _ in range(ticks):
+        for typist in range(TYPISTS):
+            coalescer.typing(1, f"user{typist}")
+        await asyncio.sleep(KEYSTROKE_INTERVAL_MS / 1000)
+    await coalescer.stop()
+    return received(manager)
+
+
+async def main():
+    # 이벤트마다 남는 INFO 로그가 측정값을 왜곡하지 않도록 비활성화
+    logging.disable(logging.INFO)
+    print(
+        f"room size {ROOM_SIZE}, {TYPISTS} typists, keystroke every {KEYSTROKE_INTERVAL_MS}ms for {DURATION_SECONDS}s"
+    )
+    print(
+        f"{'scenario':<20} {'frames/recipient':>17} {'bytes/recipient':>16} {'room fan-out':>13}"
+    )
+    frames, size = await run_direct()
+    print(f"{'direct':<20} {frames:>17} {size:>16} {frames * ROOM_SIZE:>13}")
+    for interval_ms in COALESCE_INTERVALS_MS:
+        frames, size = await run_coalesced(interval_ms)
+        name = f"coalesced {interval_ms}ms"
+        print(f"{name:<20} {frames:>17} {size:>16} {frames * ROOM_SIZE:>13}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,151 @@
+"""
+HTTP 히스토리 조회 부하 중 WebSocket 지연 시간 벤치마크
+
+실행 중인 서버에 대해 WebSocket 으로 메시지를 보내고 자신에게 브로드캐스트가
+돌아올 때까지의 왕복 시간을 측정합니다. 먼저 부하 없이 측정한 뒤, 여러 스레드가
+동시에 GET /chat/{room_id}/messages 를 호출하는 상태에서 다시 측정합니다.
+한 사용자가 짧은 시간에 많은 메시지를 보내므로 서버는 MESSAGE_RATE_USER_PER_MINUTE,
+MESSAGE_RATE_USER_BURST 를 충분히 높여 실행합니다.
+
+실행: python -m benchmarks.ws_latency_under_http_load --base-url http://localhost:8002
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+import websockets
+
+
+def http_json(method: str, url: str, body=None, token: str = None, form=False):
+    headers = {}
+    data = None
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if body is not None:
+        if form:
+            data = urllib.parse.urlencode(body).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        else:
+            data = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+    request = urllib.request.Request(url, data=data, headers=headers, method=method)
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read() or b"null")
+
+
+def setup(base_url: str, history: int):
+    # 벤치마크 전용 사용자와 채팅방 생성, 히스토리 메시지 적재
+    suffix = random.randint(1, 100000000)
+    users = [f"bench{suffix}a", f"bench{suffix}b"]
+    tokens = []
+    for username in users:
+        http_json(
+            "POST",
+            f"{base_url}/auth/register",
+            {"username": username, "password": "benchpassword"},
+        )
+        token = http_json(
+            "POST",
+            f"{base_url}/auth/token",
+            {"username": username, "password": "benchpassword"},
+            form=True,
+        )["access_token"]
+        tokens.append(token)
+
+    room = http_json(
+        "POST",
+        f"{base_url}/chat/rooms/",
+        {"name": f"bench-{suffix}", "participants": [users[1]]},
+        token=tokens[0],
+    )
+    for index in range(history):
+        http_json(
+            "POST",
+            f"{base_url}/chat/{room['id']}/messages",
+            {"content": f"history {index}"},
+            token=tokens[1],
+        )
+    return room["id"], tokens
+
+
+def http_readers(base_url: str, room_id: int, token: str, count: int, stop):
+    completed = [0]
+
+    def reader():
+        while not stop.is_set():
+            page = random.randint(1, 10)
+            http_json(
+                "GET",
+                f"{base_url}/chat/{room_id}/messages?page={page}&page_size=50",
+                token=token,
+            )
+            completed[0] += 1
+
+    threads = [threading.Thread(target=reader, daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, completed
+
+
+async def measure_ws(ws_url: str, samples: int, interval: float):
+    latencies = []
+    async with websockets.connect(ws_url) as websocket:
+        for index in range(samples):
+            marker = f"latency-probe-{index}-{time.time_ns()}"
+            started = time.perf_counter()
+            await websocket.send(json.dumps({"content": marker}))
+            while True:
+                message = json.loads(await websocket.recv())
+                if message.get("type") == "chat" and message.get("content") == marker:
+                    break
+            latencies.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(interval)
+    return latencies
+
+
+def summarize(label: str, latencies):
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"{label:<24} n={len(ordered):<5} p50={statistics.median(ordered):8.2f}ms "
+        f"p99={p99:8.2f}ms max={ordered[-1]:8.2f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8002")
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--samples", type=int, default=300)
+    parser.add_argument("--interval", type=float, default=0.02)
+    parser.add_argument("--history", type=int, default=500)
+    args = parser.parse_args()
+
+    room_id, tokens = await asyncio.to_thread(setup, args.base_url, args.history)
+    ws_base = args.base_url.replace("http://", "ws://").replace("https://", "wss://")
+    ws_url = f"{ws_base}/chat/rooms/{room_id}/ws?token={tokens[0]}"
+
+    idle = await measure_ws(ws_url, args.samples, args.interval)
+    summarize("idle", idle)
+
+    stop = threading.Event()
+    _, completed = http_readers(args.base_url, room_id, tokens[1], args.readers, stop)
+    started = time.perf_counter()
+    loaded = await measure_ws(ws_url, args.samples, args.interval)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    summarize(f"with {args.readers} HTTP readers", loaded)
+    print(
+        f"history reads completed: {completed[0]} ({completed[0] / elapsed:.1f} req/s)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,8 +4,9 @@
 주의: 이 스크립트는 모든 데이터를 삭제합니다. 실행 전에 반드시 백업하세요.
 """
 
-from app.database import engine, Base
-from app.models import user, friendship, chat as chat_models
+from app.database import engine, Base, AsyncSessionLocal
+from app.models import user, friendship, outbox, chat as chat_models
+import asyncio
 import sys
 
 
@@ -20,6 +21,7 @@ def confirm_migration():
 def drop_tables():
     """모든 테이블을 삭제합니다."""
     print("테이블 삭제 중...")
+    outbox.OutboxMessage.__table__.drop(engine, checkfirst=True)
     chat_models.Message.__table__.drop(engine, checkfirst=True)
     chat_models.ChatRoomParticipant.__table__.drop(engine, checkfirst=True)
     chat_models.ChatRoom.__table__.drop(engine, checkfirst=True)
@@ -35,10 +37,26 @@ def create_tables():
     user.Base.metadata.create_all(bind=engine)
     friendship.Base.metadata.create_all(bind=engine)
     chat_models.Base.metadata.create_all(bind=engine)
+    outbox.Base.metadata.create_all(bind=engine)
     print("모든 테이블이 생성되었습니다.")
 
 
+async def rebuild_summaries():
+    """기존 데이터로 채팅방 요약 컬럼을 다시 계산합니다."""
+    from app.services.room_summary import rebuild_room_summaries
+
+    print("채팅방 요약 재계산 중...")
+    async with AsyncSessionLocal() as db:
+        count = await rebuild_room_summaries(db)
+    print(f"{count}개 채팅방의 요약이 갱신되었습니다.")
+
+
 if __name__ == "__main__":
+    # 테이블을 유지한 채 채팅방 요약만 다시 계산
+    if "--rebuild-summaries" in sys.argv:
+        asyncio.run(rebuild_summaries())
+        sys.exit(0)
+
     if not confirm_migration():
         print("마이그레이션이 취소되었습니다.")
         sys.exit(0)
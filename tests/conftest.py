@@ -0,0 +1,69 @@
+import itertools
+import os
+import tempfile
+
+import pytest
+
+# 앱을 import 하기 전에 임시 SQLite DB 와 워커 내부 저장소를 사용하도록 설정
+_db_dir = tempfile.mkdtemp(prefix="chat-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/test.db"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ["REDIS_URL"] = "memory://"
+for _name in (
+    "BROADCAST_BACKPLANE",
+    "MESSAGE_BUFFER_BACKEND",
+    "RATE_LIMIT_BACKEND",
+    "PRESENCE_BACKEND",
+):
+    os.environ.pop(_name, None)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+_usernames = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def make_user(client):
+    """새 사용자를 가입시키고 (사용자 이름, 인증 헤더) 를 반환합니다."""
+
+    def _make_user():
+        username = f"user{next(_usernames)}"
+        password = "pw123456"
+        response = client.post(
+            "/auth/register", json={"username": username, "password": password}
+        )
+        assert response.status_code == 200, response.text
+        response = client.post(
+            "/auth/token", data={"username": username, "password": password}
+        )
+        assert response.status_code == 200, response.text
+        token = response.json()["access_token"]
+        return username, {"Authorization": f"Bearer {token}"}
+
+    return _make_user
+
+
+@pytest.fixture
+def make_room(client, make_user):
+    """채팅방을 만들고 ID 를 반환합니다. 참여자를 지정하지 않으면 새 사용자 한 명을 초대합니다."""
+
+    def _make_room(headers, participants=None):
+        if participants is None:
+            participants = [make_user()[0]]
+        response = client.post(
+            "/chat/rooms/",
+            json={"name": "room", "participants": list(participants)},
+            headers=headers,
+        )
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+
+    return _make_room
@@ -0,0 +1,97 @@
+from app.database import SessionLocal
+from app.models.chat import Message
+
+
+def send_messages(client, room_id, headers, count):
+    for i in range(count):
+        response = client.post(
+            f"/chat/{room_id}/messages", json={"content": f"m{i}"}, headers=headers
+        )
+        assert response.status_code == 200, response.text
+
+
+def contents(page):
+    return [message["content"] for message in page["messages"]]
+
+
+def test_before_cursor_walks_history_without_gaps(client, make_user, make_room):
+    _, headers = make_user()
+    room_id = make_room(headers)
+    send_messages(client, room_id, headers, 5)
+
+    page = client.get(f"/chat/{room_id}/messages?page_size=2", headers=headers).json()
+    assert contents(page) == ["m3", "m4"]
+    assert page["has_more"]
+
+    seen = contents(page)
+    while page["has_more"]:
+        page = client.get(
+            f"/chat/{room_id}/messages?page_size=2&before={page['before_cursor']}",
+            headers=headers,
+        ).json()
+        seen = contents(page) + seen
+    assert seen == ["m0", "m1", "m2", "m3", "m4"]
+
+
+def test_after_cursor_walks_forward(client, make_user, make_room):
+    _, headers = make_user()
+    room_id = make_room(headers)
+    send_messages(client, room_id, headers, 5)
+
+    newest = client.get(f"/chat/{room_id}/messages?page_size=2", headers=headers)
+    older = client.get(
+        f"/chat/{room_id}/messages?page_size=2&before={newest.json()['before_cursor']}",
+        headers=headers,
+    ).json()
+    assert contents(older) == ["m1", "m2"]
+
+    page = client.get(
+        f"/chat/{room_id}/messages?page_size=2&after={older['before_cursor']}",
+        headers=headers,
+    ).json()
+    assert contents(page) == ["m2", "m3"]
+    assert page["has_more"]
+
+    page = client.get(
+        f"/chat/{room_id}/messages?page_size=2&after={page['after_cursor']}",
+        headers=headers,
+    ).json()
+    assert contents(page) == ["m4"]
+    assert not page["has_more"]
+
+
+def test_cursor_pages_skip_unnumbered_messages(client, make_user, make_room):
+    _, headers = make_user()
+    room_id = make_room(headers)
+    send_messages(client, room_id, headers, 3)
+    # 순번 백필 전에 저장된 메시지
+    with SessionLocal() as db:
+        sender_id = db.query(Message.sender_id).filter_by(chat_room_id=room_id).first()
+        db.add(
+            Message(
+                chat_room_id=room_id, sender_id=sender_id[0], content="legacy", seq=None
+            )
+        )
+        db.commit()
+
+    page = client.get(
+        f"/chat/{room_id}/messages?page_size=10&include_total=true", headers=headers
+    ).json()
+    assert contents(page) == ["m0", "m1", "m2"]
+    assert not page["has_more"]
+    page = client.get(
+        f"/chat/{room_id}/messages?page_size=2&include_total=true", headers=headers
+    ).json()
+    page = client.get(
+        f"/chat/{room_id}/messages?page_size=2&before={page['before_cursor']}",
+        headers=headers,
+    ).json()
+    assert contents(page) == ["m0"]
+    assert not page["has_more"]
+
+
+def test_invalid_cursor_is_rejected(client, make_user, make_room):
+    _, headers = make_user()
+    room_id = make_room(headers)
+    response = client.get(f"/chat/{room_id}/messages?before=zzz", headers=headers)
+    assert response.status_code == 400
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+import msgpack
+import pytest
+
+from app.utils.codecs import JSON_CODEC, CODECS, negotiate_codec
+
+
+def websocket(*subprotocols):
+    return SimpleNamespace(scope={"subprotocols": list(subprotocols)})
+
+
+def test_no_subprotocol_uses_json():
+    assert negotiate_codec(websocket()) == (JSON_CODEC, None)
+    assert negotiate_codec(SimpleNamespace(scope={})) == (JSON_CODEC, None)
+
+
+def test_first_supported_subprotocol_wins():
+    codec, subprotocol = negotiate_codec(websocket("chat.msgpack", "chat.json"))
+    assert (codec.name, subprotocol) == ("msgpack", "chat.msgpack")
+
+    codec, subprotocol = negotiate_codec(websocket("chat.v2", "chat.json"))
+    assert (codec, subprotocol) == (JSON_CODEC, "chat.json")
+
+
+def test_unknown_subprotocols_fall_back_to_json():
+    assert negotiate_codec(websocket("chat.v2")) == (JSON_CODEC, None)
+
+
+@pytest.mark.parametrize("subprotocol", sorted(CODECS))
+def test_codecs_round_trip(subprotocol):
+    codec = CODECS[subprotocol]
+    frame = codec.encode({"content": "안녕", "message_type": "chat"})
+    assert isinstance(frame, bytes) == codec.binary
+    assert codec.decode_incoming(frame).content == "안녕"
+
+
+def test_non_object_payload_is_rejected():
+    with pytest.raises(ValueError):
+        JSON_CODEC.decode("[1, 2]")
+
+
+def test_websocket_uses_negotiated_codec(client, make_user, make_room):
+    _, headers = make_user()
+    room_id = make_room(headers)
+    token = headers["Authorization"].split()[1]
+
+    with client.websocket_connect(
+        f"/chat/rooms/{room_id}/ws?token={token}", subprotocols=["chat.msgpack"]
+    ) as ws:
+        assert ws.accepted_subprotocol == "chat.msgpack"
+        frame = msgpack.unpackb(ws.receive_bytes(), raw=False)
+        assert frame["type"] == "users_list"
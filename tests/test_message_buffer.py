@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from app.services.message_buffer import (
+    InMemoryMessageBuffer,
+    RedisMessageBuffer,
+    contiguous_newest,
+)
+from app.utils.backplane import RedisBackplane
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def entry(seq):
+    return {"id": seq * 10, "seq": seq, "content": f"m{seq}"}
+
+
+def newest_first(*seqs):
+    return [entry(seq) for seq in sorted(seqs, reverse=True)]
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        "redis.asyncio.from_url",
+        lambda url, **kwargs: fakeredis.aioredis.FakeRedis(server=server),
+    )
+    return server
+
+
+def test_contiguous_newest_rejects_gaps():
+    assert contiguous_newest(newest_first(5, 4, 3), 2) == newest_first(5, 4)
+    assert contiguous_newest(newest_first(5, 3), 2) is None
+    # 항목이 모자라면 첫 메시지까지 있어야 함
+    assert contiguous_newest(newest_first(2, 1), 5) == newest_first(2, 1)
+    assert contiguous_newest(newest_first(3, 2), 5) is None
+
+
+def test_buffer_behind_the_room_is_a_miss():
+    buffer = InMemoryMessageBuffer(size=10)
+
+    async def run():
+        await buffer.fill(1, newest_first(1, 2, 3), await buffer.generation(1))
+        return (
+            await buffer.newest(1, 3, latest_seq=3),
+            await buffer.newest(1, 3, latest_seq=4),
+            await buffer.since(1, 10, latest_seq=3),
+            await buffer.since(1, 10, latest_seq=4),
+        )
+
+    fresh, behind, replay, replay_behind = asyncio.run(run())
+    assert fresh == newest_first(3, 2, 1)
+    assert behind is None
+    assert replay == [entry(2), entry(3)]
+    assert replay_behind is None
+    assert buffer.stale_reads == 2
+
+
+def test_store_script_ignores_fill_after_invalidation(redis_server):
+    buffer = RedisMessageBuffer(size=10, redis_url="redis://test", prefix="test:")
+
+    async def run():
+        await buffer.start()
+        generation = await buffer.generation(1)
+        # DB 를 읽는 동안 다른 요청이 메시지를 삭제
+        await buffer.invalidate(1)
+        await buffer.fill(1, newest_first(1, 2, 3), generation)
+        stale = await buffer.newest(1, 3)
+        await buffer.fill(1, newest_first(1, 2), await buffer.generation(1))
+        fresh = await buffer.newest(1, 2)
+        await buffer.stop()
+        return stale, fresh
+
+    stale, fresh = asyncio.run(run())
+    assert stale is None
+    assert fresh == newest_first(2, 1)
+    assert buffer.stale_fills == 1
+    assert buffer.fills == 1
+    assert buffer.errors == 0
+
+
+def test_store_script_keeps_newest_entries(redis_server):
+    buffer = RedisMessageBuffer(size=3, redis_url="redis://test", prefix="test:")
+
+    async def run():
+        await buffer.start()
+        for seq in range(1, 6):
+            await buffer.append(1, entry(seq))
+        # 같은 순번을 다시 넣어도 중복되지 않음
+        await buffer.append(1, entry(5))
+        entries = await buffer._entries(1, 10)
+        await buffer.stop()
+        return entries
+
+    assert asyncio.run(run()) == newest_first(5, 4, 3)
+
+
+def test_invalidation_reaches_other_workers(redis_server):
+    async def deliver(envelope):
+        pass
+
+    async def run():
+        buffers, backplanes = [], []
+        for _ in range(2):
+            backplane = RedisBackplane(redis_url="redis://test")
+            await backplane.start(deliver)
+            buffer = InMemoryMessageBuffer(size=10)
+            buffer.attach(backplane)
+            await buffer.fill(1, newest_first(1, 2), await buffer.generation(1))
+            buffers.append(buffer)
+            backplanes.append(backplane)
+
+        await buffers[0].invalidate_everywhere(1)
+        for _ in range(100):
+            if buffers[1].invalidations:
+                break
+            await asyncio.sleep(0.01)
+        result = [await buffer.newest(1, 2) for buffer in buffers]
+        for backplane in backplanes:
+            await backplane.stop()
+        return result
+
+    assert asyncio.run(run()) == [None, None]
@@ -0,0 +1,84 @@
+from app.services.membership import RoomMembership
+from app.services.message_rate_limit import message_buckets, rate_limit_exceeded
+
+
+def membership(slow_mode_seconds=0, message_rate_per_minute=None):
+    return RoomMembership(
+        room_id=1,
+        created_by=1,
+        member_ids=frozenset({1, 2}),
+        admin_ids=frozenset({1}),
+        message_rate_per_minute=message_rate_per_minute,
+        slow_mode_seconds=slow_mode_seconds,
+    )
+
+
+def test_slow_mode_bucket_skips_admins():
+    room = membership(slow_mode_seconds=30)
+    member_keys = [key for key, _ in message_buckets(room, 2)]
+    admin_keys = [key for key, _ in message_buckets(room, 1)]
+    assert member_keys == ["user:2", "room:1", "slow:1:2"]
+    assert admin_keys == ["user:1", "room:1"]
+
+
+def test_room_burst_does_not_exceed_room_rate():
+    room = membership(message_rate_per_minute=5)
+    limits = dict(message_buckets(room, 2))
+    assert limits["room:1"].burst == 5
+    assert limits["room:1"].rate == 5 / 60
+
+
+def test_rate_limit_exceeded_rounds_retry_after_up():
+    assert rate_limit_exceeded(0.2).headers["Retry-After"] == "1"
+    exc = rate_limit_exceeded(2.1)
+    assert exc.status_code == 429
+    assert exc.headers["Retry-After"] == "3"
+
+
+def test_slow_mode_returns_429_with_retry_after(client, make_user, make_room):
+    _, admin = make_user()
+    member_name, member = make_user()
+    room_id = make_room(admin, [member_name])
+
+    response = client.put(
+        f"/chat/rooms/{room_id}/rate-limit",
+        json={"slow_mode_seconds": 30},
+        headers=admin,
+    )
+    assert response.status_code == 200, response.text
+
+    response = client.post(
+        f"/chat/{room_id}/messages", json={"content": "first"}, headers=member
+    )
+    assert response.status_code == 200, response.text
+    response = client.post(
+        f"/chat/{room_id}/messages", json={"content": "second"}, headers=member
+    )
+    assert response.status_code == 429
+    assert 29 <= int(response.headers["Retry-After"]) <= 30
+
+    # 관리자는 슬로우 모드를 적용받지 않음
+    for content in ("admin 1", "admin 2"):
+        response = client.post(
+            f"/chat/{room_id}/messages", json={"content": content}, headers=admin
+        )
+        assert response.status_code == 200, response.text
+
+    page = client.get(f"/chat/{room_id}/messages", headers=admin).json()
+    assert [message["content"] for message in page["messages"]] == [
+        "first",
+        "admin 1",
+        "admin 2",
+    ]
+
+
+def test_only_admins_change_rate_limits(client, make_user, make_room):
+    _, admin = make_user()
+    member_name, member = make_user()
+    room_id = make_room(admin, [member_name])
+    response = client.put(
+        f"/chat/rooms/{room_id}/rate-limit",
+        json={"slow_mode_seconds": 30},
+        headers=member,
+    )
+    assert response.status_code == 403
@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models.outbox import OutboxMessage
+from app.services.outbox import OutboxRelay, coalesce_rows
+from app.tasks.email import send_email, send_email_batch
+
+
+def row(row_id, task_name, args, kwargs=None):
+    return OutboxMessage(id=row_id, task_name=task_name, args=args, kwargs=kwargs or {})
+
+
+def test_coalesce_rows_merges_batchable_tasks():
+    rows = [
+        row(1, send_email.name, [10]),
+        row(2, "app.tasks.other", [1]),
+        row(3, send_email.name, [11]),
+        row(4, send_email.name, [12]),
+    ]
+    groups = coalesce_rows(rows)
+
+    assert [[r.id for r in group_rows] for group_rows, _ in groups] == [
+        [1, 3, 4],
+        [2],
+    ]
+    assert [message for _, message in groups] == [
+        (send_email_batch.name, [[10, 11, 12]], {}),
+        ("app.tasks.other", [1], {}),
+    ]
+
+
+def test_coalesce_rows_keeps_rows_with_kwargs_separate():
+    rows = [
+        row(1, send_email.name, [10], {"subject": "hi"}),
+        row(2, send_email.name, [10, 11]),
+        row(3, send_email.name, [12]),
+    ]
+    groups = coalesce_rows(rows)
+
+    assert [message for _, message in groups] == [
+        (send_email.name, [10], {"subject": "hi"}),
+        (send_email.name, [10, 11], {}),
+        (send_email_batch.name, [[12]], {}),
+    ]
+
+
+def test_coalesce_rows_empty():
+    assert coalesce_rows([]) == []
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/outbox.db")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(OutboxMessage.__table__.create)
+        async with session_factory() as db:
+            db.add_all(
+                [
+                    OutboxMessage(task_name="app.tasks.first", args=[1], kwargs={}),
+                    OutboxMessage(task_name=send_email.name, args=[10], kwargs={}),
+                    OutboxMessage(task_name=send_email.name, args=[11], kwargs={}),
+                    OutboxMessage(task_name="app.tasks.last", args=[2], kwargs={}),
+                ]
+            )
+            await db.commit()
+
+    asyncio.run(setup())
+    yield session_factory
+    asyncio.run(engine.dispose())
+
+
+def relay_once(session_factory, dispatch):
+    relay = OutboxRelay(session_factory=session_factory, dispatch=dispatch)
+
+    async def run():
+        relayed = await relay._relay_batch()
+        async with session_factory() as db:
+            rows = (
+                await db.scalars(select(OutboxMessage).order_by(OutboxMessage.id))
+            ).all()
+        return relayed, rows
+
+    relayed, rows = asyncio.run(run())
+    return relay, relayed, rows
+
+
+def test_partial_failure_backs_off_only_the_failed_message(session_factory):
+    dispatched = []
+
+    def dispatch(messages):
+        dispatched.extend(messages)
+        return 1, RuntimeError("broker down")
+
+    relay, relayed, rows = relay_once(session_factory, dispatch)
+
+    assert dispatched == [
+        ("app.tasks.first", [1], {}),
+        (send_email_batch.name, [[10, 11]], {}),
+        ("app.tasks.last", [2], {}),
+    ]
+    # 보낸 행은 삭제, 실패한 배치 메시지의 행은 재시도 대기, 나머지는 그대로
+    assert [r.task_name for r in rows] == [
+        send_email.name,
+        send_email.name,
+        "app.tasks.last",
+    ]
+    failed, last = rows[:2], rows[2]
+    for r in failed:
+        assert r.attempts == 1
+        assert r.last_error == "broker down"
+        assert r.available_at is not None
+    assert last.attempts == 0
+    assert last.available_at is None
+    assert relayed == 0
+    assert relay.dispatched == 1
+    assert relay.failed_attempts == 1
+
+
+def test_error_after_every_send_keeps_rows_sent(session_factory):
+    def dispatch(messages):
+        return len(messages), RuntimeError("connection release failed")
+
+    relay, relayed, rows = relay_once(session_factory, dispatch)
+
+    assert rows == []
+    assert relayed == 4
+    assert relay.dispatched == 4
+    assert relay.failed_attempts == 0
+
+
+def test_failure_before_any_send_keeps_every_row(session_factory):
+    def dispatch(messages):
+        return 0, ConnectionError("refused")
+
+    relay, relayed, rows = relay_once(session_factory, dispatch)
+
+    assert len(rows) == 4
+    assert [r.attempts for r in rows] == [1, 0, 0, 0]
+    assert relay.dispatched == 0
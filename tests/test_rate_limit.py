@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from app.utils.rate_limit import BucketLimit, InMemoryRateLimiter, RedisRateLimiter
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def test_memory_buckets_refill_over_time():
+    limiter = InMemoryRateLimiter()
+    buckets = [("user:1", BucketLimit(rate=1, burst=2))]
+    assert limiter.take(buckets, now=0.0) == 0
+    assert limiter.take(buckets, now=0.0) == 0
+    assert limiter.take(buckets, now=0.0) == pytest.approx(1.0)
+    assert limiter.take(buckets, now=0.5) == pytest.approx(0.5)
+    assert limiter.take(buckets, now=1.0) == 0
+
+
+def test_memory_buckets_take_nothing_when_one_is_empty():
+    limiter = InMemoryRateLimiter()
+    roomy = ("user:1", BucketLimit(rate=1, burst=5))
+    slow = ("slow:1:1", BucketLimit(rate=0.1, burst=1))
+    assert limiter.take([roomy, slow], now=0.0) == 0
+    assert limiter.take([roomy, slow], now=0.0) == pytest.approx(10.0)
+    assert limiter.level("user:1", roomy[1], now=0.0) == pytest.approx(4.0)
+
+
+@pytest.fixture
+def redis_limiter(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        "redis.asyncio.from_url",
+        lambda url, **kwargs: fakeredis.aioredis.FakeRedis(server=server),
+    )
+    return RedisRateLimiter(redis_url="redis://test", prefix="test:")
+
+
+def test_acquire_script_limits_burst(redis_limiter):
+    async def run():
+        await redis_limiter.start()
+        buckets = [("user:1", BucketLimit(rate=0.01, burst=3))]
+        results = [await redis_limiter.acquire(buckets) for _ in range(4)]
+        await redis_limiter.stop()
+        return results
+
+    results = asyncio.run(run())
+    assert results[:3] == [0, 0, 0]
+    assert results[3] == pytest.approx(100, rel=0.01)
+    assert redis_limiter.errors == 0
+    assert redis_limiter.stats()["rejected"] == 1
+
+
+def test_acquire_script_is_all_or_nothing(redis_limiter):
+    roomy = ("user:1", BucketLimit(rate=0.01, burst=5))
+    slow = ("slow:1:1", BucketLimit(rate=0.01, burst=1))
+
+    async def run():
+        await redis_limiter.start()
+        first = await redis_limiter.acquire([roomy, slow])
+        second = await redis_limiter.acquire([roomy, slow])
+        tokens = await redis_limiter._redis.hget("test:user:1", "tokens")
+        await redis_limiter.stop()
+        return first, second, float(tokens)
+
+    first, second, tokens = asyncio.run(run())
+    assert first == 0
+    assert second > 0
+    # 슬로우 모드 버킷이 비어 있어 사용자 버킷도 차감되지 않음
+    assert tokens == pytest.approx(4.0, abs=0.01)
+    assert redis_limiter.errors == 0